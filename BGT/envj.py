@@ -10,10 +10,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 from bot.tariff_environment import PRICE_KEY, TIMESTAMP_KEY, BatteryEnv
 
-P_mean = 160.0
-P_std = 680.0
-
-pv_max = 10.0
+from .constants import P_mean, P_std, pv_max
 
 
 class BatteryGymJ(gym.Env):
@@ -0,0 +1,6 @@
+# Scaling of the observations shared by the gym environments and the RL policies. Kept apart from
+# env.py so the policies can use them without importing gymnasium or the battery environment.
+P_mean = 160.0
+P_std = 680.0
+
+pv_max = 10.0
@@ -0,0 +1,141 @@
+"""
+Batched variant of the battery simulation environment.
+
+`BatchedBatteryEnv` simulates N independent batteries in lock-step over the same market data.
+State of charge, capacity, maximum rate and total profit are held as length-N NumPy arrays and
+each step applies the clipping rules of `environment.Battery` and `environment.BatteryEnv` to the
+whole batch at once. Every element follows exactly the same floating point operations as the
+scalar environment, so results match a loop of `BatteryEnv`s bit for bit.
+
+Units follow environment.py: kW, kWh and $/MWh.
+"""
+
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from environment import kW_to_kWh, kWh_to_kW
+from fast_environment import MarketArrays
+
+ArrayLike = Union[float, np.ndarray]
+
+
+class BatchedBattery:
+    """
+    N batteries with per-battery capacity, maximum charge rate and initial charge.
+    """
+    def __init__(self, capacity_kWh: ArrayLike, max_charge_rate_kW: ArrayLike, initial_charge_kWh: ArrayLike, batch_size: Optional[int] = None):
+        shape = np.broadcast_shapes(np.shape(capacity_kWh), np.shape(max_charge_rate_kW), np.shape(initial_charge_kWh), (batch_size,) if batch_size else ())
+        if len(shape) != 1:
+            raise ValueError('Batch parameters must be scalars or 1D arrays; pass batch_size when all of them are scalars.')
+
+        self.capacity_kWh = np.broadcast_to(np.asarray(capacity_kWh, dtype=float), shape).copy()
+        self.max_charge_rate_kW = np.broadcast_to(np.asarray(max_charge_rate_kW, dtype=float), shape).copy()
+        self.initial_charge_kWh = np.broadcast_to(np.asarray(initial_charge_kWh, dtype=float), shape).copy()
+        self._state_of_charge_kWh = np.minimum(self.initial_charge_kWh, self.capacity_kWh)
+
+    def __len__(self) -> int:
+        return len(self.capacity_kWh)
+
+    def reset(self):
+        self._state_of_charge_kWh = np.minimum(self.initial_charge_kWh, self.capacity_kWh)
+
+    def charge_at(self, kW: np.ndarray, where: Optional[np.ndarray] = None) -> np.ndarray:
+        kW = np.minimum(kW, self.max_charge_rate_kW)
+        kWh_to_add = kW_to_kWh(kW)
+        kWh_to_add = np.minimum(kWh_to_add, self.capacity_kWh - self._state_of_charge_kWh)
+        if where is not None:
+            kWh_to_add = np.where(where, kWh_to_add, 0)
+        self._state_of_charge_kWh = self._state_of_charge_kWh + kWh_to_add
+        return kWh_to_add
+
+    def discharge_at(self, kW: np.ndarray) -> np.ndarray:
+        kW = np.minimum(kW, self.max_charge_rate_kW)
+        kWh_to_remove = kW_to_kWh(kW)
+        kWh_to_remove = np.minimum(kWh_to_remove, self._state_of_charge_kWh)
+        self._state_of_charge_kWh = np.maximum(self._state_of_charge_kWh - kWh_to_remove, 0)
+        return kWh_to_remove
+
+    @property
+    def state_of_charge_kWh(self) -> np.ndarray:
+        return self._state_of_charge_kWh
+
+
+class BatchedBatteryEnv:
+    """
+    Environment stepping N batteries through the same market data.
+
+    Actions passed to `step` are scalars or length-N arrays. The returned internal state has the
+    same keys as `environment.BatteryEnv.get_info`, with array values for the per-battery fields.
+    """
+    def __init__(self, data: Union[pd.DataFrame, MarketArrays], capacity_kWh: ArrayLike = 13, max_charge_rate_kW: ArrayLike = 5, initial_charge_kWh: ArrayLike = 7.5, initial_profit: ArrayLike = 0.0, batch_size: Optional[int] = None):
+        self.battery = BatchedBattery(capacity_kWh, max_charge_rate_kW, initial_charge_kWh, batch_size)
+        self.market_arrays = data if isinstance(data, MarketArrays) else MarketArrays(data)
+        self.total_profit = np.broadcast_to(np.asarray(initial_profit, dtype=float), (len(self.battery),)).copy()
+        self.current_step = 0
+        self.episode_length = len(self.market_arrays)
+
+    @property
+    def batch_size(self) -> int:
+        return len(self.battery)
+
+    def initial_state(self):
+        assert self.current_step == 0
+
+        return self.market_arrays.row(self.current_step), self.get_info(0)
+
+    def step(self, charge_kW: ArrayLike, solar_kW_to_battery: ArrayLike, total_solar_kW: ArrayLike) -> Tuple[Optional[dict], Optional[dict]]:
+        if self.current_step >= self.episode_length:
+            return None, None
+        market_price_mWh = self.market_arrays.prices[self.current_step]
+
+        kW_currently_charging, solar_profit_delta = self.process_solar(np.asarray(solar_kW_to_battery, dtype=float), np.asarray(total_solar_kW, dtype=float), market_price_mWh)
+
+        max_charge_kW = self.battery.max_charge_rate_kW - kW_currently_charging
+        battery_profit_delta = self.charge_discharge(np.minimum(charge_kW, max_charge_kW), market_price_mWh)
+
+        external_state = self.get_info(battery_profit_delta + solar_profit_delta)
+
+        self.current_step += 1
+        if self.current_step >= self.episode_length:
+            return None, external_state
+
+        return self.market_arrays.row(self.current_step), external_state
+
+    def process_solar(self, solar_kW_to_battery: np.ndarray, total_solar_kW: np.ndarray, market_price_mWh: float) -> Tuple[np.ndarray, np.ndarray]:
+        solar_kW_to_battery = np.maximum(0, np.minimum(total_solar_kW, solar_kW_to_battery))
+
+        kWh_charged = self.battery.charge_at(solar_kW_to_battery)
+        kW_charging = kWh_to_kW(kWh_charged)
+        energy_to_grid_kWh = kW_to_kWh(total_solar_kW) - kWh_charged
+        profit = self.kWh_to_profit(energy_to_grid_kWh, market_price_mWh)
+
+        return kW_charging, profit
+
+    def kWh_to_profit(self, energy_removed: np.ndarray, spot_price_mWh: float) -> np.ndarray:
+        return np.round(energy_removed * spot_price_mWh / 1000, 4)
+
+    def charge_discharge(self, charge_kW: np.ndarray, spot_price_mWh: float) -> np.ndarray:
+        # Each battery takes at most one of the two branches, the other one leaves it untouched.
+        charging = charge_kW > 0
+        kWh_to_battery = self.battery.charge_at(np.where(charging, charge_kW, 0), where=charging)
+        kWh_to_grid = self.battery.discharge_at(np.where(charge_kW < 0, -charge_kW, 0))
+        return -self.kWh_to_profit(kWh_to_battery, spot_price_mWh) + self.kWh_to_profit(kWh_to_grid, spot_price_mWh)
+
+    def get_info(self, profit_delta: ArrayLike = 0) -> dict:
+        """
+        Return a dictionary containing relevant information for the agent.
+
+        :param profit_delta: The change in profit of each battery from the last action (default: 0).
+        :return: A dictionary containing information about the current state of the environment.
+        """
+        self.total_profit = self.total_profit + profit_delta
+        remaining_steps = self.episode_length - self.current_step - 1
+        return {
+            'total_profit': self.total_profit,
+            'profit_delta': profit_delta,
+            'battery_soc': self.battery.state_of_charge_kWh,
+            'max_charge_rate': self.battery.max_charge_rate_kW,
+            'remaining_steps': remaining_steps
+        }
@@ -0,0 +1,151 @@
+"""
+Dynamic programming over the battery's state of charge.
+
+The state of charge is discretised into a grid with spacing `kW_to_kWh(max_charge_rate_kW) / K`,
+so one interval can move it by -K..K grid steps: the limits of `environment.Battery`, where solar
+and grid charging share the maximum rate and discharging is limited to the rate and the charge
+held. An interval's profit depends only on the price, the PV and the net change in charge, so the
+DP needs a (T, 2K+1) table of rewards per shift and the value of every terminal state.
+
+`ShiftDP` keeps its work buffers between solves, for callers which solve the same grid and
+horizon over and over (`policies/mpc.py`). `oracle.py` solves whole data files with it.
+"""
+
+from typing import Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from environment import kW_to_kWh
+
+
+def soc_grid(capacity_kWh: float, max_charge_rate_kW: float, steps_per_interval: int) -> np.ndarray:
+    """
+    :return: The states of charge (kWh) of the DP, from empty up to full in steps of
+        `kW_to_kWh(max_charge_rate_kW) / steps_per_interval`.
+    """
+    step_kWh = kW_to_kWh(max_charge_rate_kW) / steps_per_interval
+    n_states = int(np.floor(capacity_kWh / step_kWh + 1e-9)) + 1
+    return np.arange(n_states) * step_kWh
+
+
+def grid_state(state_of_charge_kWh: float, grid: np.ndarray) -> int:
+    """
+    :return: The index of the grid state nearest to a state of charge.
+    """
+    return int(np.clip(round(state_of_charge_kWh / grid[1]), 0, len(grid) - 1))
+
+
+def shift_rewards(prices, step_kWh: float, steps_per_interval: int) -> np.ndarray:
+    """
+    :return: A (T, 2K+1) array with the profit ($) of moving the state of charge by -K..K grid
+        steps at every price ($/MWh), i.e. of buying or selling that much energy. The PV income,
+        which is the same whatever the battery does, is left out.
+    """
+    shifts_kWh = np.arange(-steps_per_interval, steps_per_interval + 1) * step_kWh
+    return -np.outer(np.asarray(prices, dtype=float), shifts_kWh) / 1000
+
+
+def tariff_shift_rewards(prices, pv_power, step_kWh: float, steps_per_interval: int, import_adjustments, export_adjustments) -> np.ndarray:
+    """
+    `shift_rewards` under a tariff (see `tariff_environment.apply_adjustment`), where exported
+    energy and energy bought from the grid are adjusted differently, so the PV income depends on
+    how much solar goes to the battery. Charging takes solar first and the rest from the grid.
+
+    :param pv_power: The PV power (kW) of every interval.
+    :param import_adjustments: The tariff adjustment of grid purchases at every interval.
+    :param export_adjustments: The tariff adjustment of exports at every interval.
+    """
+    def adjust(profit, adjustment):
+        return profit + adjustment * np.abs(profit)
+
+    prices = np.asarray(prices, dtype=float)[:, None] / 1000
+    pv_kWh = kW_to_kWh(np.asarray(pv_power, dtype=float))[:, None]
+    import_adjustments = np.asarray(import_adjustments, dtype=float)[:, None]
+    export_adjustments = np.asarray(export_adjustments, dtype=float)[:, None]
+    shifts_kWh = np.arange(-steps_per_interval, steps_per_interval + 1) * step_kWh
+
+    charged_kWh = np.maximum(shifts_kWh, 0)
+    solar_charged_kWh = np.minimum(charged_kWh, pv_kWh)
+    grid_charged_kWh = charged_kWh - solar_charged_kWh
+    discharged_kWh = np.maximum(-shifts_kWh, 0)
+
+    rewards = adjust(prices * (pv_kWh - solar_charged_kWh), export_adjustments)
+    rewards += adjust(-prices * grid_charged_kWh, import_adjustments)
+    rewards += adjust(prices * discharged_kWh, export_adjustments)
+    return rewards
+
+
+class ShiftDP:
+    """
+    Backward passes of the DP over a fixed grid, reusing the same work buffers every time.
+
+    :param n_states: The number of grid states.
+    :param steps_per_interval: K, the largest shift in grid steps per interval.
+    :param max_intervals: The longest horizon that will be solved.
+    """
+    def __init__(self, n_states: int, steps_per_interval: int, max_intervals: int):
+        self.n_states = n_states
+        self.max_shift = steps_per_interval
+        n_shifts = 2 * steps_per_interval + 1
+        # The next interval's values, padded so that moving past empty or full is never chosen.
+        # windows[j, i] is the value of moving from state j by i - max_shift.
+        self._padded = np.full(n_states + 2 * steps_per_interval, -np.inf)
+        self._windows = sliding_window_view(self._padded, n_shifts)
+        self._candidates = np.empty((n_states, n_shifts))
+        self._states = np.arange(n_states)
+        self.choices = np.empty((max_intervals, n_states), dtype=np.int8 if steps_per_interval < 128 else np.int16)
+
+    def solve(self, step_rewards: np.ndarray, terminal_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Solve the DP from the last interval back to the first.
+
+        :param step_rewards: (T, 2K+1) profit of a shift of -K..K grid steps at every interval.
+        :param terminal_values: (N,) value of ending in every grid state.
+        :return: The (N,) value of starting in every grid state and the (T, N) best shift of
+            every state at every interval, in grid steps. The choices are a view of a buffer
+            which the next `solve` overwrites.
+        """
+        n_intervals = len(step_rewards)
+        if n_intervals > len(self.choices):
+            raise ValueError(f'Cannot solve {n_intervals} intervals, the buffers hold {len(self.choices)}.')
+
+        max_shift, n_states = self.max_shift, self.n_states
+        padded, windows, candidates, states = self._padded, self._windows, self._candidates, self._states
+        values = np.asarray(terminal_values, dtype=float)
+        for t in range(n_intervals - 1, -1, -1):
+            padded[max_shift:max_shift + n_states] = values
+            np.add(windows, step_rewards[t], out=candidates)
+            best = candidates.argmax(axis=1)
+            values = candidates[states, best]
+            self.choices[t] = best - max_shift
+        return values, self.choices[:n_intervals]
+
+
+def backward_pass(step_rewards: np.ndarray, terminal_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    `ShiftDP.solve` with buffers sized for this one problem.
+    """
+    return ShiftDP(len(terminal_values), len(step_rewards[0]) // 2, len(step_rewards)).solve(step_rewards, terminal_values)
+
+
+def forward_pass(choices: np.ndarray, initial_state: int) -> np.ndarray:
+    """
+    :return: The grid state after every interval when following `choices` from `initial_state`.
+    """
+    states = np.empty(len(choices), dtype=np.int64)
+    state = initial_state
+    for t, row in enumerate(choices):
+        state += int(row[state])
+        states[t] = state
+    return states
+
+
+def shifts_to_actions(shifts_kWh, pv_power) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Turn planned changes in charge into `(solar_kW_to_battery, charge_kW)` actions. Charging takes
+    solar first and the rest from the grid; discharging leaves all solar to be exported.
+    """
+    net_kW = np.asarray(shifts_kWh, dtype=float) / kW_to_kWh(1)
+    solar_kW_to_battery = np.clip(np.minimum(net_kW, pv_power), 0, None)
+    return solar_kW_to_battery, net_kW - solar_kW_to_battery
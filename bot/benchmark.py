@@ -0,0 +1,299 @@
+"""
+Throughput benchmarks for the battery environments and the registered policies.
+
+Every case is run on each of the bundled market data files (`bot/data/*.csv`, or the files
+given with `--data`) at a few fixed sizes: 1k, 15k and 1M rows. A file shorter than a size is
+repeated, with timestamps continuing, up to it. For each case the benchmark reports
+
+- `steps_per_second`: environment steps (or policy `act` calls) per second,
+- `p50_us` / `p99_us`: the median and 99th percentile latency of a single step,
+- `peak_memory_MB`: the peak traced allocation of a second run, measured separately because
+  tracing slows everything down. That run sets up on the full data (so the environment's and
+  policy's own copies of it count) but takes at most `MEMORY_STEPS` steps, which `memory_steps`
+  records. Memory which grows with every step is therefore only counted for those steps.
+
+Environment cases step with random actions. Policy cases time only `act`, on observations from
+`fast_environment.BatteryEnv`. A case stops at the end of the data or after `--max_seconds`.
+Cases which cannot run here (a missing RL model, or gymnasium or stable-baselines3 not installed)
+are recorded as skipped; any other error is recorded as a failure.
+
+Results are saved as JSON. Save one as the baseline and pass it to `--compare` to see the change
+in throughput; the exit status is 1 if any case got slower than `--tolerance` allows, or ran in
+the baseline but is now skipped or failing.
+
+Example:
+
+    python bot/benchmark.py --output_file bot/benchmarks/baseline.json
+    python bot/benchmark.py --compare bot/benchmarks/baseline.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from environment import TIMESTAMP_KEY
+from market_data import load_market_data
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DEFAULT_SIZES = [1_000, 15_000, 1_000_000]
+HISTORY_ROWS = 288  # Rows passed to policies through `load_historical`
+MEMORY_STEPS = 5_000
+UNAVAILABLE_ERRORS = (ImportError, FileNotFoundError)  # Optional dependencies and model files
+INTERVAL = pd.Timedelta(minutes=5)
+
+
+def market_data(source: pd.DataFrame, n_rows: int) -> pd.DataFrame:
+    """
+    The first `n_rows` of `source`, repeated as often as needed with timestamps continuing at
+    5 minute intervals.
+    """
+    if n_rows <= len(source):
+        return source.iloc[:n_rows].reset_index(drop=True)
+
+    repeats = -(-n_rows // len(source))
+    data = pd.concat([source] * repeats, ignore_index=True).iloc[:n_rows]
+    start = pd.to_datetime(source[TIMESTAMP_KEY].iloc[0], utc=True)
+    data[TIMESTAMP_KEY] = pd.date_range(start, periods=n_rows, freq=INTERVAL).astype(str)
+    return data
+
+
+def random_actions(n_steps: int, max_charge_rate_kW: float = 5, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-max_charge_rate_kW, max_charge_rate_kW, size=(n_steps, 2))
+
+
+def drive_battery_env(make_env: Callable, data: pd.DataFrame, max_steps: int, max_seconds: float) -> List[int]:
+    """
+    Step a `BatteryEnv`-style environment with random actions and time every step (ns).
+    """
+    env = make_env(data)
+    actions = random_actions(min(len(data), max_steps))
+    latencies = []
+    deadline = time.perf_counter() + max_seconds
+
+    external_state, _ = env.initial_state()
+    for charge_kW, solar_kW in actions:
+        pv_power = float(external_state['pv_power'])
+        solar_kW_to_battery = min(abs(solar_kW), pv_power)
+        start = time.perf_counter_ns()
+        external_state, _ = env.step(charge_kW, solar_kW_to_battery, pv_power)
+        latencies.append(time.perf_counter_ns() - start)
+        if external_state is None or time.perf_counter() > deadline:
+            break
+    return latencies
+
+
+def drive_gym_env(make_env: Callable, data: pd.DataFrame, max_steps: int, max_seconds: float) -> List[int]:
+    env = make_env(data)
+    actions = random_actions(min(len(data), max_steps), max_charge_rate_kW=1).astype(np.float32)
+    latencies = []
+    deadline = time.perf_counter() + max_seconds
+
+    env.reset()
+    for action in actions:
+        start = time.perf_counter_ns()
+        _, _, terminated, truncated, _ = env.step(action)
+        latencies.append(time.perf_counter_ns() - start)
+        if terminated or truncated or time.perf_counter() > deadline:
+            break
+    return latencies
+
+
+def drive_policy(policy_class, data: pd.DataFrame, max_steps: int, max_seconds: float) -> List[int]:
+    """
+    Run a policy on `fast_environment.BatteryEnv` and time every `act` call (ns).
+    """
+    from fast_environment import BatteryEnv
+
+    policy = policy_class()
+    policy.load_historical(data.iloc[:HISTORY_ROWS])
+    env = BatteryEnv(data.iloc[HISTORY_ROWS:])
+    latencies = []
+    deadline = time.perf_counter() + max_seconds
+
+    external_state, internal_state = env.initial_state()
+    for _ in range(max_steps):
+        pv_power = float(external_state['pv_power'])
+        start = time.perf_counter_ns()
+        solar_kW_to_battery, charge_kW = policy.act(external_state, internal_state)
+        latencies.append(time.perf_counter_ns() - start)
+        external_state, internal_state = env.step(charge_kW, solar_kW_to_battery, pv_power)
+        if external_state is None or time.perf_counter() > deadline:
+            break
+    return latencies
+
+
+def environment_cases() -> Dict[str, Callable]:
+    """
+    The environments to benchmark, as functions `(data, max_steps, max_seconds) -> latencies`.
+    """
+    import environment
+    import fast_environment
+    import tariff_environment
+
+    def battery_gym(data):
+        # The gym environments import `bot.tariff_environment`, like the trainRL scripts.
+        repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+        if repo_dir not in sys.path:
+            sys.path.append(repo_dir)
+        from BGT.env import BatteryGym
+        return BatteryGym(data)
+
+    return {
+        'environment.BatteryEnv': lambda *args: drive_battery_env(environment.BatteryEnv, *args),
+        'fast_environment.BatteryEnv': lambda *args: drive_battery_env(fast_environment.BatteryEnv, *args),
+        'tariff_environment.BatteryEnv': lambda *args: drive_battery_env(tariff_environment.BatteryEnv, *args),
+        'BGT.env.BatteryGym': lambda *args: drive_gym_env(battery_gym, *args),
+    }
+
+
+def policy_cases() -> Dict[str, Callable]:
+    from policies import policy_classes
+
+    return {name: (lambda *args, name=name: drive_policy(policy_classes[name], *args)) for name in sorted(policy_classes)}
+
+
+def run_case(kind: str, name: str, run: Callable, source_name: str, data_name: str, data: pd.DataFrame, max_seconds: float) -> dict:
+    result = {'kind': kind, 'name': name, 'source': source_name, 'data': data_name, 'rows': len(data)}
+    try:
+        start = time.perf_counter()
+        latencies = np.array(run(data, len(data), max_seconds))
+        elapsed_s = np.sum(latencies) / 1e9
+
+        tracemalloc.start()
+        memory_steps = len(run(data, min(len(latencies), MEMORY_STEPS), max_seconds))
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    except Exception as error:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        result['skipped' if isinstance(error, UNAVAILABLE_ERRORS) else 'failed'] = f'{type(error).__name__}: {error}'
+        return result
+
+    result.update(
+        steps=len(latencies),
+        steps_per_second=len(latencies) / elapsed_s,
+        p50_us=float(np.percentile(latencies, 50) / 1e3),
+        p99_us=float(np.percentile(latencies, 99) / 1e3),
+        peak_memory_MB=peak_memory / 1e6,
+        memory_steps=memory_steps,
+        seconds_elapsed=time.perf_counter() - start
+    )
+    return result
+
+
+def bundled_data_files() -> List[str]:
+    return sorted(os.path.relpath(path) for path in glob.glob(os.path.join(DATA_DIR, '*.csv')))
+
+
+def run_benchmarks(sources: Dict[str, pd.DataFrame], sizes: List[int], max_seconds: float, kinds: List[str], name_filter: Optional[str] = None) -> List[dict]:
+    """
+    :param sources: Market data to build the benchmark data from, by name.
+    """
+    cases = []
+    if 'environment' in kinds:
+        cases += [('environment', name, run) for name, run in environment_cases().items()]
+    if 'policy' in kinds:
+        cases += [('policy', name, run) for name, run in policy_cases().items()]
+    if name_filter:
+        cases = [case for case in cases if name_filter in case[1]]
+
+    results = []
+    for source_name, source in sources.items():
+        for size in sizes:
+            data = market_data(source, size)
+            data_name = f'{size // 1000}k' if size < 1_000_000 else f'{size // 1_000_000}M'
+            for kind, name, run in cases:
+                result = run_case(kind, name, run, source_name, data_name, data, max_seconds)
+                results.append(result)
+                print(format_result(result), flush=True)
+    return results
+
+
+def format_result(result: dict) -> str:
+    label = f'{result["kind"]:<11} {result["name"]:<32} {result["source"]:<22} {result["data"]:>4}'
+    for outcome in ['skipped', 'failed']:
+        if outcome in result:
+            return f'{label}  {outcome} ({result[outcome][:80]})'
+    return f'{label}  {result["steps_per_second"]:>12,.0f} steps/s  p50 {result["p50_us"]:>9.1f}us  p99 {result["p99_us"]:>9.1f}us  peak {result["peak_memory_MB"]:>8.2f}MB over {result["memory_steps"]} steps'
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    """
+    :return: A description of every case whose throughput fell by more than `tolerance`
+        (a fraction) relative to the baseline, or which ran in the baseline but is now skipped
+        or failing.
+    """
+    def key(result):
+        return result['kind'], result['name'], result.get('source'), result['data']
+
+    def ran(result):
+        return 'skipped' not in result and 'failed' not in result
+
+    baseline_results = {key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_results.get(key(result))
+        if previous is None or not ran(previous):
+            continue
+        if not ran(result):
+            outcome = 'skipped' if 'skipped' in result else 'failed'
+            regressions.append(f'{result["name"]} on {result["data"]} of {result["source"]}: ran in the baseline, now {outcome} ({result[outcome]})')
+            continue
+        ratio = result['steps_per_second'] / previous['steps_per_second']
+        print(f'{result["kind"]:<11} {result["name"]:<32} {result["source"]:<22} {result["data"]:>4}  {ratio:6.2f}x baseline throughput')
+        if ratio < 1 - tolerance:
+            regressions.append(f'{result["name"]} on {result["data"]} of {result["source"]}: {ratio:.2f}x baseline throughput')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the battery environments and the registered policies.')
+    parser.add_argument('--data', type=str, nargs='+', default=None, help='Market data files the benchmark data is built from (default: all of bot/data/*.csv).')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Rows of market data to benchmark on.')
+    parser.add_argument('--max_seconds', type=float, default=2.0, help='Time limit of every case.')
+    parser.add_argument('--kind', type=str, nargs='+', choices=['environment', 'policy'], default=['environment', 'policy'], help='What to benchmark.')
+    parser.add_argument('--filter', type=str, default=None, help='Only run cases whose name contains this.')
+    parser.add_argument('--output_file', type=str, default=None, help='JSON file to save the results to.')
+    parser.add_argument('--compare', type=str, default=None, help='Baseline JSON to compare the results with.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Largest accepted relative drop in throughput against the baseline.')
+
+    args = parser.parse_args()
+
+    data_files = args.data or bundled_data_files()
+    sources = {os.path.splitext(os.path.basename(data_file))[0]: load_market_data(data_file) for data_file in data_files}
+    results = run_benchmarks(sources, args.sizes, args.max_seconds, args.kind, args.filter)
+
+    if args.output_file:
+        os.makedirs(os.path.dirname(args.output_file) or '.', exist_ok=True)
+        outcome = {
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'data': data_files,
+            'max_seconds': args.max_seconds,
+            'results': results
+        }
+        with open(args.output_file, 'w') as file:
+            json.dump(outcome, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            regressions = compare(results, json.load(file)['results'], args.tolerance)
+        if regressions:
+            print('Regressions:\n' + '\n'.join(regressions))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,87 +1,128 @@
+"""
+Walk-forward cross-validation of a single policy.
+
+The market data from `--present_index` onwards is split into `--folds` consecutive test windows.
+Each fold is evaluated like a separate `evaluate.py` run: the policy gets the rows before its
+window through `load_historical` (all of them, or the last `--history_size`), then trades the
+window in `tariff_environment.BatteryEnv` starting from `--initial_soc` and `--initial_profit`.
+With `--present_index 0` this is a blocked k-fold split where each fold only ever sees the past.
+
+The folds run in parallel worker processes and the score of every fold is reported together
+with the mean, standard deviation, minimum and total over all folds.
+
+Example:
+
+    python bot/evaluate_cross_validation.py --class_name MovingAveragePolicy --param window_size=20 \
+        --data bot/data/april15-may7_2023.csv --present_index 2016 --folds 5
+"""
+
 import time
 import argparse
 import os
-import random
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 from datetime import datetime
+from typing import List, NamedTuple, Optional
 import numpy as np
 import json
 
 from policies import policy_classes
-from tariff_environment import BatteryEnv, PRICE_KEY, TIMESTAMP_KEY
-from plotting import plot_results
-
-def float_or_none(value):
-    if value.lower() == 'none':
-        return None
-    try:
-        return float(value)
-    except ValueError:
-        raise argparse.ArgumentTypeError(f"{value} is not a float or 'None'")
-
-
-def load_config(file_path):
-    with open(file_path, 'r') as file:
-        return json.load(file)['policy']
-
-def set_seed(seed):
-    random.seed(seed)
-    np.random.seed(seed)
-
-def run_down_battery(battery_environment: BatteryEnv, market_prices):
-    last_day_prices = market_prices[-288:]
-    assumed_rundown_price = np.mean(last_day_prices)
-    rundown_profits = []
-    
-    while battery_environment.battery.state_of_charge_kWh > 0:
-        kWh_removed = battery_environment.battery.discharge_at(battery_environment.battery.max_charge_rate_kW)
-        rundown_profits.append(battery_environment.kWh_to_profit(kWh_removed, assumed_rundown_price))
-
-    return rundown_profits
-
-def run_trial(battery_environment: BatteryEnv, policy):
-    profits, socs, market_prices, battery_actions, solar_actions, pv_inputs, timestamps = [], [], [], [], [], [], []
-    print(battery_environment.battery.capacity_kWh)
-    external_state, internal_state = battery_environment.initial_state()
-    while True:
-        pv_power = float(external_state["pv_power"])
-        solar_kW_to_battery, charge_kW = policy.act(external_state, internal_state)
-
-        market_prices.append(external_state[PRICE_KEY])
-        timestamps.append(external_state[TIMESTAMP_KEY])
-        battery_actions.append(charge_kW)
-        solar_actions.append(solar_kW_to_battery)
-        pv_inputs.append(pv_power)
+from tariff_environment import BatteryEnv, TIMESTAMP_KEY
+from fast_evaluate import DEFAULT_INITIAL_PROFIT, DEFAULT_INITIAL_SOC, evaluate_policy, float_or_none, load_config, parse_parameters
+from market_data import load_market_data
+from model_cache import warm_policy_models
+
+# Set in every worker by `init_worker`.
+_market_data = None
+
+
+class Fold(NamedTuple):
+    history_start: int
+    present_index: int
+    end: int
+
+
+def make_folds(n_rows: int, n_folds: int, present_index: int = 0, test_size: Optional[int] = None, history_size: Optional[int] = None) -> List[Fold]:
+    """
+    Split the rows from `present_index` onwards into consecutive test windows.
+
+    :param n_rows: Number of rows of market data.
+    :param n_folds: Number of test windows.
+    :param present_index: Index of the first row which is tested on.
+    :param test_size: Rows per test window. By default the rows after `present_index` are split
+        evenly, and the last fold takes any left over.
+    :param history_size: Maximum number of rows before each window passed to `load_historical`.
+        By default every earlier row is passed.
+    :return: The row ranges of every fold.
+    """
+    if n_folds < 1:
+        raise ValueError('At least one fold is needed.')
+    if not 0 <= present_index < n_rows:
+        raise ValueError(f'present_index {present_index} is outside the data ({n_rows} rows).')
+
+    even_split = test_size is None
+    if even_split:
+        test_size = (n_rows - present_index) // n_folds
+    if test_size < 1 or present_index + n_folds * test_size > n_rows:
+        raise ValueError(f'{n_rows - present_index} rows after present_index are not enough for {n_folds} folds of {test_size} rows.')
+
+    folds = []
+    for fold_index in range(n_folds):
+        start = present_index + fold_index * test_size
+        end = n_rows if even_split and fold_index == n_folds - 1 else start + test_size
+        history_start = 0 if history_size is None else max(0, start - history_size)
+        folds.append(Fold(history_start, start, end))
+    return folds
+
+
+def init_worker(market_data: pd.DataFrame):
+    global _market_data
+    _market_data = market_data
+
+
+def evaluate_fold(fold: Fold, policy_config: dict, initial_soc: float, initial_profit: float, seed: int) -> dict:
+    start = time.time()
+    historical_data = _market_data.iloc[fold.history_start:fold.present_index]
+    future_data = _market_data.iloc[fold.present_index:fold.end]
 
-        external_state, internal_state = battery_environment.step(charge_kW, solar_kW_to_battery, pv_power)
+    policy_class = policy_classes[policy_config['class_name']]
+    result = evaluate_policy(policy_class, policy_config.get('parameters', {}), historical_data, future_data, initial_soc, initial_profit, seed, environment_class=BatteryEnv)
 
-        profits.append(internal_state['total_profit'])
-        socs.append(internal_state['battery_soc'])
+    return {
+        'history_start': fold.history_start,
+        'present_index': fold.present_index,
+        'end': fold.end,
+        'start_timestamp': future_data[TIMESTAMP_KEY].iloc[0],
+        'end_timestamp': future_data[TIMESTAMP_KEY].iloc[-1],
+        'mean_profit': result['mean_profit'],
+        'std_profit': result['std_profit'],
+        'score': float(result['score']),
+        'final_soc': result['main_trial']['final_soc'],
+        'seconds_elapsed': time.time() - start
+    }
 
-        if external_state is None:
-            break
 
+def cross_validate(policy_config: dict, market_data: pd.DataFrame, folds: List[Fold], initial_soc: float = DEFAULT_INITIAL_SOC, initial_profit: float = DEFAULT_INITIAL_PROFIT, seed: int = 42, workers: Optional[int] = None) -> dict:
+    """
+    Evaluate a policy on every fold.
 
-    rundown_profits = run_down_battery(battery_environment, market_prices)
+    :return: The results of every fold, in order, and the aggregate scores.
+    """
+    # Load any models before the workers fork, so they share one copy
+    warm_policy_models(policy_classes[policy_config['class_name']], [policy_config.get('parameters', {})])
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(market_data,)) as executor:
+        futures = [executor.submit(evaluate_fold, fold, policy_config, initial_soc, initial_profit, seed) for fold in folds]
+        fold_results = [future.result() for future in futures]
 
+    scores = np.array([fold['score'] for fold in fold_results])
     return {
-        'profits': profits,
-        'socs': socs,
-        'market_prices': market_prices,
-        'actions': battery_actions,
-        'solar_actions': solar_actions,
-        'pv_inputs': pv_inputs,
-        'final_soc': socs[-1],
-        'rundown_profit_deltas': rundown_profits,
-        'timestamps': timestamps
+        'folds': fold_results,
+        'mean_score': float(np.mean(scores)),
+        'std_score': float(np.std(scores)),
+        'min_score': float(np.min(scores)),
+        'total_score': float(np.sum(scores))
     }
 
-def parse_parameters(params_list):
-    params = {}
-    for item in params_list:
-        key, value = item.split('=')
-        params[key] = eval(value)
-    return params
 
 def perform_eval(args):
     start = time.time()
@@ -91,77 +132,54 @@ def perform_eval(args):
     else:
         policy_config = load_config('bot/config.json')
 
-    policy_class = policy_classes[policy_config['class_name']]
-    
-    external_states = pd.read_csv(args.data)
+    external_states = load_market_data(args.data)
     if args.output_file:
         output_file = args.output_file
     else:
         results_dir = 'bot/results'
         os.makedirs(results_dir, exist_ok=True)
-        output_file = os.path.join(results_dir, f'{datetime.now().strftime("%Y%m%d_%H%M%S")}_{policy_config["class_name"]}.json')
-
-    initial_profit = args.initial_profit if 'initial_profit' in args and args.initial_profit is not None else 0
-    initial_soc = args.initial_soc if 'initial_soc' in args and args.initial_profit is not None else 7.5
+        output_file = os.path.join(results_dir, f'{datetime.now().strftime("%Y%m%d_%H%M%S")}_cv_{policy_config["class_name"]}.json')
 
-    set_seed(args.seed)
-    start_step = args.present_index
+    initial_profit = args.initial_profit if args.initial_profit is not None else DEFAULT_INITIAL_PROFIT
+    initial_soc = args.initial_soc if args.initial_soc is not None else DEFAULT_INITIAL_SOC
 
-    historical_data = external_states.iloc[:start_step]
-    future_data = external_states.iloc[start_step:]
-
-    battery_environment = BatteryEnv(
-        data=future_data,
-        initial_charge_kWh=initial_soc,
-        initial_profit=initial_profit
-    )
-
-    policy = policy_class(**policy_config.get('parameters', {}))
-    policy.load_historical(historical_data)
-    trial_data = run_trial(battery_environment, policy)
-
-    total_profits = trial_data['profits']
-    rundown_profit_deltas = trial_data['rundown_profit_deltas']
-
-    mean_profit = float(np.mean(total_profits))
-    std_profit = float(np.std(total_profits))
-
-    mean_combined_profit = total_profits[-1] + np.sum(rundown_profit_deltas)
+    folds = make_folds(len(external_states), args.folds, args.present_index, args.test_size, args.history_size)
+    result = cross_validate(policy_config, external_states, folds, initial_soc, initial_profit, args.seed, args.workers)
 
     outcome = {
         'class_name': policy_config['class_name'],
         'parameters': policy_config.get('parameters', {}),
-        'mean_profit': mean_profit,
-        'std_profit': std_profit,
-        'score': mean_combined_profit,
-        'main_trial': trial_data,
-        'seconds_elapsed': time.time() - start 
+        **result,
+        'seconds_elapsed': time.time() - start
     }
 
-    print(f'Average profit ($): {mean_profit:.2f} ± {std_profit:.2f}')
-    print(f'Average profit inc rundown ($): {mean_combined_profit:.2f}')
+    for fold_index, fold in enumerate(result['folds']):
+        print(f'Fold {fold_index} ({fold["start_timestamp"]} to {fold["end_timestamp"]}, {fold["present_index"] - fold["history_start"]} rows of history): score ($) {fold["score"]:.2f}')
+    print(f'Score over {len(folds)} folds ($): {result["mean_score"]:.2f} ± {result["std_score"]:.2f}, min {result["min_score"]:.2f}, total {result["total_score"]:.2f}')
 
     with open(output_file, 'w') as file:
         json.dump(outcome, file, indent=2)
 
-    if args.plot:
-        plot_results(trial_data['profits'], trial_data['market_prices'], trial_data['socs'], trial_data['actions'])
 
 def main():
-    parser = argparse.ArgumentParser(description='Evaluate a single energy market strategy.')
-    parser.add_argument('--plot', action='store_true', help='Plot the results of the main trial.', default=False)
-    parser.add_argument('--present_index', type=int, default=0, help='Index to split the historical data from the data which will be used for the evaluation.')
+    parser = argparse.ArgumentParser(description='Cross-validate a single energy market strategy over consecutive windows of the data.')
+    parser.add_argument('--present_index', type=int, default=0, help='Index of the first row of the first test window. Earlier rows are only used as history.')
+    parser.add_argument('--folds', type=int, default=5, help='Number of test windows.')
+    parser.add_argument('--test_size', type=int, default=None, help='Rows per test window (default: split the rows after present_index evenly).')
+    parser.add_argument('--history_size', type=int, default=None, help='Maximum rows of history per fold (default: all earlier rows).')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: one per CPU).')
     parser.add_argument('--seed', type=int, default=42, help='Seed for randomness')
     parser.add_argument('--data', type=str, default='bot/data/april15-may7_2023.csv', help='Path to the market data csv file')
     parser.add_argument('--class_name', type=str, help='Policy class name. If not provided, the config.json policy will be used.')
-    parser.add_argument('--output_file', type=str, help='File to save all the submission outputs to.', default=None)
+    parser.add_argument('--output_file', type=str, help='File to save the fold results to.', default=None)
     parser.add_argument('--param', action='append', help='Policy parameters as key=value pairs', default=[])
-    parser.add_argument('--initial_soc', type=float_or_none, help='Initial state of charge of the battery in kWh', default=None)
-    parser.add_argument('--initial_profit', type=float_or_none, help='Initial profit of the battery in $', default=None)
+    parser.add_argument('--initial_soc', type=float_or_none, help='Initial state of charge of the battery in kWh at the start of every fold', default=None)
+    parser.add_argument('--initial_profit', type=float_or_none, help='Initial profit of the battery in $ at the start of every fold', default=None)
 
     args = parser.parse_args()
 
     perform_eval(args)
 
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,227 @@
+"""
+Array-backed variant of the battery simulation environment.
+
+`BatteryEnv` in this file is a drop-in replacement for `environment.BatteryEnv`. The market
+DataFrame is split into contiguous NumPy column arrays once at construction and every step
+indexes those arrays instead of materialising an `iloc` row. The battery maths (`process_solar`,
+`charge_discharge`, `kWh_to_profit`) is inherited unchanged, so totals, SOCs and profit deltas
+match `environment.BatteryEnv` bit for bit.
+
+`replay_actions` runs a whole precomputed action sequence in one pass and returns the per-step
+SOC and profit arrays, for policies that can decide everything up front.
+
+`snapshot`/`restore`/`fork` give lookahead policies cheap what-if simulation: a snapshot is a
+small tuple, and a fork shares the market arrays with the environment it came from.
+
+`environment.py` itself must stay identical to `DO_NOT_TOUCH/environment.py`, which is why the
+fast path lives here rather than behind a flag on the original class.
+"""
+
+import copy
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from environment import Battery as ScalarBattery
+from environment import BatteryEnv as DataFrameBatteryEnv
+from environment import INTERVAL_DURATION, PRICE_KEY, TIMESTAMP_KEY
+from market_time import TimeArrays, time_arrays
+from observations import RECORD, VIEW, InternalState, MarketRow, column_arrays
+
+PV_KEY = 'pv_power'
+DICT = 'dict'
+OBSERVATION_TYPES = (DICT, RECORD, VIEW)
+
+
+class MarketArrays:
+    """
+    Column arrays extracted once from a market DataFrame.
+
+    Instances are read-only by convention and can be shared between environments.
+    """
+    def __init__(self, data: pd.DataFrame):
+        self.columns = column_arrays(data)
+        self.length = len(data)
+        self.prices = self.columns[PRICE_KEY]
+        self.pv_power = self.columns.get(PV_KEY)
+        self.timestamps = self.columns.get(TIMESTAMP_KEY)
+        self._times = None
+
+    @property
+    def times(self) -> TimeArrays:
+        """
+        The timestamps as int64 epochs and NEM hours and days of the week, normalised on first use.
+        """
+        if self._times is None:
+            self._times = time_arrays(self.columns)
+        return self._times
+
+    def __len__(self) -> int:
+        return self.length
+
+    def row(self, index: int) -> dict:
+        """
+        Return the market data for one interval, keyed like the `iloc` row it replaces.
+
+        :param index: Position of the interval in the market data.
+        :return: A dictionary mapping column names to the values at `index`.
+        """
+        return {name: values[index] for name, values in self.columns.items()}
+
+
+class Battery(ScalarBattery):
+    """
+    `environment.Battery` whose state can be saved and restored.
+    """
+    def snapshot(self) -> float:
+        return self._state_of_charge_kWh
+
+    def restore(self, snapshot: float):
+        self._state_of_charge_kWh = snapshot
+
+
+class BatteryEnv(DataFrameBatteryEnv):
+    """
+    `environment.BatteryEnv` stepping through pre-extracted NumPy arrays.
+
+    `data` may be a DataFrame or an existing `MarketArrays`, so many environments can share one
+    copy of the market data. `observation_type` selects what the states handed to the policy are:
+    "dict" (the default) builds plain dictionaries, "record" and "view" use the lightweight types
+    from observations.py.
+    """
+    def __init__(self, data: Union[pd.DataFrame, MarketArrays], capacity_kWh: float = 13, max_charge_rate_kW: float = 5, initial_charge_kWh: float = 7.5, initial_profit: float = 0.0, observation_type: str = DICT):
+        if observation_type not in OBSERVATION_TYPES:
+            raise ValueError(f'observation_type must be one of {OBSERVATION_TYPES}, got {observation_type!r}')
+        market_arrays = data if isinstance(data, MarketArrays) else MarketArrays(data)
+        self.observation_type = observation_type
+        self._market_view = MarketRow(market_arrays.columns)
+        self._info_view = InternalState()
+        super().__init__(market_arrays, capacity_kWh, max_charge_rate_kW, initial_charge_kWh, initial_profit)
+        self.battery = Battery(capacity_kWh, max_charge_rate_kW, initial_charge_kWh)
+        self.market_arrays = market_arrays
+        self._prices = market_arrays.prices
+
+    def initial_state(self):
+        assert self.current_step == 0
+
+        return self.market_state(self.current_step), self.get_info(0)
+
+    def step(self, charge_kW: float, solar_kW_to_battery: int, total_solar_kW: int) -> Tuple[Optional[dict], Optional[dict]]:
+        if self.current_step >= self.episode_length:
+            return None, None
+        market_price_mWh = self._prices[self.current_step]
+
+        kW_currently_charging, solar_profit_delta = self.process_solar(solar_kW_to_battery, total_solar_kW, market_price_mWh)
+
+        max_charge_kW = self.battery.max_charge_rate_kW - kW_currently_charging
+        battery_profit_delta = self.charge_discharge(min(charge_kW, max_charge_kW), market_price_mWh)
+
+        external_state = self.get_info(battery_profit_delta + solar_profit_delta)
+
+        self.current_step += 1
+        if self.current_step >= self.episode_length:
+            return None, external_state
+
+        return self.market_state(self.current_step), external_state
+
+    def snapshot(self) -> tuple:
+        """
+        Capture the mutable state of the environment: current step, total profit and battery SOC.
+        """
+        return self.current_step, self.total_profit, self.battery.snapshot()
+
+    def restore(self, snapshot: tuple):
+        self.current_step, self.total_profit, state_of_charge_kWh = snapshot
+        self.battery.restore(state_of_charge_kWh)
+
+    def fork(self) -> 'BatteryEnv':
+        """
+        Return an independent copy of the environment which shares the (read-only) market arrays.
+        """
+        forked = copy.copy(self)
+        forked.battery = copy.copy(self.battery)
+        forked._market_view = MarketRow(self.market_arrays.columns, self._market_view.index)
+        forked._info_view = InternalState()
+        return forked
+
+    def market_state(self, index: int):
+        if self.observation_type == DICT:
+            return self.market_arrays.row(index)
+        if self.observation_type == RECORD:
+            return MarketRow(self.market_arrays.columns, index)
+        self._market_view.index = index
+        return self._market_view
+
+    def get_info(self, profit_delta: float = 0):
+        if self.observation_type == DICT:
+            return super().get_info(profit_delta)
+
+        self.total_profit += profit_delta
+        info = self._info_view if self.observation_type == VIEW else InternalState()
+        return info.update(self.total_profit, profit_delta, self.battery.state_of_charge_kWh, self.battery.max_charge_rate_kW, self.episode_length - self.current_step - 1)
+
+
+def replay_actions(data: Union[pd.DataFrame, MarketArrays], solar_kW_to_battery, charge_kW, total_solar_kW=None, capacity_kWh: float = 13, max_charge_rate_kW: float = 5, initial_charge_kWh: float = 7.5, initial_profit: float = 0.0) -> dict:
+    """
+    Replay a full action sequence with exactly the semantics of `BatteryEnv.step`.
+
+    The SOC recursion runs as a plain-float loop (each interval depends on the previous SOC) and
+    the `kWh_to_profit` rounding is applied afterwards as one vectorised `np.round`, which rounds
+    identically to the `np.float64` scalars the environment works with.
+
+    :param data: Market data with at least the price column.
+    :param solar_kW_to_battery: Solar power routed to the battery at every interval (kW).
+    :param charge_kW: Grid charge (positive) or discharge (negative) at every interval (kW).
+    :param total_solar_kW: PV power at every interval (kW). Defaults to the `pv_power` column.
+    :return: A dictionary with the per-step `socs`, `profit_deltas` and cumulative `profits`,
+        i.e. the `battery_soc`, `profit_delta` and `total_profit` that `step` would have returned.
+    """
+    market_arrays = data if isinstance(data, MarketArrays) else MarketArrays(data)
+    prices = market_arrays.prices
+    n = len(market_arrays)
+    if total_solar_kW is None:
+        total_solar_kW = market_arrays.pv_power
+    solar_kW_to_battery = np.asarray(solar_kW_to_battery, dtype=float)
+    charge_kW = np.asarray(charge_kW, dtype=float)
+    total_solar_kW = np.asarray(total_solar_kW, dtype=float)
+    if not len(solar_kW_to_battery) == len(charge_kW) == len(total_solar_kW) == n:
+        raise ValueError(f'Expected {n} actions and PV values, got {len(solar_kW_to_battery)}, {len(charge_kW)} and {len(total_solar_kW)}.')
+
+    socs = np.empty(n)
+    solar_to_grid_kWh = np.empty(n)
+    grid_to_battery_kWh = np.zeros(n)
+    battery_to_grid_kWh = np.zeros(n)
+
+    hours = INTERVAL_DURATION / 60
+    rate = max_charge_rate_kW
+    soc = min(initial_charge_kWh, capacity_kWh)
+    for i, (solar_kW, grid_kW, pv_kW) in enumerate(zip(solar_kW_to_battery.tolist(), charge_kW.tolist(), total_solar_kW.tolist())):
+        # process_solar
+        solar_kW = max(0, min(pv_kW, solar_kW))
+        kWh_charged = min(min(solar_kW, rate) * hours, capacity_kWh - soc)
+        soc += kWh_charged
+        solar_to_grid_kWh[i] = pv_kW * hours - kWh_charged
+
+        # charge_discharge
+        grid_kW = min(grid_kW, rate - kWh_charged / hours)
+        if grid_kW > 0:
+            kWh_to_battery = min(min(grid_kW, rate) * hours, capacity_kWh - soc)
+            soc += kWh_to_battery
+            grid_to_battery_kWh[i] = kWh_to_battery
+        elif grid_kW < 0:
+            kWh_to_grid = min(min(-grid_kW, rate) * hours, soc)
+            soc = max(soc - kWh_to_grid, 0)
+            battery_to_grid_kWh[i] = kWh_to_grid
+        socs[i] = soc
+
+    solar_profit_deltas = np.round(solar_to_grid_kWh * prices / 1000, 4)
+    battery_profit_deltas = -np.round(grid_to_battery_kWh * prices / 1000, 4) + np.round(battery_to_grid_kWh * prices / 1000, 4)
+    profit_deltas = battery_profit_deltas + solar_profit_deltas
+    profits = np.cumsum(np.concatenate(([initial_profit], profit_deltas)))[1:]
+
+    return {
+        'socs': socs,
+        'profit_deltas': profit_deltas,
+        'profits': profits
+    }
@@ -0,0 +1,377 @@
+"""
+Fast counterpart of evaluate.py.
+
+Takes the same command line arguments and writes the same output as `evaluate.py`, but runs the
+policy on `fast_environment.BatteryEnv` and values the remaining charge with
+`rundown.run_down_battery`. Both give identical results to the originals.
+
+`evaluate_policy` is the reusable core: it evaluates one policy on data which is already loaded,
+so sweeps and cross-validation can share a single copy of the market data.
+
+With `--profile` every step is timed by phase (see `trade`) and the timings are added to the
+output, and `--cprofile FILE` dumps cProfile statistics of the whole evaluation.
+
+With `--stream` the trial is summarised as it runs (`stream_trial`) instead of being kept as
+lists, so memory use does not grow with the length of the data. With `--output_format arrow`
+the per-step series are also written to disk in chunks.
+
+`evaluate.py` itself must stay identical to `DO_NOT_TOUCH/evaluate.py`.
+"""
+
+import ast
+import time
+import argparse
+import os
+import random
+import pandas as pd
+from datetime import datetime
+import numpy as np
+import json
+from collections import deque
+
+from policies import policy_classes
+from environment import PRICE_KEY, TIMESTAMP_KEY
+from market_data import load_market_data
+from fast_environment import BatteryEnv
+from rundown import RUNDOWN_WINDOW, run_down_battery
+from running_stats import RunningStats
+from profiling import NULL_TIMER, PhaseTimer, cprofile_run
+from plotting import plot_results
+from trial_output import JSON, OUTPUT_FORMATS, TrialWriter, write_trial
+
+DEFAULT_INITIAL_SOC = 7.5
+DEFAULT_INITIAL_PROFIT = 0
+
+
+def float_or_none(value):
+    if value.lower() == 'none':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value} is not a float or 'None'")
+
+
+def load_config(file_path):
+    with open(file_path, 'r') as file:
+        return json.load(file)['policy']
+
+
+def set_seed(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def parse_value(value: str):
+    """
+    Parse a command line parameter value as a Python literal (number, string, list, ...).
+    """
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        raise ValueError(f'{value!r} is not a Python literal; quote strings, e.g. key="\'value\'"')
+
+
+def parse_parameters(params_list):
+    params = {}
+    for item in params_list:
+        key, value = item.split('=', 1)
+        params[key] = parse_value(value)
+    return params
+
+
+def trade(battery_environment: BatteryEnv, policy, on_step, timer=NULL_TIMER):
+    """
+    Let the policy trade until the market data runs out. This is the one trial loop behind
+    `run_trial` and `stream_trial`, which differ only in what they keep of every step.
+
+    :param on_step: Called after every step with `(total_profit, battery_soc, market_price,
+        charge_kW, solar_kW_to_battery, pv_power, timestamp)`.
+    :param timer: A `PhaseTimer` to time the policy's `act`, the environment's `step` and the
+        bookkeeping around them at every step.
+    """
+    clock = timer.clock
+    external_state, internal_state = battery_environment.initial_state()
+    while True:
+        t0 = clock()
+        pv_power = float(external_state["pv_power"])
+        market_price = external_state[PRICE_KEY]
+        timestamp = external_state[TIMESTAMP_KEY]
+        t1 = clock()
+        solar_kW_to_battery, charge_kW = policy.act(external_state, internal_state)
+        t2 = clock()
+
+        external_state, internal_state = battery_environment.step(charge_kW, solar_kW_to_battery, pv_power)
+        t3 = clock()
+
+        on_step(internal_state['total_profit'], internal_state['battery_soc'], market_price, charge_kW, solar_kW_to_battery, pv_power, timestamp)
+        t4 = clock()
+
+        timer.record('act', t2 - t1)
+        timer.record('step', t3 - t2)
+        timer.record('bookkeeping', (t1 - t0) + (t4 - t3))
+
+        if external_state is None:
+            break
+
+
+def timed_rundown(battery_environment: BatteryEnv, market_prices, timer=NULL_TIMER):
+    t0 = timer.clock()
+    rundown_profits = run_down_battery(battery_environment, market_prices)
+    timer.record('rundown', timer.clock() - t0)
+    return rundown_profits
+
+
+def run_trial(battery_environment: BatteryEnv, policy, timer=NULL_TIMER):
+    """
+    Run a trial and keep every step.
+
+    :param timer: A `PhaseTimer` to time every phase of the trial into (see `trade`), and the
+        final rundown.
+    """
+    profits, socs, market_prices, battery_actions, solar_actions, pv_inputs, timestamps = [], [], [], [], [], [], []
+
+    def keep(total_profit, soc, market_price, charge_kW, solar_kW_to_battery, pv_power, timestamp):
+        profits.append(total_profit)
+        socs.append(soc)
+        market_prices.append(market_price)
+        battery_actions.append(charge_kW)
+        solar_actions.append(solar_kW_to_battery)
+        pv_inputs.append(pv_power)
+        timestamps.append(timestamp)
+
+    trade(battery_environment, policy, keep, timer)
+    rundown_profits = timed_rundown(battery_environment, market_prices, timer)
+
+    return {
+        'profits': profits,
+        'socs': socs,
+        'market_prices': market_prices,
+        'actions': battery_actions,
+        'solar_actions': solar_actions,
+        'pv_inputs': pv_inputs,
+        'final_soc': socs[-1],
+        'rundown_profit_deltas': rundown_profits,
+        'timestamps': timestamps
+    }
+
+
+def stream_trial(battery_environment: BatteryEnv, policy, trial_writer: TrialWriter = None, timer=NULL_TIMER) -> dict:
+    """
+    Run a trial like `run_trial`, but keep only running aggregates of it.
+
+    Memory use is constant: the profit is summarised by `RunningStats` and only the last day of
+    prices is kept for the rundown. `score` and `final_soc` are identical to a full trial, and
+    `mean_profit` and `std_profit` match `summarise_trial` up to floating point rounding.
+
+    :param trial_writer: If given, every step is also appended to it.
+    :param timer: As for `run_trial`.
+    :return: The summary of the trial.
+    """
+    profit_stats = RunningStats()
+    recent_prices = deque(maxlen=RUNDOWN_WINDOW)
+    last_step = {}
+
+    def summarise(total_profit, soc, market_price, charge_kW, solar_kW_to_battery, pv_power, timestamp):
+        recent_prices.append(market_price)
+        profit_stats.update(total_profit)
+        last_step['total_profit'], last_step['soc'] = total_profit, soc
+        if trial_writer is not None:
+            trial_writer.append(total_profit, soc, market_price, charge_kW, solar_kW_to_battery, pv_power, timestamp)
+
+    trade(battery_environment, policy, summarise, timer)
+    rundown_profits = timed_rundown(battery_environment, list(recent_prices), timer)
+
+    return {
+        'mean_profit': profit_stats.mean,
+        'std_profit': profit_stats.std,
+        'min_profit': profit_stats.min,
+        'max_profit': profit_stats.max,
+        'score': last_step['total_profit'] + np.sum(rundown_profits),
+        'steps': profit_stats.count,
+        'final_soc': last_step['soc'],
+        'rundown_profit_deltas': rundown_profits
+    }
+
+
+def summarise_trial(trial_data: dict) -> dict:
+    """
+    Compute the headline numbers `evaluate.py` reports for a trial.
+    """
+    total_profits = trial_data['profits']
+
+    return {
+        'mean_profit': float(np.mean(total_profits)),
+        'std_profit': float(np.std(total_profits)),
+        'score': total_profits[-1] + np.sum(trial_data['rundown_profit_deltas'])
+    }
+
+
+def evaluate_policy(policy_class, parameters: dict, historical_data: pd.DataFrame, future_data, initial_soc: float = DEFAULT_INITIAL_SOC, initial_profit: float = DEFAULT_INITIAL_PROFIT, seed: int = 42, environment_class=BatteryEnv, stream: bool = False, trial_writer: TrialWriter = None, timer: PhaseTimer = None) -> dict:
+    """
+    Evaluate one policy configuration on market data which is already loaded.
+
+    :param policy_class: The policy class to instantiate.
+    :param parameters: Keyword arguments for the policy class.
+    :param historical_data: Market data before the present, passed to `load_historical`.
+    :param future_data: Market data to trade on, as a DataFrame or shared `MarketArrays`.
+    :param environment_class: The environment to trade in, e.g. `tariff_environment.BatteryEnv`
+        (which needs a DataFrame).
+    :param stream: Summarise the trial with `stream_trial` instead of keeping it.
+    :param trial_writer: With `stream`, also write every step to this writer.
+    :param timer: If given, time the set-up and every step of the trial into it, streamed or not.
+    :return: The trial data together with its `mean_profit`, `std_profit` and `score`, or only
+        the `stream_trial` summary when streaming.
+    """
+    set_seed(seed)
+    setup_start = time.perf_counter_ns()
+
+    battery_environment = environment_class(
+        data=future_data,
+        initial_charge_kWh=initial_soc,
+        initial_profit=initial_profit
+    )
+
+    policy = policy_class(**parameters)
+    policy.load_historical(historical_data)
+    if timer is None:
+        timer = NULL_TIMER
+    else:
+        timer.record('setup', time.perf_counter_ns() - setup_start)
+    if stream:
+        return stream_trial(battery_environment, policy, trial_writer, timer)
+    trial_data = run_trial(battery_environment, policy, timer)
+
+    return {**summarise_trial(trial_data), 'main_trial': trial_data}
+
+
+def perform_eval(args):
+    start = time.time()
+
+    if args.class_name:
+        policy_config = {'class_name': args.class_name, 'parameters': parse_parameters(args.param)}
+    else:
+        policy_config = load_config('bot/config.json')
+
+    policy_class = policy_classes[policy_config['class_name']]
+
+    external_states = load_market_data(args.data)
+    if args.output_file:
+        output_file = args.output_file
+    else:
+        results_dir = 'bot/results'
+        os.makedirs(results_dir, exist_ok=True)
+        output_file = os.path.join(results_dir, f'{datetime.now().strftime("%Y%m%d_%H%M%S")}_{policy_config["class_name"]}.json')
+
+    initial_profit = args.initial_profit if 'initial_profit' in args and args.initial_profit is not None else DEFAULT_INITIAL_PROFIT
+    initial_soc = args.initial_soc if 'initial_soc' in args and args.initial_soc is not None else DEFAULT_INITIAL_SOC
+
+    start_step = args.present_index
+
+    historical_data = external_states.iloc[:start_step]
+    future_data = external_states.iloc[start_step:]
+
+    if getattr(args, 'stream', False):
+        stream_eval(args, policy_config, historical_data, future_data, initial_soc, initial_profit, output_file, start)
+        return
+
+    timer = PhaseTimer() if getattr(args, 'profile', False) else None
+    if getattr(args, 'cprofile', None):
+        result = cprofile_run(evaluate_policy, args.cprofile, policy_class, policy_config.get('parameters', {}), historical_data, future_data, initial_soc, initial_profit, args.seed, timer=timer)
+    else:
+        result = evaluate_policy(policy_class, policy_config.get('parameters', {}), historical_data, future_data, initial_soc, initial_profit, args.seed, timer=timer)
+    trial_data = result['main_trial']
+
+    outcome = {
+        'class_name': policy_config['class_name'],
+        'parameters': policy_config.get('parameters', {}),
+        'mean_profit': result['mean_profit'],
+        'std_profit': result['std_profit'],
+        'score': result['score'],
+        'main_trial': trial_data,
+        'seconds_elapsed': time.time() - start
+    }
+    if timer is not None:
+        outcome['profile'] = timer.summary()
+
+    print(f'Average profit ($): {result["mean_profit"]:.2f} ± {result["std_profit"]:.2f}')
+    print(f'Average profit inc rundown ($): {result["score"]:.2f}')
+    if timer is not None:
+        print(timer.format())
+
+    if getattr(args, 'output_format', JSON) == JSON:
+        with open(output_file, 'w') as file:
+            json.dump(outcome, file, indent=2)
+    else:
+        write_trial(output_file, outcome)
+
+    if args.plot:
+        plot_results(trial_data['profits'], trial_data['market_prices'], trial_data['socs'], trial_data['actions'])
+
+
+def stream_eval(args, policy_config, historical_data, future_data, initial_soc, initial_profit, output_file, start):
+    """
+    `perform_eval` for `--stream`: the JSON output holds only the summary, and with
+    `--output_format arrow` the per-step series are spilled to disk in chunks as well.
+    """
+    if args.plot:
+        raise ValueError('--plot needs the whole trial in memory and cannot be combined with --stream')
+
+    timer = PhaseTimer() if getattr(args, 'profile', False) else None
+    trial_writer = TrialWriter(output_file, args.chunk_size) if args.output_format != JSON else None
+    try:
+        evaluation = (policy_classes[policy_config['class_name']], policy_config.get('parameters', {}), historical_data, future_data, initial_soc, initial_profit, args.seed)
+        if getattr(args, 'cprofile', None):
+            result = cprofile_run(evaluate_policy, args.cprofile, *evaluation, stream=True, trial_writer=trial_writer, timer=timer)
+        else:
+            result = evaluate_policy(*evaluation, stream=True, trial_writer=trial_writer, timer=timer)
+    except BaseException:
+        if trial_writer is not None:
+            trial_writer.abort()
+        raise
+
+    outcome = {
+        'class_name': policy_config['class_name'],
+        'parameters': policy_config.get('parameters', {}),
+        **result,
+        'seconds_elapsed': time.time() - start
+    }
+    if timer is not None:
+        outcome['profile'] = timer.summary()
+
+    print(f'Average profit ($): {result["mean_profit"]:.2f} ± {result["std_profit"]:.2f}')
+    print(f'Average profit inc rundown ($): {result["score"]:.2f}')
+    if timer is not None:
+        print(timer.format())
+
+    if trial_writer is None:
+        with open(output_file, 'w') as file:
+            json.dump(outcome, file, indent=2)
+    else:
+        trial_writer.close(outcome)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate a single energy market strategy.')
+    parser.add_argument('--plot', action='store_true', help='Plot the results of the main trial.', default=False)
+    parser.add_argument('--present_index', type=int, default=0, help='Index to split the historical data from the data which will be used for the evaluation.')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for randomness')
+    parser.add_argument('--data', type=str, default='bot/data/april15-may7_2023.csv', help='Path to the market data csv file')
+    parser.add_argument('--class_name', type=str, help='Policy class name. If not provided, the config.json policy will be used.')
+    parser.add_argument('--output_file', type=str, help='File to save all the submission outputs to.', default=None)
+    parser.add_argument('--output_format', type=str, choices=OUTPUT_FORMATS, default=JSON, help='json writes everything to one JSON file. arrow writes the per-step series to an Arrow file next to a JSON summary.')
+    parser.add_argument('--stream', action='store_true', default=False, help='Keep running aggregates instead of the whole trial, so memory use stays constant.')
+    parser.add_argument('--chunk_size', type=int, default=8192, help='Steps per chunk when --stream writes the series with --output_format arrow.')
+    parser.add_argument('--profile', action='store_true', default=False, help='Time every step by phase (act, step, bookkeeping) and add the timings to the output.')
+    parser.add_argument('--cprofile', type=str, default=None, help='Dump cProfile statistics of the whole evaluation to this file.')
+    parser.add_argument('--param', action='append', help='Policy parameters as key=value pairs', default=[])
+    parser.add_argument('--initial_soc', type=float_or_none, help='Initial state of charge of the battery in kWh', default=None)
+    parser.add_argument('--initial_profit', type=float_or_none, help='Initial profit of the battery in $', default=None)
+
+    args = parser.parse_args()
+
+    perform_eval(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Cached, typed market data.
+
+`load_market_data` reads a market CSV through a binary cache. The first time a file is seen it is
+parsed with `pd.read_csv` and written as an uncompressed Arrow (Feather v2) file in `CACHE_DIR`,
+named after the CSV and a hash of its contents. Later loads memory-map that file instead of
+parsing text, and any edit to the CSV changes the hash, so a stale cache is never used.
+
+Besides the CSV's own columns (with the dtypes `pd.read_csv` infers: float64 prices and PV,
+string timestamps), the cache holds time fields derived from the timestamps once:
+
+- `timestamp_epoch_s`: int64 seconds since the Unix epoch (UTC),
+- `hour`, `day_of_week`: hour and weekday (Monday is 0) of the timestamp as written, in its own
+  UTC offset (naive timestamps as they are), as `pd.to_datetime(...).dt` gives for a column with
+  a single offset,
+- `local_hour`, `local_day_of_week`: the same in NEM time (UTC+10), whatever the offset.
+
+By default only the CSV's columns are returned, so the DataFrame is equal to `pd.read_csv` of
+the file; pass `time_fields=True` to get the derived ones as well.
+"""
+
+import hashlib
+import os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from market_time import EPOCH_KEY, TIMESTAMP_KEY, epoch_seconds, local_calendar, wall_clock_seconds
+except ImportError:  # imported as bot.market_data, e.g. by the trainRL scripts
+    from bot.market_time import EPOCH_KEY, TIMESTAMP_KEY, epoch_seconds, local_calendar, wall_clock_seconds
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', '.cache')
+TIME_FIELDS = [EPOCH_KEY, 'hour', 'day_of_week', 'local_hour', 'local_day_of_week']
+CSV_COLUMNS_KEY = b'csv_columns'
+CACHE_VERSION = 2  # Changed whenever the cached fields change, so older cache files are not read
+
+
+def content_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def cache_path(csv_path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    The cache file for a CSV: `<cache_dir>/<csv name>-<content hash>-v<CACHE_VERSION>.arrow`.
+    """
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir or CACHE_DIR, f'{name}-{content_hash(csv_path)}-v{CACHE_VERSION}.arrow')
+
+
+def derive_time_fields(timestamps: pd.Series) -> pd.DataFrame:
+    """
+    Derive the cached time fields from a timestamp column (see `market_time.epoch_seconds`).
+    """
+    epochs = epoch_seconds(timestamps)
+    minutes, days_of_week = local_calendar(wall_clock_seconds(timestamps), 0)
+    local_minutes, local_days_of_week = local_calendar(epochs)
+    return pd.DataFrame({
+        EPOCH_KEY: epochs,
+        'hour': (minutes // 60).astype(np.int8),
+        'day_of_week': days_of_week,
+        'local_hour': (local_minutes // 60).astype(np.int8),
+        'local_day_of_week': local_days_of_week,
+    })
+
+
+def build_cache(csv_path: str, output_file: str):
+    """
+    Parse a market CSV and write it, with its time fields, to an Arrow file.
+    """
+    import pyarrow as pa
+
+    data = pd.read_csv(csv_path)
+    table = pa.Table.from_pandas(pd.concat([data, derive_time_fields(data[TIMESTAMP_KEY])], axis=1), preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, CSV_COLUMNS_KEY: ','.join(data.columns).encode()})
+
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    temporary_file = f'{output_file}.{os.getpid()}.tmp'
+    with pa.OSFile(temporary_file, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(temporary_file, output_file)  # Atomic, so concurrent readers never see a partial file
+
+
+def load_market_table(csv_path: str, cache_dir: Optional[str] = None):
+    """
+    The cached market data of a CSV as a memory-mapped `pyarrow.Table`, building the cache if
+    needed. Numeric columns convert to NumPy without copying, e.g.
+    `table.column('price').to_numpy()`.
+    """
+    import pyarrow as pa
+
+    cache_file = cache_path(csv_path, cache_dir)
+    if not os.path.exists(cache_file):
+        build_cache(csv_path, cache_file)
+    return pa.ipc.open_file(pa.memory_map(cache_file, 'r')).read_all()
+
+
+def load_market_data(data_path: str, cache_dir: Optional[str] = None, time_fields: bool = False, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load a market CSV through the cache.
+
+    :param data_path: The market CSV.
+    :param cache_dir: Where cache files are kept (default: `CACHE_DIR`).
+    :param time_fields: Also return the derived `TIME_FIELDS`.
+    :param columns: Only return these columns (overrides `time_fields`).
+    :return: The market data, equal to `pd.read_csv(data_path)` unless extra columns are asked for.
+    """
+    table = load_market_table(data_path, cache_dir)
+    if columns is None:
+        columns = table.schema.metadata[CSV_COLUMNS_KEY].decode().split(',')
+        if time_fields:
+            columns += TIME_FIELDS
+    return table.select(columns).to_pandas(split_blocks=True)
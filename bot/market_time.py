@@ -0,0 +1,120 @@
+"""
+Timestamp normalisation for market data.
+
+The bundled datasets write their timestamps differently: `april15-may7_2023.csv` has naive
+strings, `validation_data.csv` UTC strings ending in `+00:00` and `NEM_SA1_test_data.csv` NEM
+strings ending in `+10:00`. `epoch_seconds` turns any of these, or a mix of them, into one int64
+array of seconds since the Unix epoch. Naive timestamps are taken as UTC.
+
+Local calendar fields are then plain integer arithmetic on the epochs, so nothing is parsed
+again once a column has been normalised. `time_arrays` does both at load time and reuses the
+`timestamp_epoch_s` column of data loaded through `market_data.load_market_data` when it is there.
+"""
+
+from typing import Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+TIMESTAMP_KEY = 'timestamp'
+EPOCH_KEY = 'timestamp_epoch_s'
+NEM_UTC_OFFSET_HOURS = 10  # NEM time is always UTC+10, no daylight saving
+SECONDS_PER_MINUTE = 60
+SECONDS_PER_DAY = 24 * 60 * 60
+EPOCH_DAY_OF_WEEK = 3  # 1970-01-01 was a Thursday (Monday is 0)
+UTC_OFFSET_PATTERN = r'(?:Z|[+-]\d{2}:?\d{2})$'
+
+
+def epoch_seconds(timestamps) -> np.ndarray:
+    """
+    Convert a timestamp column into int64 seconds since the Unix epoch (UTC).
+
+    :param timestamps: Timestamp strings, with or without a UTC offset, or datetimes. Naive
+        values are taken as UTC.
+    """
+    timestamps = pd.Series(timestamps)
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        return _datetimes_to_epochs(pd.to_datetime(timestamps, utc=True))
+
+    strings = timestamps.astype(str)
+    try:
+        # The format is inferred from the first string and must fit all the others
+        return _datetimes_to_epochs(pd.to_datetime(strings, utc=True))
+    except ValueError:
+        pass
+
+    # A mix of formats. With format='ISO8601' pandas applies the offset of the first string to
+    # naive strings after it, so strings with and without an offset are parsed separately.
+    has_offset = strings.str.contains(UTC_OFFSET_PATTERN).to_numpy()
+    epochs = np.empty(len(strings), dtype=np.int64)
+    for group in (has_offset, ~has_offset):
+        if group.any():
+            epochs[group] = _datetimes_to_epochs(pd.to_datetime(strings[group], utc=True, format='ISO8601'))
+    return epochs
+
+
+def wall_clock_seconds(timestamps) -> np.ndarray:
+    """
+    The times as written, in each timestamp's own UTC offset, as int64 seconds since 1970-01-01
+    00:00 of that clock. Their calendar fields (`local_calendar(..., 0)`) are what
+    `pd.to_datetime(timestamps).dt` gives for a column with a single offset, e.g. 17:00 for
+    "2024-04-02 17:00:00+10:00".
+    """
+    timestamps = pd.Series(timestamps)
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_localize(None)
+        return epoch_seconds(timestamps)
+    return epoch_seconds(timestamps.astype(str).str.replace(UTC_OFFSET_PATTERN, '', regex=True))
+
+
+def epoch_second(timestamp) -> int:
+    """
+    `epoch_seconds` for a single timestamp, e.g. the one in a policy's `external_state`.
+    """
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return (timestamp - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+
+
+def _datetimes_to_epochs(datetimes: pd.Series) -> np.ndarray:
+    return ((datetimes - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+def local_calendar(epochs: np.ndarray, utc_offset_hours: float = NEM_UTC_OFFSET_HOURS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :param epochs: Seconds since the Unix epoch, from `epoch_seconds`.
+    :param utc_offset_hours: The offset of the local time from UTC.
+    :return: The local minute of the day and the local day of the week (Monday is 0) of every
+        epoch.
+    """
+    local = np.asarray(epochs, dtype=np.int64) + int(round(utc_offset_hours * 3600))
+    minutes = (local % SECONDS_PER_DAY) // SECONDS_PER_MINUTE
+    days_of_week = (local // SECONDS_PER_DAY + EPOCH_DAY_OF_WEEK) % 7
+    return minutes.astype(np.int16), days_of_week.astype(np.int8)
+
+
+class TimeArrays:
+    """
+    The normalised timestamps of some market data and their local calendar fields.
+    """
+    def __init__(self, epochs: np.ndarray, utc_offset_hours: float = NEM_UTC_OFFSET_HOURS):
+        self.epochs = np.asarray(epochs, dtype=np.int64)
+        self.utc_offset_hours = utc_offset_hours
+        self.local_minutes, self.local_days_of_week = local_calendar(self.epochs, utc_offset_hours)
+        self.local_hours = (self.local_minutes // 60).astype(np.int8)
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+
+def time_arrays(data: Mapping, utc_offset_hours: float = NEM_UTC_OFFSET_HOURS) -> TimeArrays:
+    """
+    Normalise the timestamps of market data, reusing its cached epochs if it has them.
+
+    :param data: A market DataFrame or a dictionary of its columns.
+    """
+    if EPOCH_KEY in data:
+        return TimeArrays(np.asarray(data[EPOCH_KEY]), utc_offset_hours)
+    return TimeArrays(epoch_seconds(data[TIMESTAMP_KEY]), utc_offset_hours)
@@ -0,0 +1,102 @@
+"""
+A process-wide cache of loaded models, so policies built over and over (a parameter sweep, the
+folds of a cross-validation, the tests) load each checkpoint once rather than unzipping and
+deserialising it at every construction.
+
+Entries are keyed by the model file's real path and modification time, so a checkpoint that is
+written again is loaded afresh, and the least recently used entries are dropped beyond
+`max_entries`. Callers share the loaded object, so models must not be modified after loading.
+
+Worker pools share models by forking: `sweep.py` and `evaluate_cross_validation.py` build the
+policy once in the parent with `warm_policy_models` before starting their workers, so the
+workers inherit the loaded weights (copy-on-write) instead of each loading its own copy. That
+only helps where pools fork, the default on Linux; elsewhere every worker fills its own cache.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Tuple
+
+MODEL_CACHE_SIZE = 8
+
+
+class ModelCache:
+    """
+    A least-recently-used cache of models keyed by `(real path, modification time)`.
+
+    :param max_entries: The number of models kept.
+    """
+    def __init__(self, max_entries: int = MODEL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path: str) -> Tuple[str, int]:
+        path = os.path.realpath(path)
+        return path, os.stat(path).st_mtime_ns
+
+    def get(self, path: str, loader: Callable[[str], Any]) -> Any:
+        """
+        :return: The model at `path`, loaded with `loader(path)` unless the same version of the
+            file has been loaded before.
+        """
+        key = self.key(path)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key]
+            self.misses += 1
+            model = loader(path)
+            for stale in [other for other in self._models if other[0] == key[0]]:
+                del self._models[stale]  # An older version of the same file
+            self._models[key] = model
+            while len(self._models) > self.max_entries:
+                self._models.popitem(last=False)
+            return model
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, path: str) -> bool:
+        return self.key(path) in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+
+model_cache = ModelCache()
+
+
+def load_cached(path: str, loader: Callable[[str], Any]) -> Any:
+    """
+    `ModelCache.get` on the process-wide cache.
+    """
+    return model_cache.get(path, loader)
+
+
+def warm_policy_models(policy_class, parameter_sets: Iterable[dict]):
+    """
+    Build the policy once for every distinct set of parameters, so the models it loads are in this
+    process's cache before a pool forks its workers. Does nothing for policies without models
+    (no `uses_model_cache` attribute) or where pools do not fork. Parameters the policy rejects
+    are skipped, for the workers to report.
+    """
+    if not getattr(policy_class, 'uses_model_cache', False) or multiprocessing.get_start_method() != 'fork':
+        return
+    seen = []
+    for parameters in parameter_sets:
+        if parameters not in seen:
+            seen.append(parameters)
+            try:
+                policy_class(**parameters)
+            except Exception:
+                pass
@@ -0,0 +1,149 @@
+"""
+Torch-free inference for the stable-baselines3 actor-critic models in `models/`.
+
+A PPO or A2C policy with a Box action space acts deterministically by running the observation
+through its MLP actor (`mlp_extractor.policy_net` followed by `action_net`) and clipping the
+result to the action space. `export_actor` copies those layers out of a saved model into a small
+`.npz` file; `NumpyActor` loads one and reproduces `model.predict(observation, deterministic=True)`
+with a few NumPy matrix products, so acting needs neither torch nor stable-baselines3.
+
+Exporting does need stable-baselines3:
+
+    python bot/numpy_actor.py bot/models/spot_soc_pv/PPOv2_step29M.zip
+
+writes `bot/models/spot_soc_pv/PPOv2_step29M.npz`.
+"""
+
+import argparse
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+
+ACTIVATIONS = {
+    'identity': lambda x: x,
+    'tanh': np.tanh,
+    'relu': lambda x: np.maximum(x, 0),
+}
+ALGORITHMS = ['PPO', 'A2C']  # Saved models are named after their algorithm
+
+
+class NumpyActor:
+    """
+    An MLP actor: `activations[i](x @ weights[i] + biases[i])` layer by layer, then clipped to
+    `[action_low, action_high]`. Computes in float32, like the torch model.
+    """
+    def __init__(self, weights: Sequence[np.ndarray], biases: Sequence[np.ndarray], activations: Sequence[str], action_low: np.ndarray, action_high: np.ndarray):
+        if not len(weights) == len(biases) == len(activations):
+            raise ValueError(f'Expected a weight, bias and activation per layer, got {len(weights)}, {len(biases)} and {len(activations)}.')
+        unknown = set(activations) - set(ACTIVATIONS)
+        if unknown:
+            raise ValueError(f'Unknown activations {sorted(unknown)}, expected some of {sorted(ACTIVATIONS)}.')
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.activations = list(activations)
+        self.action_low = np.asarray(action_low, dtype=np.float32)
+        self.action_high = np.asarray(action_high, dtype=np.float32)
+        self._layers = [(w, b, ACTIVATIONS[a]) for w, b, a in zip(self.weights, self.biases, self.activations)]
+
+    def predict(self, observation) -> np.ndarray:
+        """
+        :param observation: One observation, or a (N, observation size) batch.
+        :return: The deterministic action, or a (N, action size) batch of them.
+        """
+        x = np.asarray(observation, dtype=np.float32)
+        for weights, bias, activation in self._layers:
+            x = activation(x @ weights + bias)
+        return np.clip(x, self.action_low, self.action_high)
+
+    def save(self, path: str):
+        arrays = {'activations': np.array(self.activations), 'action_low': self.action_low, 'action_high': self.action_high}
+        for i, (weights, bias) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'weights_{i}'] = weights
+            arrays[f'bias_{i}'] = bias
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyActor':
+        with np.load(path) as arrays:
+            activations = [str(a) for a in arrays['activations']]
+            weights = [arrays[f'weights_{i}'] for i in range(len(activations))]
+            biases = [arrays[f'bias_{i}'] for i in range(len(activations))]
+            return cls(weights, biases, activations, arrays['action_low'], arrays['action_high'])
+
+
+def load_model(model_path: str, algorithm: Optional[str] = None):
+    """
+    Load a stable-baselines3 model on the CPU.
+
+    :param algorithm: "PPO" or "A2C". By default taken from the start of the file name.
+    """
+    import stable_baselines3
+
+    if algorithm is None:
+        file_name = os.path.basename(model_path)
+        algorithm = next((name for name in ALGORITHMS if file_name.startswith(name)), ALGORITHMS[0])
+    # The training schedules are pickled functions which may not load elsewhere; acting needs none
+    custom_objects = {'lr_schedule': lambda _: 0.0, 'clip_range': lambda _: 0.0}
+    return getattr(stable_baselines3, algorithm).load(model_path, device='cpu', custom_objects=custom_objects)
+
+
+def actor_from_model(model) -> NumpyActor:
+    """
+    Copy the actor of a loaded stable-baselines3 actor-critic model into a `NumpyActor`.
+    """
+    from gymnasium import spaces
+    from stable_baselines3.common.distributions import DiagGaussianDistribution
+    from stable_baselines3.common.torch_layers import FlattenExtractor
+    from torch import nn
+
+    policy = model.policy
+    if not isinstance(policy.action_dist, DiagGaussianDistribution) or policy.squash_output or not isinstance(model.action_space, spaces.Box):
+        raise ValueError('Only Gaussian policies over a Box action space, without squashing, can be exported.')
+    if not isinstance(policy.pi_features_extractor, FlattenExtractor) or len(model.observation_space.shape) != 1:
+        raise ValueError('Only policies over flat Box observations can be exported.')
+
+    activation_names = {nn.Tanh: 'tanh', nn.ReLU: 'relu'}
+    weights, biases, activations = [], [], []
+    for module in list(policy.mlp_extractor.policy_net) + [policy.action_net]:
+        if isinstance(module, nn.Linear):
+            weights.append(module.weight.detach().cpu().numpy().T)
+            biases.append(module.bias.detach().cpu().numpy())
+            activations.append('identity')
+        elif type(module) in activation_names and activations and activations[-1] == 'identity':
+            activations[-1] = activation_names[type(module)]
+        else:
+            raise ValueError(f'Cannot export a {type(module).__name__} layer.')
+    return NumpyActor(weights, biases, activations, model.action_space.low, model.action_space.high)
+
+
+def export_actor(model_path: str, output_path: Optional[str] = None, algorithm: Optional[str] = None) -> str:
+    """
+    Export the actor of a saved model to a `.npz` file for `NumpyActor.load`.
+
+    :param output_path: Where to write the actor, by default next to the model with a `.npz`
+        extension.
+    :return: The path written.
+    """
+    if output_path is None:
+        output_path = os.path.splitext(model_path)[0] + '.npz'
+    actor_from_model(load_model(model_path, algorithm)).save(output_path)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the actors of stable-baselines3 models for torch-free inference.')
+    parser.add_argument('models', nargs='+', help='Saved model .zip files.')
+    parser.add_argument('--output_dir', type=str, default=None, help='Directory for the .npz files (default: next to each model).')
+    parser.add_argument('--algorithm', type=str, default=None, choices=ALGORITHMS, help='Algorithm of the models (default: from the file names).')
+    args = parser.parse_args()
+
+    for model_path in args.models:
+        output_path = None
+        if args.output_dir is not None:
+            output_path = os.path.join(args.output_dir, os.path.splitext(os.path.basename(model_path))[0] + '.npz')
+        print(export_actor(model_path, output_path, args.algorithm))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Lightweight observation types for the battery environments.
+
+By default the environments hand policies a `pd.Series` (or a dict) of market data and a fresh
+dict of battery information every step. The types here support the same `state['price']` style
+access without that per-step allocation:
+
+- `MarketRow` reads one interval straight out of the market column arrays.
+- `InternalState` is a `__slots__` record with the keys of `BatteryEnv.get_info`.
+
+Environments take an `observation_type` argument: "record" returns a new (small) object every
+step, "view" keeps returning the same two objects and updates them in place. Views are the
+cheapest option, but a policy that stores the observation itself (rather than the values it
+reads from it) will see it change on the next step.
+"""
+
+import numpy as np
+import pandas as pd
+
+RECORD = 'record'
+VIEW = 'view'
+
+
+def column_arrays(data: pd.DataFrame) -> dict:
+    """
+    Split a market DataFrame into one contiguous NumPy array per column.
+    """
+    return {name: np.ascontiguousarray(data[name].to_numpy()) for name in data.columns}
+
+
+class MarketRow:
+    """
+    The market data of one interval, read on demand from the column arrays.
+    """
+    __slots__ = ('_columns', 'index')
+
+    def __init__(self, columns: dict, index: int = 0):
+        self._columns = columns
+        self.index = index
+
+    def __getitem__(self, key):
+        return self._columns[key][self.index]
+
+    def get(self, key, default=None):
+        values = self._columns.get(key)
+        return default if values is None else values[self.index]
+
+    def __contains__(self, key) -> bool:
+        return key in self._columns
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def keys(self):
+        return self._columns.keys()
+
+    def to_dict(self) -> dict:
+        return {name: values[self.index] for name, values in self._columns.items()}
+
+    def __repr__(self) -> str:
+        return f'MarketRow({self.to_dict()!r})'
+
+
+class InternalState:
+    """
+    Battery information for the agent, with the same keys as `BatteryEnv.get_info`.
+    """
+    __slots__ = ('total_profit', 'profit_delta', 'battery_soc', 'max_charge_rate', 'remaining_steps')
+
+    def __init__(self, total_profit: float = 0.0, profit_delta: float = 0.0, battery_soc: float = 0.0, max_charge_rate: float = 0.0, remaining_steps: int = 0):
+        self.update(total_profit, profit_delta, battery_soc, max_charge_rate, remaining_steps)
+
+    def update(self, total_profit: float, profit_delta: float, battery_soc: float, max_charge_rate: float, remaining_steps: int) -> 'InternalState':
+        self.total_profit = total_profit
+        self.profit_delta = profit_delta
+        self.battery_soc = battery_soc
+        self.max_charge_rate = max_charge_rate
+        self.remaining_steps = remaining_steps
+        return self
+
+    def __getitem__(self, key):
+        if key not in InternalState.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in InternalState.__slots__ else default
+
+    def __contains__(self, key) -> bool:
+        return key in InternalState.__slots__
+
+    def __iter__(self):
+        return iter(InternalState.__slots__)
+
+    def __len__(self) -> int:
+        return len(InternalState.__slots__)
+
+    def keys(self):
+        return InternalState.__slots__
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in InternalState.__slots__}
+
+    def __repr__(self) -> str:
+        return f'InternalState({self.to_dict()!r})'
@@ -0,0 +1,158 @@
+"""
+Perfect-foresight upper bound on the profit achievable on a market data file.
+
+Knowing every price in advance, the best schedule is found by dynamic programming over a grid of
+states of charge (`battery_dp.py`). With `steps_per_interval` K the grid spacing is
+`kW_to_kWh(max_charge_rate_kW) / K` and every interval can move the state of charge by -K..K grid
+steps. With the defaults (13 kWh, 5 kW, K=10, 7.5 kWh initial charge) the capacity, initial
+charge and one interval's worth of charging all lie exactly on the grid.
+
+The battery limits are those of `environment.Battery`: solar and grid charging share the 5 kW
+rate, discharging is limited to 5 kW and to the charge held. Solar energy sent to the battery
+forgoes exactly the price exported solar would earn, so an interval's profit only depends on the
+net change in charge and PV adds a constant. The value of the final charge is
+`rundown.rundown_values`, the rundown `evaluate.py` applies at the end of a trial.
+
+The DP ignores the rounding of `kWh_to_profit`. The reported score comes from replaying the
+optimal schedule through `fast_environment.replay_actions` and the exact rundown, so it is what
+the environment really pays out for that schedule.
+
+Example:
+
+    python bot/oracle.py --data bot/data/validation_data.csv
+    python bot/oracle.py --data bot/data/validation_data.csv --class_name AugmentedMovingAveragePolicy
+"""
+
+import argparse
+import json
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from battery_dp import backward_pass, forward_pass, grid_state, shift_rewards, shifts_to_actions, soc_grid
+from environment import kW_to_kWh
+from fast_environment import BatteryEnv, MarketArrays, replay_actions
+from fast_evaluate import DEFAULT_INITIAL_PROFIT, DEFAULT_INITIAL_SOC, evaluate_policy, float_or_none, parse_parameters, summarise_trial
+from market_data import load_market_data
+from policies import policy_classes
+from rundown import run_down_battery, rundown_price, rundown_values
+
+DEFAULT_STEPS_PER_INTERVAL = 10
+
+
+def optimal_schedule(prices, pv_power, capacity_kWh: float = 13, max_charge_rate_kW: float = 5, initial_charge_kWh: float = DEFAULT_INITIAL_SOC, steps_per_interval: int = DEFAULT_STEPS_PER_INTERVAL, assumed_rundown_price: Optional[float] = None) -> dict:
+    """
+    The profit-maximising schedule for known prices and PV.
+
+    :param prices: The price ($/MWh) of every interval.
+    :param pv_power: The PV power (kW) of every interval.
+    :param initial_charge_kWh: Rounded to the nearest grid state for planning.
+    :param assumed_rundown_price: The price the final charge is valued at (default: `rundown_price`
+        of `prices`).
+    :return: The `solar_kW_to_battery` and `charge_kW` actions, the planned state of charge after
+        every interval (`soc_plan`) and the DP's estimate of the profit plus rundown (`value`).
+    """
+    prices = np.asarray(prices, dtype=float)
+    pv_power = np.asarray(pv_power, dtype=float)
+    grid = soc_grid(capacity_kWh, max_charge_rate_kW, steps_per_interval)
+    step_kWh = grid[1]
+    if assumed_rundown_price is None:
+        assumed_rundown_price = rundown_price(prices)
+
+    terminal_values = rundown_values(grid, max_charge_rate_kW, assumed_rundown_price)
+    values, choices = backward_pass(shift_rewards(prices, step_kWh, steps_per_interval), terminal_values)
+
+    initial_state = grid_state(min(initial_charge_kWh, capacity_kWh), grid)
+    states = forward_pass(choices, initial_state)
+    shifts_kWh = np.diff(np.concatenate(([initial_state], states))) * step_kWh
+    solar_kW_to_battery, charge_kW = shifts_to_actions(shifts_kWh, pv_power)
+
+    return {
+        'solar_kW_to_battery': solar_kW_to_battery,
+        'charge_kW': charge_kW,
+        'soc_plan': grid[states],
+        'value': float(values[initial_state] + np.sum(pv_power * prices) * kW_to_kWh(1) / 1000)
+    }
+
+
+def oracle_trial(data: pd.DataFrame, initial_soc: float = DEFAULT_INITIAL_SOC, initial_profit: float = DEFAULT_INITIAL_PROFIT, steps_per_interval: int = DEFAULT_STEPS_PER_INTERVAL, capacity_kWh: float = 13, max_charge_rate_kW: float = 5) -> dict:
+    """
+    Find the optimal schedule for `data` and replay it in the environment.
+
+    :return: Trial data shaped like `fast_evaluate.run_trial`'s, plus the DP's `planned_value`.
+    """
+    market_arrays = MarketArrays(data)
+    prices = market_arrays.prices
+    pv_power = np.asarray(market_arrays.pv_power, dtype=float)
+    schedule = optimal_schedule(prices, pv_power, capacity_kWh, max_charge_rate_kW, initial_soc, steps_per_interval)
+
+    replay = replay_actions(market_arrays, schedule['solar_kW_to_battery'], schedule['charge_kW'], pv_power, capacity_kWh, max_charge_rate_kW, initial_soc, initial_profit)
+    final_soc = float(replay['socs'][-1])
+    battery_environment = BatteryEnv(market_arrays, capacity_kWh, max_charge_rate_kW, initial_charge_kWh=final_soc)
+
+    return {
+        'profits': replay['profits'].tolist(),
+        'socs': replay['socs'].tolist(),
+        'market_prices': prices.tolist(),
+        'actions': schedule['charge_kW'].tolist(),
+        'solar_actions': schedule['solar_kW_to_battery'].tolist(),
+        'pv_inputs': pv_power.tolist(),
+        'final_soc': final_soc,
+        'rundown_profit_deltas': run_down_battery(battery_environment, prices),
+        'timestamps': list(market_arrays.timestamps) if market_arrays.timestamps is not None else [],
+        'planned_value': schedule['value'] + initial_profit
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute the best possible score on market data with perfect foresight.')
+    parser.add_argument('--data', type=str, default='bot/data/april15-may7_2023.csv', help='Path to the market data csv file')
+    parser.add_argument('--present_index', type=int, default=0, help='Index to split the historical data from the data which will be used for the evaluation.')
+    parser.add_argument('--steps_per_interval', type=int, default=DEFAULT_STEPS_PER_INTERVAL, help='SOC grid steps per full-rate interval of charging.')
+    parser.add_argument('--initial_soc', type=float_or_none, help='Initial state of charge of the battery in kWh', default=None)
+    parser.add_argument('--initial_profit', type=float_or_none, help='Initial profit of the battery in $', default=None)
+    parser.add_argument('--class_name', type=str, default=None, help='Also evaluate this policy and report how much of the optimum it reaches.')
+    parser.add_argument('--param', action='append', help='Policy parameters as key=value pairs', default=[])
+    parser.add_argument('--seed', type=int, default=42, help='Seed for randomness')
+    parser.add_argument('--output_file', type=str, default=None, help='JSON file to save the score and the optimal schedule to.')
+
+    args = parser.parse_args()
+    start = time.time()
+
+    initial_soc = args.initial_soc if args.initial_soc is not None else DEFAULT_INITIAL_SOC
+    initial_profit = args.initial_profit if args.initial_profit is not None else DEFAULT_INITIAL_PROFIT
+    external_states = load_market_data(args.data)
+    historical_data = external_states.iloc[:args.present_index]
+    future_data = external_states.iloc[args.present_index:]
+
+    trial_data = oracle_trial(future_data, initial_soc, initial_profit, args.steps_per_interval)
+    result = summarise_trial(trial_data)
+    outcome = {
+        'class_name': 'Oracle',
+        'parameters': {'steps_per_interval': args.steps_per_interval},
+        **result,
+        'main_trial': trial_data,
+        'seconds_elapsed': time.time() - start
+    }
+    print(f'Oracle profit ($): {trial_data["profits"][-1]:.2f}')
+    print(f'Oracle profit inc rundown ($): {result["score"]:.2f}')
+
+    if args.class_name:
+        policy_config = {'class_name': args.class_name, 'parameters': parse_parameters(args.param)}
+        policy_result = evaluate_policy(policy_classes[args.class_name], policy_config['parameters'], historical_data, future_data, initial_soc, initial_profit, args.seed)
+        outcome['policy'] = {**policy_config, 'score': policy_result['score']}
+        if result['score'] > 0:
+            share = f'{policy_result["score"] / result["score"]:.1%} of the optimum'
+        else:  # A share of a zero or negative optimum means nothing
+            share = f'${result["score"] - policy_result["score"]:.2f} below the optimum'
+        print(f'{args.class_name} profit inc rundown ($): {policy_result["score"]:.2f} ({share})')
+
+    if args.output_file:
+        with open(args.output_file, 'w') as file:
+            json.dump(outcome, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
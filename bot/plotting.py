@@ -1,5 +1,3 @@
-import matplotlib.pyplot as plt
-
 def plot_results(profits, market_prices, battery_soc, actions):
     """
     Plot the bids, profits, market prices, and battery state of charge over time.
@@ -9,6 +7,9 @@ def plot_results(profits, market_prices, battery_soc, actions):
     :param market_prices: List of market prices for each time step.
     :param battery_soc: List of battery state of charge values for each time step.
     """
+    # Imported here so that evaluating without --plot never loads matplotlib.
+    import matplotlib.pyplot as plt
+
     fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(10, 8), sharex=True)
 
     # Plot bids and market prices on the first axis
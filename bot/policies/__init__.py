@@ -1,42 +1,95 @@
 import os
-import importlib.util
-from typing import Dict, Type
+import ast
+import importlib
+from typing import Dict, Iterator, List, Mapping, Type
 from policies.policy import Policy
 
-def load_policies() -> Dict[str, Type[Policy]]:
-    """
-    Dynamically load policy classes from the 'policies' directory.
+POLICY_BASE_NAME = 'Policy'
+
 
-    :return: A dictionary mapping policy class names to their respective classes.
+def scan_policy_classes(policies_dir: str) -> Dict[str, str]:
     """
-    policy_classes = {}
+    Find the policy classes in the 'policies' directory without importing anything.
 
-    # Get the absolute path of the 'policies' directory
-    policies_dir = os.path.dirname(os.path.abspath(__file__))
+    Each file is parsed and its top-level classes are read from the syntax tree. A class counts as
+    a policy if it derives from `Policy`, directly or through another policy class. Files are
+    scanned in name order, so if two files define the same class name the later file wins.
 
-    # Iterate over the files in the 'policies' directory
-    for file_name in os.listdir(policies_dir):
+    :return: A dictionary mapping policy class names to the names of their modules.
+    """
+    class_bases = []
+    for file_name in sorted(os.listdir(policies_dir)):
         if file_name.endswith(".py") and file_name != "__init__.py" and file_name != "policy.py":
-            # Construct the module name and file path
-            module_name = f"policies.{file_name[:-3]}"
-            file_path = os.path.join(policies_dir, file_name)
+            with open(os.path.join(policies_dir, file_name), 'r') as file:
+                tree = ast.parse(file.read(), filename=file_name)
 
-            # Load the module using importlib.util
-            spec = importlib.util.spec_from_file_location(module_name, file_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+            for node in tree.body:
+                if isinstance(node, ast.ClassDef):
+                    bases = [base.id if isinstance(base, ast.Name) else getattr(base, 'attr', None) for base in node.bases]
+                    class_bases.append((node.name, bases, file_name[:-3]))
 
-            # Iterate over the attributes of the module
-            for attr_name in dir(module):
-                attr = getattr(module, attr_name)
+    policy_names = {POLICY_BASE_NAME}
+    changed = True
+    while changed:
+        changed = False
+        for class_name, bases, _ in class_bases:
+            if class_name not in policy_names and policy_names.intersection(bases):
+                policy_names.add(class_name)
+                changed = True
 
-                # Check if the attribute is a class and a subclass of Policy
-                if isinstance(attr, type) and issubclass(attr, Policy) and attr != Policy:
-                    policy_classes[attr_name] = attr
+    return {class_name: module_name for class_name, _, module_name in class_bases if class_name in policy_names}
 
-    return policy_classes
 
-# Load the policy classes when the module is imported
-policy_classes = load_policies()
+class PolicyRegistry(Mapping):
+    """
+    A read-only mapping from policy class names to policy classes.
+
+    The names come from `scan_policy_classes`. A policy's module is only imported the first time
+    its class is looked up, so using one policy never imports the dependencies of the others
+    (e.g. stable_baselines3 for the RL policies).
+    """
+
+    def __init__(self, modules: Dict[str, str]):
+        self._modules = modules
+        self._classes = {}
+
+    def __getitem__(self, class_name: str) -> Type[Policy]:
+        if class_name not in self._classes:
+            if class_name not in self._modules:
+                raise KeyError(f'Unknown policy class {class_name!r}, expected one of {sorted(self._modules)}')
+            module = importlib.import_module(f"policies.{self._modules[class_name]}")
+            self._classes[class_name] = getattr(module, class_name)
+        return self._classes[class_name]
+
+    def __contains__(self, class_name) -> bool:
+        return class_name in self._modules
 
-print(policy_classes)
\ No newline at end of file
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._modules)
+
+    def __len__(self) -> int:
+        return len(self._modules)
+
+    def loaded(self) -> List[str]:
+        """
+        The names of the policy classes which have been imported so far.
+        """
+        return list(self._classes)
+
+    def __repr__(self) -> str:
+        return f'PolicyRegistry({sorted(self._modules)!r})'
+
+
+def load_policies() -> PolicyRegistry:
+    """
+    Register the policy classes in the 'policies' directory.
+
+    :return: A mapping from policy class names to their classes, which imports each class on
+        first use.
+    """
+    # Get the absolute path of the 'policies' directory
+    policies_dir = os.path.dirname(os.path.abspath(__file__))
+    return PolicyRegistry(scan_policy_classes(policies_dir))
+
+# Register the policy classes when the module is imported
+policy_classes = load_policies()
@@ -1,7 +1,6 @@
 import pandas as pd
-from collections import deque
-import numpy as np
 from policies.policy import Policy
+from policies.rolling_stats import RollingWindow
 #
 # out of the box provided by hackathon - uses moving average to decide on actions
 
@@ -14,7 +13,7 @@ class AugmentedMovingAveragePolicy(Policy):
         """
         super().__init__()
         self.window_size = window_size
-        self.price_history = deque(maxlen=window_size)
+        self.price_history = RollingWindow(window_size)
         self.battery_capacity_kwh = 13
         self.observed_maximum_price = 1
         self.observed_minimum_price = 500
@@ -39,7 +38,7 @@ class AugmentedMovingAveragePolicy(Policy):
             charge_kW = internal_state['max_charge_rate']
             solar_to_battery = int(float(external_state['pv_power']))
         elif len(self.price_history) == self.window_size:
-            moving_average = np.mean(self.price_history)
+            moving_average = self.price_history.mean
             
             if market_price > moving_average:
                 if market_price > 0.5 * self.observed_maximum_price:
@@ -1,7 +1,6 @@
 import pandas as pd
-from collections import deque
-import numpy as np
 from policies.policy import Policy
+from policies.rolling_stats import RollingWindow
 #
 # out of the box provided by hackathon - uses moving average to decide on actions
 
@@ -14,7 +13,7 @@ class PV1AugmentedMovingAveragePolicy(Policy):
         """
         super().__init__()
         self.window_size = int(window_size)
-        self.price_history = deque(maxlen=int(window_size))
+        self.price_history = RollingWindow(int(window_size))
         self.battery_capacity_kwh = 13
         self.low_batt_threshold = low_batt_threshold  # As percentage of total capacity
         self.charge_scale_factor = charge_scale_factor
@@ -60,7 +59,7 @@ class PV1AugmentedMovingAveragePolicy(Policy):
             
             
         elif len(self.price_history) == self.window_size:
-            moving_average = np.mean(self.price_history)
+            moving_average = self.price_history.mean
             
             if market_price > moving_average:
                 # charge_kW = -max_charge_rate
@@ -1,7 +1,6 @@
 import pandas as pd
-from collections import deque
-import numpy as np
 from policies.policy import Policy
+from policies.rolling_stats import RollingWindow
 
 # out of the box provided by hackathon - uses moving average to decide on actions
 
@@ -14,14 +13,14 @@ class MovingAveragePolicy(Policy):
         """
         super().__init__()
         self.window_size = window_size
-        self.price_history = deque(maxlen=window_size)
+        self.price_history = RollingWindow(window_size)
 
     def act(self, external_state, internal_state):
         market_price = external_state['price']
         self.price_history.append(market_price)
 
         if len(self.price_history) == self.window_size:
-            moving_average = np.mean(self.price_history)
+            moving_average = self.price_history.mean
             
             if market_price > moving_average:
                 charge_kW = -internal_state['max_charge_rate']
@@ -0,0 +1,200 @@
+"""
+Rolling-horizon model-predictive control.
+
+At every interval the policy forecasts the next `horizon` prices, plans the best schedule for
+them with the state-of-charge DP of `battery_dp.py` and applies only the first action. Prices
+are forecast from a per-time-of-day profile of the last `history_days` days, plus the current
+price's deviation from that profile, fading by `deviation_decay` per interval.
+
+Work done for one decision is kept for the next ones:
+
+- `ShiftDP` allocates its grid buffers once, so a solve only runs the backward pass.
+- The price and PV profiles are running sums per time of day, updated in O(1) per interval.
+- The DP gives the best move from every state of charge, not just the current one. With
+  `resolve_every` > 1 the last plan is followed for that many intervals, from whatever state of
+  charge the battery is actually in, unless the price moves more than `price_tolerance` away
+  from the price it was planned for.
+
+PV only changes what the battery should do under a tariff, where exported solar and grid
+purchases are adjusted differently; with `tariff` set ("default" or a tariff JSON file, as for
+`tariff_evaluate.py`) the PV forecast is the PV profile, corrected towards the current PV and
+the `pv_power_forecast_1h`/`_2h`/`_24h` columns where the data has them.
+
+Near the end of an evaluation the horizon is cut at the last interval and the remaining charge
+is valued like `evaluate.py`'s rundown.
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from battery_dp import ShiftDP, grid_state, shift_rewards, shifts_to_actions, soc_grid, tariff_shift_rewards
+from environment import PRICE_KEY, TIMESTAMP_KEY, kW_to_kWh
+from market_time import epoch_second, epoch_seconds
+from policies.policy import Policy
+from rundown import RUNDOWN_WINDOW, rundown_values
+from tariff_schedule import DEFAULT_TARIFF, load_tariff
+
+INTERVAL_SECONDS = 5 * 60
+INTERVALS_PER_DAY = 24 * 60 * 60 // INTERVAL_SECONDS
+PV_KEY = 'pv_power'
+PV_FORECAST_KEYS = [(12, 'pv_power_forecast_1h'), (24, 'pv_power_forecast_2h'), (INTERVALS_PER_DAY, 'pv_power_forecast_24h')]  # (intervals ahead, column)
+
+
+class SlotProfile:
+    """
+    Mean value at every 5 minute slot of the day over the last `days` days.
+    """
+    def __init__(self, days: int):
+        self.values = np.full((days, INTERVALS_PER_DAY), np.nan)
+        self.sums = np.zeros(INTERVALS_PER_DAY)
+        self.counts = np.zeros(INTERVALS_PER_DAY, dtype=np.int64)
+        self.writes = np.zeros(INTERVALS_PER_DAY, dtype=np.int64)
+
+    def update(self, slot: int, value: float):
+        if not np.isfinite(value):
+            return
+        row = self.writes[slot] % len(self.values)
+        previous = self.values[row, slot]
+        if np.isnan(previous):
+            self.counts[slot] += 1
+        else:
+            self.sums[slot] -= previous
+        self.values[row, slot] = value
+        self.sums[slot] += value
+        self.writes[slot] += 1
+
+    def means(self, fill_value: float) -> np.ndarray:
+        means = np.full(INTERVALS_PER_DAY, fill_value, dtype=float)
+        np.divide(self.sums, self.counts, out=means, where=self.counts > 0)
+        return means
+
+
+class MpcPolicy(Policy):
+    def __init__(self, horizon=288, steps_per_interval=5, history_days=7, deviation_decay=0.95, resolve_every=1, price_tolerance=None, tariff=None, capacity_kWh=13, max_charge_rate_kW=5):
+        """
+        :param horizon: Intervals planned ahead at every decision.
+        :param steps_per_interval: State-of-charge grid steps per full-rate interval.
+        :param history_days: Days of prices (and PV) the time-of-day profiles average over.
+        :param deviation_decay: How much of the current price's deviation from its profile is
+            carried to each following interval.
+        :param resolve_every: Plan afresh every this many intervals and follow the last plan in
+            between.
+        :param price_tolerance: Plan afresh early when the price differs from the planned one by
+            more than this ($/MWh). None means only `resolve_every` counts.
+        :param tariff: None for spot prices, "default" for the default tariff or the path of a
+            tariff JSON file.
+        """
+        super().__init__()
+        self.horizon = horizon
+        self.deviation_decay = deviation_decay
+        self.resolve_every = resolve_every
+        self.price_tolerance = price_tolerance
+        self.tariff = None if tariff is None else DEFAULT_TARIFF if tariff == 'default' else load_tariff(tariff)
+        self.max_charge_rate_kW = max_charge_rate_kW
+        self.steps_per_interval = steps_per_interval
+
+        self.grid = soc_grid(capacity_kWh, max_charge_rate_kW, steps_per_interval)
+        self.solver = ShiftDP(len(self.grid), steps_per_interval, horizon)
+        self.ahead = np.arange(horizon)
+        self.decay = deviation_decay ** self.ahead
+
+        self.price_profile = SlotProfile(history_days)
+        self.pv_profile = SlotProfile(history_days)
+        self.recent_prices = deque(maxlen=RUNDOWN_WINDOW)
+
+        self._plan = None  # (choices, planned prices, whether it plans up to the end) of the last solve
+        self._plan_age = 0
+
+    def load_historical(self, external_states: pd.DataFrame):
+        if len(external_states) == 0:
+            return
+        slots = (epoch_seconds(external_states[TIMESTAMP_KEY]) % (24 * 60 * 60)) // INTERVAL_SECONDS
+        prices = external_states[PRICE_KEY].to_numpy(dtype=float)
+        pv_power = external_states[PV_KEY].to_numpy(dtype=float) if PV_KEY in external_states else np.full(len(prices), np.nan)
+        for slot, price, pv in zip(slots.tolist(), prices.tolist(), pv_power.tolist()):
+            self.price_profile.update(slot, price)
+            self.pv_profile.update(slot, pv)
+        self.recent_prices.extend(prices.tolist())
+
+    def act(self, external_state, internal_state):
+        price = float(external_state[PRICE_KEY])
+        pv_power = float(external_state[PV_KEY])
+        epoch = epoch_second(external_state[TIMESTAMP_KEY])
+        slot = (epoch % (24 * 60 * 60)) // INTERVAL_SECONDS
+
+        remaining_steps = internal_state.get('remaining_steps')
+        horizon = self.horizon if remaining_steps is None else min(self.horizon, remaining_steps + 1)
+        state = grid_state(internal_state['battery_soc'], self.grid)
+
+        ends_within_horizon = remaining_steps is not None and horizon == remaining_steps + 1
+        if self.needs_plan(price, ends_within_horizon):
+            prices = self.forecast_prices(price, slot, horizon)
+            self._plan = (self.solve(prices, pv_power, external_state, epoch, slot, horizon, ends_within_horizon), prices, ends_within_horizon)
+            self._plan_age = 0
+        choices = self._plan[0]
+        shift = int(choices[self._plan_age, state])
+        self._plan_age += 1
+
+        self.price_profile.update(slot, price)
+        self.pv_profile.update(slot, pv_power)
+        self.recent_prices.append(price)
+
+        # Aim for the planned grid state, which also corrects any drift off the grid
+        interval_kWh = kW_to_kWh(self.max_charge_rate_kW)
+        shift_kWh = np.clip(self.grid[state + shift] - internal_state['battery_soc'], -interval_kWh, interval_kWh)
+        solar_kW_to_battery, charge_kW = shifts_to_actions([shift_kWh], [pv_power])
+        return float(solar_kW_to_battery[0]), float(charge_kW[0])
+
+    def needs_plan(self, price: float, ends_within_horizon: bool) -> bool:
+        if self._plan is None or self._plan_age >= min(self.resolve_every, len(self._plan[0])):
+            return True
+        _, planned_prices, planned_to_end = self._plan
+        if ends_within_horizon and not planned_to_end:  # The last plan did not value the rundown
+            return True
+        return self.price_tolerance is not None and abs(price - planned_prices[self._plan_age]) > self.price_tolerance
+
+    def forecast_prices(self, price: float, slot: int, horizon: int) -> np.ndarray:
+        fill_value = np.mean(self.recent_prices) if self.recent_prices else price
+        profile = self.price_profile.means(fill_value)
+        forecast = profile[(slot + self.ahead[:horizon]) % INTERVALS_PER_DAY]
+        forecast += (price - profile[slot]) * self.decay[:horizon]
+        forecast[0] = price
+        return forecast
+
+    def forecast_pv(self, pv_power: float, external_state, slot: int, horizon: int) -> np.ndarray:
+        """
+        The PV profile, shifted by how far the current PV and the `PV_FORECAST_KEYS` forecasts
+        are from it. The shift is interpolated between them, so the day's shape comes from the
+        profile, and dropped after the last one.
+        """
+        profile = self.pv_profile.means(0.0)
+        ahead = self.ahead[:horizon]
+        anchors, deviations = [0], [pv_power - profile[slot]]
+        for intervals_ahead, key in PV_FORECAST_KEYS:
+            value = external_state.get(key) if hasattr(external_state, 'get') else None
+            if value is not None and np.isfinite(value):
+                anchors.append(intervals_ahead)
+                deviations.append(float(value) - profile[(slot + intervals_ahead) % INTERVALS_PER_DAY])
+        forecast = profile[(slot + ahead) % INTERVALS_PER_DAY] + np.interp(ahead, anchors, deviations, right=0.0)
+        return np.clip(forecast, 0, None)
+
+    def solve(self, prices: np.ndarray, pv_power: float, external_state, epoch: int, slot: int, horizon: int, ends_within_horizon: bool) -> np.ndarray:
+        step_kWh = self.grid[1]
+        if self.tariff is None:
+            rewards = shift_rewards(prices, step_kWh, self.steps_per_interval)
+        else:
+            pv_forecast = self.forecast_pv(pv_power, external_state, slot, horizon)
+            import_adjustments, export_adjustments = self.tariff.compile_epochs(epoch + INTERVAL_SECONDS * self.ahead[:horizon])
+            rewards = tariff_shift_rewards(prices, pv_forecast, step_kWh, self.steps_per_interval, import_adjustments, export_adjustments)
+
+        if ends_within_horizon:
+            # Value the final charge like the rundown at the end of the evaluation
+            last_day_prices = np.concatenate((np.asarray(self.recent_prices, dtype=float), prices))[-RUNDOWN_WINDOW:]
+            terminal_values = rundown_values(self.grid, self.max_charge_rate_kW, np.mean(last_day_prices))
+        else:
+            terminal_values = self.grid * np.mean(prices) / 1000
+
+        _, choices = self.solver.solve(rewards, terminal_values)
+        return choices
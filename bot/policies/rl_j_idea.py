@@ -6,12 +6,15 @@ import pandas as pd
 from stable_baselines3 import PPO
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
-from BGT.env import P_mean, P_std, pv_max
+from BGT.constants import P_mean, P_std, pv_max
 
+from model_cache import load_cached
 from .policy import Policy
 
 
 class RlPpo2Policy(Policy):
+    uses_model_cache = True
+
     def __init__(self, window_size=5):
         """
         Constructor for the MovingAveragePolicy.
@@ -22,7 +25,7 @@ class RlPpo2Policy(Policy):
         self.window_size = window_size
         self.price_history = []
 
-        self.rlpolicy = PPO.load("./models/spot_soc_pv/PPOv2_step29M.zip")
+        self.rlpolicy = load_cached("./models/spot_soc_pv/PPOv2_step29M.zip", PPO.load)
         self.capacity_kWh = 13.0
         self.max_charge_rate = 5.0
 
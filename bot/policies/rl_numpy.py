@@ -0,0 +1,49 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+PATH = os.path.join(os.path.dirname(__file__), "..")
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+from BGT.constants import P_mean, P_std, pv_max
+
+from model_cache import load_cached
+from numpy_actor import NumpyActor
+from .policy import Policy
+
+
+class RlNumpyPolicy(Policy):
+    uses_model_cache = True
+
+    def __init__(self, model="PPOv2_step29M"):
+        """
+        The PPO policy of `RlPpo2Policy`, acting deterministically through an actor exported with
+        `numpy_actor.py`, so it needs neither torch nor stable-baselines3.
+
+        :param model: The name of the exported actor in models/spot_soc_pv (without `.npz`), or the
+            path of an `.npz` file.
+        """
+        super().__init__()
+        path = model if model.endswith(".npz") else os.path.join(PATH, "models/spot_soc_pv", model + ".npz")
+        self.actor = load_cached(path, NumpyActor.load)
+        self.capacity_kWh = 13.0
+        self.max_charge_rate = 5.0
+        self.observation = np.empty(3, dtype=np.float32)
+
+    def act(self, external_state, internal_state):
+        # The same observation as RlPpo2Policy
+        p = (float(external_state["price"]) - P_mean) / 3 * P_std
+        soc = internal_state["battery_soc"] / self.capacity_kWh
+        pv = float(external_state["pv_power"]) / pv_max
+        self.observation[0] = min(max(p, -1), 1)
+        self.observation[1] = min(max(soc, 0), 1)
+        self.observation[2] = min(pv, 1)
+
+        action = self.actor.predict(self.observation)
+        solar_kW_to_battery = float(action[0]) * self.max_charge_rate
+        charge_kW = float(action[1]) * self.max_charge_rate
+        return solar_kW_to_battery, charge_kW
+
+    def load_historical(self, external_states: pd.DataFrame):
+        pass
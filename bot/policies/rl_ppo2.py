@@ -8,12 +8,15 @@ from stable_baselines3 import PPO
 
 PATH = os.path.join(os.path.dirname(__file__), "..")
 sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
-from BGT.env import P_mean, P_std, pv_max
+from BGT.constants import P_mean, P_std, pv_max
 
+from model_cache import load_cached
 from .policy import Policy
 
 
 class RlPpo2Policy(Policy):
+    uses_model_cache = True
+
     def __init__(self, window_size=5):
         """
         Constructor for the MovingAveragePolicy.
@@ -24,7 +27,7 @@ class RlPpo2Policy(Policy):
         self.window_size = window_size
         self.price_history = []
 
-        self.rlpolicy = PPO.load(os.path.join(PATH, "models/spot_soc_pv/PPOv2_step29M"))
+        self.rlpolicy = load_cached(os.path.join(PATH, "models/spot_soc_pv/PPOv2_step29M.zip"), PPO.load)
         self.capacity_kWh = 13.0
         self.max_charge_rate = 5.0
 
@@ -0,0 +1,216 @@
+"""
+Statistics of the last `size` values of a stream, updated as each value arrives.
+
+Policies which compare the price to a summary of recent prices would otherwise recompute that
+summary over the whole window at every interval. `RollingWindow` updates it as values enter and
+leave the window:
+
+- The mean is a compensated (Neumaier) running sum, so it does not drift away from `np.mean` of
+  the window over millions of updates, and the variance uses Welford's update for a value
+  replacing another. Both are O(1).
+- The minimum and maximum come from monotonic deques, amortised O(1).
+- Quantiles come from two heaps split at the quantile, with values that have left the window
+  removed lazily, O(log n). They match `np.quantile`'s default (linear) interpolation.
+"""
+
+import heapq
+import math
+from collections import Counter, deque
+from typing import Dict, Iterable, Iterator
+
+
+class RollingQuantile:
+    """
+    The `q` quantile of a window of values, kept by `RollingWindow`.
+
+    The lower heap (a max-heap of negated values) holds the `floor(q * (n - 1)) + 1` smallest
+    values and the upper heap the rest, so the quantile is interpolated between their tops.
+    Removed values are only counted in `_removed` and dropped once they reach the top of a heap.
+    """
+    __slots__ = ('q', '_lower', '_upper', '_lower_size', '_upper_size', '_removed')
+
+    def __init__(self, q: float):
+        if not 0 <= q <= 1:
+            raise ValueError(f'Quantiles must be between 0 and 1, got {q}.')
+        self.q = q
+        self.clear()
+
+    def clear(self):
+        self._lower = []
+        self._upper = []
+        self._lower_size = 0
+        self._upper_size = 0
+        self._removed = Counter()
+
+    def add(self, value: float):
+        if self._lower_size and value <= -self._lower[0]:
+            heapq.heappush(self._lower, -value)
+            self._lower_size += 1
+        else:
+            heapq.heappush(self._upper, value)
+            self._upper_size += 1
+        self._rebalance()
+
+    def remove(self, value: float):
+        # Every value above the lower top is in the upper heap and a value equal to it can be
+        # taken from the lower one, so the value is counted out of the right heap.
+        self._removed[value] += 1
+        if self._lower_size and value <= -self._lower[0]:
+            self._lower_size -= 1
+            self._prune(self._lower, -1)
+        else:
+            self._upper_size -= 1
+            self._prune(self._upper, 1)
+        self._rebalance()
+
+    def value(self) -> float:
+        n = self._lower_size + self._upper_size
+        if n == 0:
+            return math.nan
+        position = self.q * (n - 1)
+        fraction = position - math.floor(position)
+        below = -self._lower[0]
+        if fraction == 0:
+            return below
+        return below + fraction * (self._upper[0] - below)
+
+    def __len__(self) -> int:
+        return len(self._lower) + len(self._upper)
+
+    def _prune(self, heap: list, sign: int):
+        removed = self._removed
+        while heap and removed[sign * heap[0]]:
+            removed[sign * heap[0]] -= 1
+            heapq.heappop(heap)
+
+    def _rebalance(self):
+        n = self._lower_size + self._upper_size
+        target = math.floor(self.q * (n - 1)) + 1 if n else 0
+        while self._lower_size > target:
+            heapq.heappush(self._upper, -heapq.heappop(self._lower))
+            self._lower_size -= 1
+            self._upper_size += 1
+            self._prune(self._lower, -1)
+        while self._lower_size < target:
+            heapq.heappush(self._lower, -heapq.heappop(self._upper))
+            self._upper_size -= 1
+            self._lower_size += 1
+            self._prune(self._upper, 1)
+
+
+class RollingWindow:
+    """
+    Mean, variance, minimum, maximum and quantiles of the last `size` values appended.
+
+    `len`, iteration and indexing behave like `deque(maxlen=size)`, so a window can replace one.
+    `variance` and `std` are population statistics, like `np.var` and `np.std`. Values must be
+    finite.
+
+    :param size: The number of values kept.
+    :param quantiles: The quantiles (between 0 and 1) that `quantile` can be asked for.
+    """
+    def __init__(self, size: int, quantiles: Iterable[float] = ()):
+        if size < 1:
+            raise ValueError(f'The window size must be at least 1, got {size}.')
+        self.size = int(size)
+        self.values = deque()
+        self._sum = 0.0
+        self._compensation = 0.0
+        self._m2 = 0.0
+        self._appended = 0
+        self._minima = deque()  # (append index, value), increasing values
+        self._maxima = deque()  # (append index, value), decreasing values
+        self._quantiles: Dict[float, RollingQuantile] = {q: RollingQuantile(q) for q in quantiles}
+
+    def append(self, value: float):
+        value = float(value)
+        values = self.values
+        old_mean = self.mean if values else value
+        if len(values) == self.size:
+            removed = values.popleft()
+            values.append(value)
+            self._add_to_sum(value)
+            self._add_to_sum(-removed)
+            self._m2 = max(self._m2 + (value - removed) * (value - self.mean + removed - old_mean), 0.0)
+            for quantile in self._quantiles.values():
+                quantile.remove(removed)
+        else:
+            values.append(value)
+            self._add_to_sum(value)
+            self._m2 += (value - old_mean) * (value - self.mean)
+
+        index = self._appended
+        self._appended += 1
+        while self._minima and self._minima[-1][1] >= value:
+            self._minima.pop()
+        self._minima.append((index, value))
+        while self._maxima and self._maxima[-1][1] <= value:
+            self._maxima.pop()
+        self._maxima.append((index, value))
+        oldest = self._appended - len(values)
+        if self._minima[0][0] < oldest:
+            self._minima.popleft()
+        if self._maxima[0][0] < oldest:
+            self._maxima.popleft()
+
+        for quantile in self._quantiles.values():
+            quantile.add(value)
+            if len(quantile) > 4 * self.size:
+                self._rebuild(quantile)
+
+    def extend(self, values: Iterable[float]):
+        for value in values:
+            self.append(value)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    @property
+    def mean(self) -> float:
+        return (self._sum + self._compensation) / len(self.values) if self.values else math.nan
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / len(self.values) if self.values else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def min(self) -> float:
+        return self._minima[0][1] if self.values else math.nan
+
+    @property
+    def max(self) -> float:
+        return self._maxima[0][1] if self.values else math.nan
+
+    def quantile(self, q: float) -> float:
+        if q not in self._quantiles:
+            raise ValueError(f'Quantile {q} is not tracked, the window tracks {sorted(self._quantiles)}.')
+        return self._quantiles[q].value()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.values)
+
+    def __getitem__(self, index: int) -> float:
+        return self.values[index]
+
+    def _add_to_sum(self, value: float):
+        total = self._sum + value
+        if abs(self._sum) >= abs(value):
+            self._compensation += (self._sum - total) + value
+        else:
+            self._compensation += (value - total) + self._sum
+        self._sum = total
+
+    def _rebuild(self, quantile: RollingQuantile):
+        # Values removed deep inside the heaps are only dropped when they reach a top, so the
+        # heaps are rebuilt from the window when those make up most of them.
+        quantile.clear()
+        for value in self.values:
+            quantile.add(value)
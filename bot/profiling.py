@@ -0,0 +1,97 @@
+"""
+Per-step timing of evaluation runs.
+
+`PhaseTimer` collects `time.perf_counter_ns` durations for named phases of a trial (e.g. the
+policy's `act`, the environment's `step` and the bookkeeping around them) and summarises them as
+totals, percentiles and a latency histogram. Unprofiled runs use `NULL_TIMER` instead, whose
+clock and records do nothing, so one trial loop serves both.
+
+`cprofile_run` wraps a call in `cProfile` and dumps the statistics, which can be inspected with
+`python -m pstats <file>` or turned into a flame graph with tools like snakeviz or flameprof.
+"""
+
+import cProfile
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# Upper edges of the latency histogram buckets, in microseconds.
+HISTOGRAM_EDGES_US = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1_000, 2_000, 5_000, 10_000, 100_000, 1_000_000]
+
+
+class PhaseTimer:
+    """
+    Durations (ns) of every occurrence of each phase of a run.
+    """
+    clock = staticmethod(time.perf_counter_ns)
+
+    def __init__(self):
+        self.durations: Dict[str, List[int]] = defaultdict(list)
+
+    def record(self, phase: str, duration_ns: int):
+        self.durations[phase].append(duration_ns)
+
+    def summary(self) -> dict:
+        """
+        :return: For every phase, the count, total and mean time, the p50/p90/p99/max latency and
+            a histogram of latencies, plus the total time over all phases.
+        """
+        phases = {}
+        for phase, durations in self.durations.items():
+            durations_us = np.asarray(durations) / 1e3
+            counts, _ = np.histogram(durations_us, bins=[0] + HISTOGRAM_EDGES_US + [np.inf])
+            phases[phase] = {
+                'count': len(durations_us),
+                'total_seconds': float(np.sum(durations_us) / 1e6),
+                'mean_us': float(np.mean(durations_us)),
+                'p50_us': float(np.percentile(durations_us, 50)),
+                'p90_us': float(np.percentile(durations_us, 90)),
+                'p99_us': float(np.percentile(durations_us, 99)),
+                'max_us': float(np.max(durations_us)),
+                'histogram': {
+                    'upper_edges_us': HISTOGRAM_EDGES_US + ['inf'],
+                    'counts': counts.tolist()
+                }
+            }
+        return {
+            'phases': phases,
+            'total_seconds': sum(phase['total_seconds'] for phase in phases.values())
+        }
+
+    def format(self) -> str:
+        summary = self.summary()
+        lines = [f'{"phase":<12} {"count":>8} {"total (s)":>10} {"mean (us)":>10} {"p50 (us)":>10} {"p99 (us)":>10} {"share":>7}']
+        for phase, stats in summary['phases'].items():
+            share = stats['total_seconds'] / summary['total_seconds'] if summary['total_seconds'] else 0
+            lines.append(f'{phase:<12} {stats["count"]:>8} {stats["total_seconds"]:>10.3f} {stats["mean_us"]:>10.1f} {stats["p50_us"]:>10.1f} {stats["p99_us"]:>10.1f} {share:>7.1%}')
+        return '\n'.join(lines)
+
+
+class NullTimer:
+    """
+    A stand-in for `PhaseTimer` when nothing is being timed.
+    """
+    @staticmethod
+    def clock() -> int:
+        return 0
+
+    def record(self, phase: str, duration_ns: int):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+def cprofile_run(function: Callable, output_file: str, *args, **kwargs):
+    """
+    Call `function(*args, **kwargs)` under cProfile and dump the statistics to `output_file`.
+
+    :return: What `function` returned.
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        profiler.dump_stats(output_file)
@@ -0,0 +1,273 @@
+"""
+Asyncio trading loop with a decision deadline for every interval.
+
+`RealtimeRunner` takes market rows from an async source, runs the policy's `act` on a worker
+thread and waits at most `deadline_seconds` for it (see `RealtimeRunner` for when the deadline
+starts). If `act` is late, the configured fallback action (by default 0 kW, i.e. do nothing) is
+applied instead, so a slow policy can never stall the loop. The late call is left to finish in
+the background and its result is discarded.
+
+Policies keep state between calls (price histories, models), so `act` is never run concurrently:
+a row that arrives while an earlier, late `act` is still running gets the fallback action too.
+
+Deadline misses are logged and counted in `DeadlineMetrics`, which is printed as JSON at the end.
+
+Sources are async iterators of rows:
+
+- `thread_source` wraps a blocking iterator, e.g. `stream.iter_csv_rows` following a file.
+- `stream_reader_source` reads CSV lines from an `asyncio.StreamReader`, e.g. a TCP connection.
+
+Example:
+
+    python bot/realtime.py --class_name RlPpo2Policy --input live.csv --follow --deadline 5
+    python bot/realtime.py --class_name MovingAveragePolicy --listen 127.0.0.1:9000
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from environment import PRICE_KEY, TIMESTAMP_KEY
+from fast_evaluate import DEFAULT_INITIAL_PROFIT, DEFAULT_INITIAL_SOC, float_or_none, load_config, parse_parameters, set_seed
+from market_data import load_market_data
+from policies import policy_classes
+from running_stats import RunningStats
+from stream import StreamingBatteryEnv, iter_csv_rows, parse_field
+
+logger = logging.getLogger(__name__)
+
+SAFE_ACTION = (0.0, 0.0)  # (solar_kW_to_battery, charge_kW): export all solar, leave the battery alone
+
+
+class DeadlineMetrics:
+    """
+    Counts of intervals and deadline misses, and the latency of `act`.
+    """
+    def __init__(self):
+        self.intervals = 0
+        self.missed_deadlines = 0
+        self.busy_intervals = 0
+        self.errors = 0
+        self.act_latency_ms = RunningStats()
+
+    @property
+    def fallbacks(self) -> int:
+        return self.missed_deadlines + self.busy_intervals + self.errors
+
+    def to_dict(self) -> dict:
+        latency = self.act_latency_ms.to_dict() if self.act_latency_ms.count else None
+        return {
+            'intervals': self.intervals,
+            'missed_deadlines': self.missed_deadlines,
+            'busy_intervals': self.busy_intervals,
+            'errors': self.errors,
+            'fallback_rate': self.fallbacks / self.intervals if self.intervals else 0.0,
+            'act_latency_ms': latency
+        }
+
+
+class RealtimeRunner:
+    """
+    Runs a policy on market rows as they arrive, with a deadline for every decision.
+
+    :param policy: A policy whose `load_historical` has already been called.
+    :param battery_environment: The environment the chosen actions are applied in.
+    :param deadline_seconds: How long to wait for `act`, from when the runner starts deciding on
+        the row. Rows are decided one at a time, so time a row spends waiting in the source while
+        an earlier row is decided does not count.
+    :param fallback_action: The `(solar_kW_to_battery, charge_kW)` applied when `act` is late,
+        still busy with an earlier row, or raises.
+    """
+    def __init__(self, policy, battery_environment: StreamingBatteryEnv, deadline_seconds: float, fallback_action: Tuple[float, float] = SAFE_ACTION):
+        self.policy = policy
+        self.battery_environment = battery_environment
+        self.deadline_seconds = deadline_seconds
+        self.fallback_action = fallback_action
+        self.metrics = DeadlineMetrics()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='policy')
+        self._pending = None  # The `act` call which missed its deadline, while it is still running
+
+    async def decide(self, market_row: Mapping, internal_state: dict) -> Tuple[Tuple[float, float], str, float]:
+        """
+        :return: The action to apply, why (`"policy"`, `"deadline"`, `"busy"` or `"error"`) and
+            how long the decision took in ms.
+        """
+        start = time.perf_counter()
+        if self._pending is not None and not self._pending.done():
+            return self.fallback_action, 'busy', 0.0
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self.policy.act, market_row, dict(internal_state))
+        try:
+            action = await asyncio.wait_for(asyncio.shield(future), timeout=self.deadline_seconds)
+        except asyncio.TimeoutError:
+            self._pending = future
+            future.add_done_callback(lambda late: late.exception())  # Don't warn about unretrieved errors
+            return self.fallback_action, 'deadline', (time.perf_counter() - start) * 1e3
+        except Exception:
+            logger.exception('act raised at %s, using the fallback action', market_row.get(TIMESTAMP_KEY))
+            return self.fallback_action, 'error', (time.perf_counter() - start) * 1e3
+
+        return action, 'policy', (time.perf_counter() - start) * 1e3
+
+    async def run(self, source: AsyncIterator[Mapping], emit: Callable[[dict], None]):
+        """
+        Decide and apply an action for every row from `source`, passing each decision to `emit`.
+        """
+        internal_state = self.battery_environment.initial_info()
+        try:
+            async for market_row in source:
+                action, decided_by, latency_ms = await self.decide(market_row, internal_state)
+                self.record(market_row, decided_by, latency_ms)
+
+                solar_kW_to_battery, charge_kW = action
+                internal_state = self.battery_environment.step_row(market_row, charge_kW, solar_kW_to_battery, float(market_row['pv_power']))
+
+                emit({
+                    'timestamp': market_row[TIMESTAMP_KEY],
+                    'price': market_row[PRICE_KEY],
+                    'solar_kW_to_battery': solar_kW_to_battery,
+                    'charge_kW': charge_kW,
+                    'decided_by': decided_by,
+                    'decision_ms': latency_ms,
+                    'total_profit': internal_state['total_profit'],
+                    'battery_soc': internal_state['battery_soc']
+                })
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def record(self, market_row: Mapping, decided_by: str, latency_ms: float):
+        self.metrics.intervals += 1
+        if decided_by == 'policy':
+            self.metrics.act_latency_ms.update(latency_ms)
+        elif decided_by == 'deadline':
+            self.metrics.missed_deadlines += 1
+            logger.warning('act missed the %.3fs deadline at %s, using the fallback action (%d misses)', self.deadline_seconds, market_row.get(TIMESTAMP_KEY), self.metrics.missed_deadlines)
+        elif decided_by == 'busy':
+            self.metrics.busy_intervals += 1
+            logger.warning('act is still running from an earlier interval at %s, using the fallback action', market_row.get(TIMESTAMP_KEY))
+        else:
+            self.metrics.errors += 1
+
+
+async def thread_source(rows: Iterable[Mapping]) -> AsyncIterator[Mapping]:
+    """
+    Iterate over a blocking iterable of rows without blocking the event loop.
+    """
+    iterator = iter(rows)
+    done = object()
+    while True:
+        row = await asyncio.to_thread(next, iterator, done)
+        if row is done:
+            return
+        yield row
+
+
+async def stream_reader_source(reader: asyncio.StreamReader) -> AsyncIterator[Mapping]:
+    """
+    Read a market CSV, header first, line by line from a stream (e.g. a socket).
+    """
+    header = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        line = line.decode()
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = values
+        else:
+            yield dict(zip(header, map(parse_field, values)))
+
+
+async def accept_one_connection(host: str, port: int) -> AsyncIterator[Mapping]:
+    """
+    Listen on `host:port` and read market rows from the first client which connects.
+    """
+    connected = asyncio.get_running_loop().create_future()
+
+    async def on_connect(reader, writer):
+        connected.set_result((reader, writer))
+
+    server = await asyncio.start_server(on_connect, host, port)
+    async with server:
+        reader, writer = await connected
+        async for row in stream_reader_source(reader):
+            yield row
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trade in real time with a deadline for every decision.')
+    parser.add_argument('--input', type=str, default='-', help='Market CSV to read rows from, or - for stdin.')
+    parser.add_argument('--follow', action='store_true', default=False, help='Keep waiting for rows appended to --input, like tail -f.')
+    parser.add_argument('--poll_interval', type=float, default=1.0, help='Seconds between checks for new rows with --follow.')
+    parser.add_argument('--listen', type=str, default=None, help='Read rows from a TCP client connecting to host:port instead of --input.')
+    parser.add_argument('--deadline', type=float, default=30.0, help='Seconds to wait for the policy before using the fallback action.')
+    parser.add_argument('--fallback_charge_kW', type=float, default=0.0, help='Battery charge rate (kW) applied when the policy misses its deadline.')
+    parser.add_argument('--fallback_solar_kW', type=float, default=0.0, help='Solar to battery (kW) applied when the policy misses its deadline.')
+    parser.add_argument('--history', type=str, default=None, help='Market CSV passed once to load_historical before the first row.')
+    parser.add_argument('--output_file', type=str, default=None, help='File to append the decisions to, one JSON line each (default: stdout).')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for randomness')
+    parser.add_argument('--class_name', type=str, help='Policy class name. If not provided, the config.json policy will be used.')
+    parser.add_argument('--param', action='append', help='Policy parameters as key=value pairs', default=[])
+    parser.add_argument('--initial_soc', type=float_or_none, help='Initial state of charge of the battery in kWh', default=None)
+    parser.add_argument('--initial_profit', type=float_or_none, help='Initial profit of the battery in $', default=None)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format='%(asctime)s %(levelname)s %(message)s')
+
+    if args.class_name:
+        policy_config = {'class_name': args.class_name, 'parameters': parse_parameters(args.param)}
+    else:
+        policy_config = load_config('bot/config.json')
+
+    set_seed(args.seed)
+    policy = policy_classes[policy_config['class_name']](**policy_config.get('parameters', {}))
+    policy.load_historical(load_market_data(args.history) if args.history else pd.DataFrame(columns=[TIMESTAMP_KEY, PRICE_KEY]))
+
+    battery_environment = StreamingBatteryEnv(
+        initial_charge_kWh=args.initial_soc if args.initial_soc is not None else DEFAULT_INITIAL_SOC,
+        initial_profit=args.initial_profit if args.initial_profit is not None else DEFAULT_INITIAL_PROFIT
+    )
+    runner = RealtimeRunner(policy, battery_environment, args.deadline, (args.fallback_solar_kW, args.fallback_charge_kW))
+
+    input_file = None
+    if args.listen:
+        host, port = args.listen.rsplit(':', 1)
+        source = accept_one_connection(host, int(port))
+    else:
+        input_file = sys.stdin if args.input == '-' else open(args.input, 'r')
+        source = thread_source(iter_csv_rows(input_file, follow=args.follow, poll_interval=args.poll_interval))
+
+    output = open(args.output_file, 'a') if args.output_file else sys.stdout
+
+    def emit(decision: dict):
+        output.write(json.dumps(decision) + '\n')
+        output.flush()
+
+    try:
+        asyncio.run(runner.run(source, emit))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if input_file is not None and input_file is not sys.stdin:
+            input_file.close()
+        if output is not sys.stdout:
+            output.close()
+
+    print(json.dumps(runner.metrics.to_dict()), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
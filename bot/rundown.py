@@ -0,0 +1,105 @@
+"""
+Valuation of the energy left in the battery at the end of an evaluation.
+
+`evaluate.run_down_battery` discharges the battery at its maximum rate, one interval at a time,
+and sells every interval at the mean price of the last day. The functions here compute the same
+sequence of intervals directly: every interval but the last removes exactly
+`kW_to_kWh(max_charge_rate_kW)`, so only the final remainder needs its own profit calculation.
+
+`run_down_battery` returns the identical list of profit deltas and leaves the battery empty with
+one `restore(0.0)`, so it takes the batteries of `fast_environment` and `tariff_environment`.
+`rundown_values` is the vectorised form for batches and sweeps.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+from environment import kW_to_kWh
+
+RUNDOWN_WINDOW = 288  # One day of 5 minute intervals
+
+
+def rundown_price(market_prices) -> float:
+    """
+    The price the remaining charge is assumed to sell at: the mean of the last day of prices.
+    """
+    return np.mean(np.asarray(market_prices[-RUNDOWN_WINDOW:]))
+
+
+def rundown_intervals(state_of_charge_kWh: float, max_charge_rate_kW: float) -> Tuple[int, float]:
+    """
+    Work out how a full-rate discharge empties the battery.
+
+    :return: The number of intervals which remove a full `kW_to_kWh(max_charge_rate_kW)` and the
+        energy removed in the final, partial interval (0 if there is none).
+    """
+    if state_of_charge_kWh <= 0:
+        return 0, 0.0
+    if max_charge_rate_kW <= 0:
+        raise ValueError('The battery cannot be run down with a maximum charge rate of 0 kW.')
+
+    interval_kWh = kW_to_kWh(max_charge_rate_kW)
+    # Successive subtraction, exactly as `Battery.discharge_at` leaves the state of charge.
+    n_intervals = int(state_of_charge_kWh // interval_kWh) + 2
+    remaining = np.subtract.accumulate(np.concatenate(([state_of_charge_kWh], np.full(n_intervals, interval_kWh))))
+    full_intervals = int(np.count_nonzero(remaining >= interval_kWh))
+    remainder_kWh = float(remaining[full_intervals])
+
+    return full_intervals, max(remainder_kWh, 0.0)
+
+
+def run_down_battery(battery_environment, market_prices) -> list:
+    """
+    Sell the remaining charge and empty the battery, like `evaluate.run_down_battery`.
+
+    :param battery_environment: The environment at the end of the trial, whose battery has
+        `restore` (`fast_environment` or `tariff_environment`).
+    :param market_prices: The prices seen during the trial (a list or an array).
+    :return: The profit of every rundown interval.
+    """
+    battery = battery_environment.battery
+    assumed_rundown_price = rundown_price(market_prices)
+
+    full_intervals, remainder_kWh = rundown_intervals(battery.state_of_charge_kWh, battery.max_charge_rate_kW)
+    full_interval_profit = battery_environment.kWh_to_profit(kW_to_kWh(battery.max_charge_rate_kW), assumed_rundown_price)
+    rundown_profits = [full_interval_profit] * full_intervals
+    if remainder_kWh > 0:
+        rundown_profits.append(battery_environment.kWh_to_profit(remainder_kWh, assumed_rundown_price))
+
+    battery.restore(0.0)  # Where the interval loop leaves it
+    return rundown_profits
+
+
+def rundown_values(state_of_charge_kWh, max_charge_rate_kW, assumed_rundown_price) -> np.ndarray:
+    """
+    Total rundown profit for many terminal states at once.
+
+    Arguments broadcast against each other. Each result equals `np.sum` of the matching
+    `run_down_battery` list up to floating point summation order.
+
+    :param state_of_charge_kWh: Terminal states of charge (kWh).
+    :param max_charge_rate_kW: Maximum discharge rates (kW), all positive.
+    :param assumed_rundown_price: Rundown prices ($/MWh), e.g. from `rundown_price`.
+    :return: An array with the total rundown profit ($) of every element.
+    """
+    soc, rate, price = np.broadcast_arrays(np.asarray(state_of_charge_kWh, dtype=float), np.asarray(max_charge_rate_kW, dtype=float), np.asarray(assumed_rundown_price, dtype=float))
+    shape = soc.shape
+    soc, rate, price = soc.ravel(), rate.ravel(), price.ravel()
+    if np.any(rate[soc > 0] <= 0):
+        raise ValueError('The battery cannot be run down with a maximum charge rate of 0 kW.')
+
+    interval_kWh = kW_to_kWh(np.where(rate > 0, rate, 1.0))
+    n_intervals = int(np.max(soc // interval_kWh, initial=0)) + 2
+    steps = np.empty((len(soc), n_intervals + 1))
+    steps[:, 0] = soc
+    steps[:, 1:] = interval_kWh[:, None]
+    remaining = np.subtract.accumulate(steps, axis=1)
+
+    full_intervals = np.count_nonzero(remaining >= interval_kWh[:, None], axis=1)
+    remainder_kWh = np.maximum(remaining[np.arange(len(soc)), full_intervals], 0)
+    full_interval_profit = np.round(interval_kWh * price / 1000, 4)
+    remainder_profit = np.round(remainder_kWh * price / 1000, 4)
+
+    values = np.where(soc > 0, full_intervals * full_interval_profit + remainder_profit, 0.0)
+    return values.reshape(shape)
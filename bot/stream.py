@@ -0,0 +1,216 @@
+"""
+Row-by-row evaluation for live trading.
+
+`evaluate.py` needs the whole market CSV up front. Here the market data arrives one 5 minute
+interval at a time, from any iterable of rows: a generator, a CSV file that is still being
+written (`iter_csv_rows(..., follow=True)`, like `tail -f`) or a pipe on stdin. For every row
+the policy's `act` is called and the action is applied with `StreamingBatteryEnv.step_row`,
+then the decision is emitted straight away as one JSON line.
+
+History is loaded once, through `load_historical`, before the first row. Nothing from the past
+is re-read or re-simulated when a new row arrives.
+
+Example:
+
+    tail -n +1 -f bot/results/input-data.csv | python bot/stream.py --class_name MovingAveragePolicy
+    python bot/stream.py --input live.csv --follow --history bot/data/april15-may7_2023.csv
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from typing import IO, Iterable, Iterator, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from environment import BatteryEnv, PRICE_KEY, TIMESTAMP_KEY
+from fast_evaluate import DEFAULT_INITIAL_PROFIT, DEFAULT_INITIAL_SOC, float_or_none, load_config, parse_parameters, set_seed
+from market_data import load_market_data
+from policies import policy_classes
+
+
+class StreamingBatteryEnv(BatteryEnv):
+    """
+    `environment.BatteryEnv` without market data: each interval's row is passed to `step_row`.
+
+    The battery and profit calculations are the inherited ones, so feeding the rows of a
+    DataFrame through `step_row` gives exactly the totals and SOCs of `BatteryEnv.step`.
+    `remaining_steps` is only known when `expected_steps` is given; otherwise it is None.
+    """
+    def __init__(self, capacity_kWh: float = 13, max_charge_rate_kW: float = 5, initial_charge_kWh: float = 7.5, initial_profit: float = 0.0, expected_steps: Optional[int] = None):
+        super().__init__([], capacity_kWh, max_charge_rate_kW, initial_charge_kWh, initial_profit)
+        self.expected_steps = expected_steps
+
+    def initial_info(self) -> dict:
+        assert self.current_step == 0
+
+        return self.get_info(0)
+
+    def step_row(self, market_row: Mapping, charge_kW: float, solar_kW_to_battery: float, total_solar_kW: float) -> dict:
+        """
+        Apply an action at the price of `market_row`, the interval the action was decided for.
+
+        :return: The battery information after the interval, like the second value returned by
+            `BatteryEnv.step`.
+        """
+        market_price_mWh = market_row[PRICE_KEY]
+
+        kW_currently_charging, solar_profit_delta = self.process_solar(solar_kW_to_battery, total_solar_kW, market_price_mWh)
+
+        max_charge_kW = self.battery.max_charge_rate_kW - kW_currently_charging
+        battery_profit_delta = self.charge_discharge(min(charge_kW, max_charge_kW), market_price_mWh)
+
+        internal_state = self.get_info(battery_profit_delta + solar_profit_delta)
+
+        self.current_step += 1
+        return internal_state
+
+    def get_info(self, profit_delta: float = 0) -> dict:
+        self.total_profit += profit_delta
+        remaining_steps = self.expected_steps - self.current_step - 1 if self.expected_steps is not None else None
+        return {
+            'total_profit': self.total_profit,
+            'profit_delta': profit_delta,
+            'battery_soc': self.battery.state_of_charge_kWh,
+            'max_charge_rate': self.battery.max_charge_rate_kW,
+            'remaining_steps': remaining_steps
+        }
+
+
+def parse_field(value: str):
+    """
+    Convert a CSV field like `pd.read_csv` would: numbers become `np.float64`, empty fields NaN.
+
+    The NumPy type matters: the environment rounds profits with `round`, which rounds NumPy
+    floats slightly differently from Python floats.
+    """
+    if value == '':
+        return np.nan
+    try:
+        return np.float64(value)
+    except ValueError:
+        return value
+
+
+def iter_csv_rows(file: IO[str], follow: bool = False, poll_interval: float = 1.0, idle_timeout: Optional[float] = None) -> Iterator[dict]:
+    """
+    Yield the rows of a market CSV as dictionaries, as soon as each complete line is available.
+
+    :param file: An open text file or pipe, positioned at the header line.
+    :param follow: Keep waiting for new lines at the end of the file instead of stopping.
+    :param poll_interval: Seconds between checks for new lines when following.
+    :param idle_timeout: When following, stop after this many seconds without a new line.
+    """
+    header = None
+    partial_line = ''
+    idle_since = time.monotonic()
+
+    while True:
+        line = file.readline()
+        if not line or not line.endswith('\n'):
+            partial_line += line
+            if not follow or idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                # The file ended without a final newline: use the last line if it is complete.
+                values = next(csv.reader([partial_line])) if partial_line.strip() else []
+                if header is not None and len(values) == len(header):
+                    yield dict(zip(header, map(parse_field, values)))
+                return
+            time.sleep(poll_interval)
+            continue
+
+        line, partial_line = partial_line + line, ''
+        idle_since = time.monotonic()
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = values
+        else:
+            yield dict(zip(header, map(parse_field, values)))
+
+
+def stream_decisions(policy, rows: Iterable[Mapping], battery_environment: StreamingBatteryEnv) -> Iterator[dict]:
+    """
+    Run a policy over market rows as they arrive.
+
+    :param policy: A policy whose `load_historical` has already been called.
+    :param rows: The market data, one interval per row, in time order.
+    :param battery_environment: The environment the actions are applied in.
+    :return: An iterator with one decision per row: the action, the interval's timestamp and
+        price, the battery state after the interval and the time `act` took.
+    """
+    internal_state = battery_environment.initial_info()
+    for market_row in rows:
+        pv_power = float(market_row['pv_power'])
+
+        start = time.perf_counter_ns()
+        solar_kW_to_battery, charge_kW = policy.act(market_row, internal_state)
+        act_ns = time.perf_counter_ns() - start
+
+        internal_state = battery_environment.step_row(market_row, charge_kW, solar_kW_to_battery, pv_power)
+
+        yield {
+            'timestamp': market_row[TIMESTAMP_KEY],
+            'price': market_row[PRICE_KEY],
+            'solar_kW_to_battery': solar_kW_to_battery,
+            'charge_kW': charge_kW,
+            'total_profit': internal_state['total_profit'],
+            'profit_delta': internal_state['profit_delta'],
+            'battery_soc': internal_state['battery_soc'],
+            'act_us': act_ns / 1e3
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a policy on market data as it arrives, one interval at a time.')
+    parser.add_argument('--input', type=str, default='-', help='Market CSV to read rows from, or - for stdin.')
+    parser.add_argument('--follow', action='store_true', default=False, help='Keep waiting for rows appended to --input, like tail -f.')
+    parser.add_argument('--poll_interval', type=float, default=1.0, help='Seconds between checks for new rows with --follow.')
+    parser.add_argument('--idle_timeout', type=float, default=None, help='With --follow, stop after this many seconds without a new row.')
+    parser.add_argument('--history', type=str, default=None, help='Market CSV passed once to load_historical before the first row.')
+    parser.add_argument('--output_file', type=str, default=None, help='File to append the decisions to, one JSON line each (default: stdout).')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for randomness')
+    parser.add_argument('--class_name', type=str, help='Policy class name. If not provided, the config.json policy will be used.')
+    parser.add_argument('--param', action='append', help='Policy parameters as key=value pairs', default=[])
+    parser.add_argument('--initial_soc', type=float_or_none, help='Initial state of charge of the battery in kWh', default=None)
+    parser.add_argument('--initial_profit', type=float_or_none, help='Initial profit of the battery in $', default=None)
+
+    args = parser.parse_args()
+
+    if args.class_name:
+        policy_config = {'class_name': args.class_name, 'parameters': parse_parameters(args.param)}
+    else:
+        policy_config = load_config('bot/config.json')
+
+    set_seed(args.seed)
+    policy = policy_classes[policy_config['class_name']](**policy_config.get('parameters', {}))
+    policy.load_historical(load_market_data(args.history) if args.history else pd.DataFrame(columns=[TIMESTAMP_KEY, PRICE_KEY]))
+
+    battery_environment = StreamingBatteryEnv(
+        initial_charge_kWh=args.initial_soc if args.initial_soc is not None else DEFAULT_INITIAL_SOC,
+        initial_profit=args.initial_profit if args.initial_profit is not None else DEFAULT_INITIAL_PROFIT
+    )
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r')
+    output = open(args.output_file, 'a') if args.output_file else sys.stdout
+    try:
+        rows = iter_csv_rows(input_file, follow=args.follow, poll_interval=args.poll_interval, idle_timeout=args.idle_timeout)
+        for decision in stream_decisions(policy, rows, battery_environment):
+            output.write(json.dumps(decision) + '\n')
+            output.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output is not sys.stdout:
+            output.close()
+
+    print(f'{battery_environment.current_step} intervals, total profit ($): {battery_environment.total_profit:.2f}, battery SOC (kWh): {battery_environment.battery.state_of_charge_kWh:.2f}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
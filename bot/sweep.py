@@ -0,0 +1,140 @@
+"""
+Parameter sweep for a single policy class.
+
+Every combination of the given parameter values is evaluated with `fast_evaluate.evaluate_policy`
+over a process pool. The market data is read once in the parent and handed to each worker when
+it starts, and every run in that worker reuses the same column arrays. Policies with models (see
+`model_cache.py`) load them in the parent first, so the forked workers share them. The results
+are written as one table, ranked by score.
+
+Example:
+
+    python bot/sweep.py --class_name PV1AugmentedMovingAveragePolicy \
+        --grid window_size=100,250,500 --grid low_batt_threshold=0,0.1,0.2 \
+        --grid charge_scale_factor=0.5,1 --data bot/data/validation_data.csv
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+import pandas as pd
+
+from fast_environment import MarketArrays
+from fast_evaluate import DEFAULT_INITIAL_PROFIT, DEFAULT_INITIAL_SOC, evaluate_policy, parse_value
+from market_data import load_market_data
+from model_cache import warm_policy_models
+from policies import policy_classes
+
+# Set in every worker by `init_worker`.
+_historical_data = None
+_future_data = None
+
+
+def parse_grid(grid_args: List[str]) -> Dict[str, list]:
+    """
+    Parse `key=value1,value2,...` arguments into a parameter grid.
+    """
+    grid = {}
+    for item in grid_args:
+        key, values = item.split('=', 1)
+        grid[key] = [parse_value(value) for value in values.split(',')]
+    return grid
+
+
+def load_grid(file_path: str) -> Dict[str, list]:
+    """
+    Load a parameter grid from a JSON file mapping parameter names to lists of values.
+    """
+    with open(file_path, 'r') as file:
+        return json.load(file)
+
+
+def expand_grid(grid: Dict[str, list]) -> List[dict]:
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def init_worker(historical_data: pd.DataFrame, future_data: pd.DataFrame):
+    global _historical_data, _future_data
+    _historical_data = historical_data
+    _future_data = MarketArrays(future_data)
+
+
+def run_one(class_name: str, parameters: dict, initial_soc: float, initial_profit: float, seed: int) -> dict:
+    start = time.time()
+    row = {'parameters': parameters}
+    try:
+        result = evaluate_policy(policy_classes[class_name], parameters, _historical_data, _future_data, initial_soc, initial_profit, seed)
+        row.update(score=float(result['score']), mean_profit=result['mean_profit'], std_profit=result['std_profit'])
+    except Exception:
+        row.update(score=float('nan'), error=traceback.format_exc(limit=1).strip())
+    row['seconds_elapsed'] = time.time() - start
+    return row
+
+
+def run_sweep(class_name: str, grid: Dict[str, list], data: pd.DataFrame, present_index: int = 0, initial_soc: float = DEFAULT_INITIAL_SOC, initial_profit: float = DEFAULT_INITIAL_PROFIT, seed: int = 42, workers: int = None) -> pd.DataFrame:
+    """
+    Evaluate every combination in `grid` and rank the results.
+
+    :return: One row per parameter combination, best score first, with a column per parameter.
+    """
+    if class_name not in policy_classes:
+        raise KeyError(f'Unknown policy class {class_name!r}')
+    combinations = expand_grid(grid)
+    historical_data = data.iloc[:present_index]
+    future_data = data.iloc[present_index:]
+
+    # Load any models before the workers fork, so they share one copy
+    warm_policy_models(policy_classes[class_name], combinations)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(historical_data, future_data)) as executor:
+        futures = [executor.submit(run_one, class_name, parameters, initial_soc, initial_profit, seed) for parameters in combinations]
+        rows = [future.result() for future in futures]
+
+    results = pd.DataFrame([{**row.pop('parameters'), **row} for row in rows])
+    results = results.sort_values('score', ascending=False, na_position='last', kind='stable').reset_index(drop=True)
+    results.insert(0, 'rank', range(1, len(results) + 1))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate a policy over a grid of parameters.')
+    parser.add_argument('--class_name', type=str, required=True, help='Policy class name.')
+    parser.add_argument('--grid', action='append', default=[], help='Parameter values to sweep as key=value1,value2,... pairs')
+    parser.add_argument('--grid_file', type=str, default=None, help='JSON file mapping parameter names to lists of values.')
+    parser.add_argument('--data', type=str, default='bot/data/april15-may7_2023.csv', help='Path to the market data csv file')
+    parser.add_argument('--present_index', type=int, default=0, help='Index to split the historical data from the data which will be used for the evaluation.')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for randomness')
+    parser.add_argument('--initial_soc', type=float, default=DEFAULT_INITIAL_SOC, help='Initial state of charge of the battery in kWh')
+    parser.add_argument('--initial_profit', type=float, default=DEFAULT_INITIAL_PROFIT, help='Initial profit of the battery in $')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: one per CPU).')
+    parser.add_argument('--output_file', type=str, default=None, help='CSV file to save the ranked results to.')
+
+    args = parser.parse_args()
+
+    grid = load_grid(args.grid_file) if args.grid_file else {}
+    grid.update(parse_grid(args.grid))
+
+    start = time.time()
+    results = run_sweep(args.class_name, grid, load_market_data(args.data), args.present_index, args.initial_soc, args.initial_profit, args.seed, args.workers)
+
+    if args.output_file:
+        output_file = args.output_file
+    else:
+        results_dir = 'bot/results'
+        os.makedirs(results_dir, exist_ok=True)
+        output_file = os.path.join(results_dir, f'{datetime.now().strftime("%Y%m%d_%H%M%S")}_sweep_{args.class_name}.csv')
+    results.to_csv(output_file, index=False)
+
+    print(results.head(10).to_string(index=False))
+    print(f'{len(results)} runs in {time.time() - start:.1f}s, results saved to {output_file}')
+
+
+if __name__ == '__main__':
+    main()
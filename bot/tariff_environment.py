@@ -10,15 +10,27 @@ Units used in this file:
 - Price: dollars per kilowatt-hour ($/kWh)
 """
 
+import copy
 from collections import deque
 from typing import Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+try:
+    from market_time import time_arrays
+    from observations import RECORD, VIEW, InternalState, MarketRow, column_arrays
+    from tariff_schedule import DEFAULT_TARIFF, TariffSchedule
+except ImportError:  # imported as bot.tariff_environment, e.g. by the BGT gym environments
+    from bot.market_time import time_arrays
+    from bot.observations import RECORD, VIEW, InternalState, MarketRow, column_arrays
+    from bot.tariff_schedule import DEFAULT_TARIFF, TariffSchedule
+
 INTERVAL_DURATION = 5  # Duration of each dispatch interval in minutes
 PRICE_KEY = "price"
 TIMESTAMP_KEY = "timestamp"
+SERIES = "series"
+OBSERVATION_TYPES = (SERIES, RECORD, VIEW)
 
 
 def kWh_to_kW(kWh: float) -> float:
@@ -41,6 +53,13 @@ def kW_to_kWh(kWh: float) -> float:
     return kWh * (INTERVAL_DURATION / 60)
 
 
+def apply_adjustment(profit: float, adjustment: float) -> float:
+    """
+    Scale a profit by a tariff adjustment, e.g. -0.15 takes 15% off an export in either direction.
+    """
+    return profit + adjustment * abs(profit)
+
+
 class Battery:
     def __init__(
         self, capacity_kWh: float, max_charge_rate_kW: float, initial_charge_kWh: float
@@ -67,6 +86,12 @@ class Battery:
         self._state_of_charge_kWh = max(self._state_of_charge_kWh - kW_to_remove, 0)
         return kW_to_remove
 
+    def snapshot(self) -> float:
+        return self._state_of_charge_kWh
+
+    def restore(self, snapshot: float):
+        self._state_of_charge_kWh = snapshot
+
     @property
     def state_of_charge_kWh(self) -> float:
         return self._state_of_charge_kWh
@@ -75,6 +100,13 @@ class Battery:
 class BatteryEnv:
     """
     Environment for simulating battery operation in the National Electricity Market (NEM) context.
+
+    `observation_type` selects what the states handed to the policy are: "series" (the default)
+    returns `iloc` rows and dictionaries, "record" and "view" use the lightweight types from
+    observations.py.
+
+    `times` holds the timestamps as int64 epochs plus their NEM hour and day of the week
+    (`market_time.TimeArrays`), for code which needs the time of a step without parsing it.
     """
 
     def __init__(
@@ -84,33 +116,52 @@ class BatteryEnv:
         max_charge_rate_kW: float = 5,
         initial_charge_kWh: float = 7.5,
         initial_profit: float = 0.0,
+        tariff: Optional[TariffSchedule] = None,
+        observation_type: str = SERIES,
     ):
+        if observation_type not in OBSERVATION_TYPES:
+            raise ValueError(
+                f"observation_type must be one of {OBSERVATION_TYPES}, got {observation_type!r}"
+            )
         self.battery = Battery(capacity_kWh, max_charge_rate_kW, initial_charge_kWh)
         self.market_data = data
         self.total_profit = initial_profit
         self.current_step = 0
         self.episode_length = len(self.market_data)
+        self.prices = self.market_data[PRICE_KEY].to_numpy()
+
+        self.observation_type = observation_type
+        if observation_type != SERIES:
+            self.market_columns = column_arrays(self.market_data)
+            self._market_view = MarketRow(self.market_columns)
+            self._info_view = InternalState()
+
+        self.tariff = tariff if tariff is not None else DEFAULT_TARIFF
+        # Timestamps are parsed once here; steps only index the arrays derived from them.
+        self.times = time_arrays(self.market_data, self.tariff.utc_offset_hours)
+        self.import_adjustments, self.export_adjustments = self.tariff.compile_epochs(
+            self.times.epochs
+        )
 
     def initial_state(self):
         assert self.current_step == 0
 
-        return self.market_data.iloc[self.current_step], self.get_info(0)
+        return self.market_state(self.current_step), self.get_info(0)
 
     def step(
         self, charge_kW: float, solar_kW_to_battery: int, total_solar_kW: int
     ) -> Tuple[Optional[pd.Series], Optional[dict]]:
         if self.current_step >= len(self.market_data):
             return None, None
-        market_price_mWh = self.market_data.iloc[self.current_step][PRICE_KEY]
-        timestamp = self.market_data.iloc[self.current_step][TIMESTAMP_KEY]
+        market_price_mWh = self.prices[self.current_step]
 
         kW_currently_charging, solar_profit_delta = self.process_solar(
-            solar_kW_to_battery, total_solar_kW, market_price_mWh, timestamp
+            solar_kW_to_battery, total_solar_kW, market_price_mWh, self.current_step
         )
 
         max_charge_kW = self.battery.max_charge_rate_kW - kW_currently_charging
         battery_profit_delta = self.charge_discharge(
-            min(charge_kW, max_charge_kW), market_price_mWh, timestamp
+            min(charge_kW, max_charge_kW), market_price_mWh, self.current_step
         )
 
         external_state = self.get_info(battery_profit_delta + solar_profit_delta)
@@ -119,32 +170,58 @@ class BatteryEnv:
         if self.current_step >= len(self.market_data):
             return None, external_state
 
-        return self.market_data.iloc[self.current_step], external_state
+        return self.market_state(self.current_step), external_state
 
-    def with_tariff(self, profit, is_export, timestamp):
-        if isinstance(timestamp, str):
-            # timestamp is a UTC string make timestamp a pd.timestamp object then convert to EXACTLY +10, not dependent on any other timezone
-            utc_timestamp = pd.Timestamp(timestamp, tz="UTC")
-            plus_10 = pd.Timedelta(hours=10)
-            timestamp = utc_timestamp + plus_10
+    def snapshot(self) -> tuple:
+        """
+        Capture the mutable state of the environment: current step, total profit and battery SOC.
+        """
+        return self.current_step, self.total_profit, self.battery.snapshot()
 
-        is_peak = timestamp.hour >= 17 and timestamp.hour < 21
+    def restore(self, snapshot: tuple):
+        self.current_step, self.total_profit, state_of_charge_kWh = snapshot
+        self.battery.restore(state_of_charge_kWh)
 
+    def fork(self) -> "BatteryEnv":
+        """
+        Return an independent copy of the environment which shares the (read-only) market data
+        and tariff arrays.
+        """
+        forked = copy.copy(self)
+        forked.battery = copy.copy(self.battery)
+        if self.observation_type != SERIES:
+            forked._market_view = MarketRow(self.market_columns, self._market_view.index)
+            forked._info_view = InternalState()
+        return forked
+
+    def market_state(self, index: int):
+        if self.observation_type == SERIES:
+            return self.market_data.iloc[index]
+        if self.observation_type == RECORD:
+            return MarketRow(self.market_columns, index)
+        self._market_view.index = index
+        return self._market_view
+
+    def tariff_at(self, profit, is_export, step):
         if is_export:
-            if is_peak:
-                return profit + abs(profit * 0.30)
-            return profit - abs(profit * 0.15)
+            return apply_adjustment(profit, self.export_adjustments[step])
+        return apply_adjustment(profit, self.import_adjustments[step])
 
-        if is_peak:
-            return profit - abs(profit * 0.40)
-        return profit - abs(profit * 0.05)
+    def with_tariff(self, profit, is_export, timestamp):
+        """
+        Apply the tariff for a single timestamp. `step` uses the precomputed `tariff_at` instead.
+        """
+        import_adjustments, export_adjustments = self.tariff.compile([timestamp])
+        if is_export:
+            return apply_adjustment(profit, export_adjustments[0])
+        return apply_adjustment(profit, import_adjustments[0])
 
     def process_solar(
         self,
         solar_kW_to_battery: int,
         total_solar_kW: int,
         market_price_mWh: int,
-        timestamp,
+        step: int,
     ) -> Tuple[float, float]:
         solar_kW_to_battery = max(0, min(total_solar_kW, solar_kW_to_battery))
 
@@ -152,24 +229,22 @@ class BatteryEnv:
         kW_charging = kWh_to_kW(kWh_charged)
         energy_to_grid_kWh = kW_to_kWh(total_solar_kW) - kWh_charged
         profit = self.kWh_to_profit(energy_to_grid_kWh, market_price_mWh)
-        profit = self.with_tariff(profit, True, timestamp)
+        profit = self.tariff_at(profit, True, step)
 
         return kW_charging, profit
 
     def kWh_to_profit(self, energy_removed: float, spot_price_mWh: float) -> float:
         return round(energy_removed * spot_price_mWh / 1000, 4)
 
-    def charge_discharge(
-        self, charge_kW: float, spot_price_mWh: float, timestamp
-    ) -> float:
+    def charge_discharge(self, charge_kW: float, spot_price_mWh: float, step: int) -> float:
         if charge_kW > 0:
             kWh_to_battery = self.battery.charge_at(charge_kW)
             profit = -self.kWh_to_profit(kWh_to_battery, spot_price_mWh)
-            return self.with_tariff(profit, False, timestamp)
+            return self.tariff_at(profit, False, step)
         elif charge_kW < 0:
             kWh_to_grid = self.battery.discharge_at(-charge_kW)
             profit = self.kWh_to_profit(kWh_to_grid, spot_price_mWh)
-            return self.with_tariff(profit, True, timestamp)
+            return self.tariff_at(profit, True, step)
         return 0
 
     def get_info(self, profit_delta: float = 0) -> dict:
@@ -181,6 +256,15 @@ class BatteryEnv:
         """
         self.total_profit += profit_delta
         remaining_steps = len(self.market_data) - self.current_step - 1
+        if self.observation_type != SERIES:
+            info = self._info_view if self.observation_type == VIEW else InternalState()
+            return info.update(
+                self.total_profit,
+                profit_delta,
+                self.battery.state_of_charge_kWh,
+                self.battery.max_charge_rate_kW,
+                remaining_steps,
+            )
         return {
             "total_profit": self.total_profit,
             "profit_delta": profit_delta,
@@ -9,7 +9,11 @@ import json
 
 from policies import policy_classes
 from tariff_environment import BatteryEnv, PRICE_KEY, TIMESTAMP_KEY
+from market_data import load_market_data
+from rundown import run_down_battery
+from tariff_schedule import load_tariff
 from plotting import plot_results
+from trial_output import JSON, OUTPUT_FORMATS, write_trial
 
 def float_or_none(value):
     if value.lower() == 'none':
@@ -28,17 +32,6 @@ def set_seed(seed):
     random.seed(seed)
     np.random.seed(seed)
 
-def run_down_battery(battery_environment: BatteryEnv, market_prices):
-    last_day_prices = market_prices[-288:]
-    assumed_rundown_price = np.mean(last_day_prices)
-    rundown_profits = []
-    
-    while battery_environment.battery.state_of_charge_kWh > 0:
-        kWh_removed = battery_environment.battery.discharge_at(battery_environment.battery.max_charge_rate_kW)
-        rundown_profits.append(battery_environment.kWh_to_profit(kWh_removed, assumed_rundown_price))
-
-    return rundown_profits
-
 def run_trial(battery_environment: BatteryEnv, policy):
     profits, socs, market_prices, battery_actions, solar_actions, pv_inputs, timestamps = [], [], [], [], [], [], []
 
@@ -93,7 +86,7 @@ def perform_eval(args):
 
     policy_class = policy_classes[policy_config['class_name']]
     
-    external_states = pd.read_csv(args.data)
+    external_states = load_market_data(args.data)
     if args.output_file:
         output_file = args.output_file
     else:
@@ -110,10 +103,13 @@ def perform_eval(args):
     historical_data = external_states.iloc[:start_step]
     future_data = external_states.iloc[start_step:]
 
+    tariff = load_tariff(args.tariff) if getattr(args, 'tariff', None) else None
+
     battery_environment = BatteryEnv(
         data=future_data,
         initial_charge_kWh=initial_soc,
-        initial_profit=initial_profit
+        initial_profit=initial_profit,
+        tariff=tariff
     )
 
     policy = policy_class(**policy_config.get('parameters', {}))
@@ -141,8 +137,11 @@ def perform_eval(args):
     print(f'Average profit ($): {mean_profit:.2f} ± {std_profit:.2f}')
     print(f'Average profit inc rundown ($): {mean_combined_profit:.2f}')
 
-    with open(output_file, 'w') as file:
-        json.dump(outcome, file, indent=2)
+    if getattr(args, 'output_format', JSON) == JSON:
+        with open(output_file, 'w') as file:
+            json.dump(outcome, file, indent=2)
+    else:
+        write_trial(output_file, outcome)
 
     if args.plot:
         plot_results(trial_data['profits'], trial_data['market_prices'], trial_data['socs'], trial_data['actions'])
@@ -155,9 +154,11 @@ def main():
     parser.add_argument('--data', type=str, default='bot/data/april15-may7_2023.csv', help='Path to the market data csv file')
     parser.add_argument('--class_name', type=str, help='Policy class name. If not provided, the config.json policy will be used.')
     parser.add_argument('--output_file', type=str, help='File to save all the submission outputs to.', default=None)
+    parser.add_argument('--output_format', type=str, choices=OUTPUT_FORMATS, default=JSON, help='json writes everything to one JSON file. arrow writes the per-step series to an Arrow file next to a JSON summary.')
     parser.add_argument('--param', action='append', help='Policy parameters as key=value pairs', default=[])
     parser.add_argument('--initial_soc', type=float_or_none, help='Initial state of charge of the battery in kWh', default=None)
     parser.add_argument('--initial_profit', type=float_or_none, help='Initial profit of the battery in $', default=None)
+    parser.add_argument('--tariff', type=str, help='Path to a tariff schedule JSON file. If not provided, the default 17:00-21:00 peak tariff is used.', default=None)
 
     args = parser.parse_args()
 
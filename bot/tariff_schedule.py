@@ -0,0 +1,189 @@
+"""
+Time-of-use tariff schedules for `tariff_environment.BatteryEnv`.
+
+A schedule is a list of bands, each with a local time window, the days it applies on and an
+import and export adjustment. An adjustment scales the spot profit of a trade in either
+direction: `profit + adjustment * abs(profit)`, so -0.15 takes 15% off and 0.30 adds 30%.
+Intervals which match no band get the schedule's default adjustments, and when bands overlap the
+first matching band wins.
+
+`TariffSchedule.compile` turns a schedule into one import and one export adjustment per interval
+of the market data, which the environment then indexes by step.
+
+Schedules can be loaded from JSON, e.g.
+
+    {
+      "tariff": {
+        "utc_offset_hours": 10,
+        "default": {"import_adjustment": -0.05, "export_adjustment": -0.15},
+        "bands": [
+          {"name": "peak", "start": "17:00", "end": "21:00", "days": "weekdays",
+           "import_adjustment": -0.40, "export_adjustment": 0.30}
+        ]
+      }
+    }
+
+`days` is "all", "weekdays", "weekends" or a list of day names ("mon" ... "sun").
+"""
+
+import json
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from market_time import NEM_UTC_OFFSET_HOURS, epoch_seconds, local_calendar
+except ImportError:  # imported as bot.tariff_schedule, e.g. by the BGT gym environments
+    from bot.market_time import NEM_UTC_OFFSET_HOURS, epoch_seconds, local_calendar
+
+MINUTES_PER_DAY = 24 * 60
+DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+DAY_GROUPS = {
+    "all": DAY_NAMES,
+    "weekdays": DAY_NAMES[:5],
+    "weekends": DAY_NAMES[5:],
+}
+
+
+def parse_time_of_day(value: str) -> int:
+    """
+    Convert an "HH:MM" string into minutes since midnight. "24:00" is accepted as an end time.
+    """
+    try:
+        hours, minutes = (int(part) for part in value.split(":"))
+    except (AttributeError, ValueError):
+        raise ValueError(f"{value!r} is not a time of day in HH:MM format")
+    if not (0 <= minutes < 60 and 0 <= hours * 60 + minutes <= MINUTES_PER_DAY):
+        raise ValueError(f"{value!r} is not a time of day in HH:MM format")
+    return hours * 60 + minutes
+
+
+def parse_days(days: Union[str, Iterable[str]]) -> List[int]:
+    """
+    Convert a day group ("all", "weekdays", "weekends") or a list of day names into day numbers
+    (Monday is 0, like `pandas.Series.dt.dayofweek`).
+    """
+    if isinstance(days, str):
+        if days not in DAY_GROUPS:
+            raise ValueError(f"Unknown day group {days!r}, expected one of {sorted(DAY_GROUPS)}")
+        days = DAY_GROUPS[days]
+
+    day_numbers = []
+    for day in days:
+        if day not in DAY_NAMES:
+            raise ValueError(f"Unknown day {day!r}, expected one of {DAY_NAMES}")
+        day_numbers.append(DAY_NAMES.index(day))
+    return day_numbers
+
+
+class TariffBand:
+    """
+    A time-of-use window with its own import and export adjustments.
+
+    The window covers `start` up to but excluding `end` in local time, and wraps past midnight
+    when `end` is not after `start`.
+    """
+
+    def __init__(
+        self,
+        start: str,
+        end: str,
+        import_adjustment: float,
+        export_adjustment: float,
+        days: Union[str, Iterable[str]] = "all",
+        name: Optional[str] = None,
+    ):
+        self.start_minute = parse_time_of_day(start)
+        self.end_minute = parse_time_of_day(end)
+        self.import_adjustment = float(import_adjustment)
+        self.export_adjustment = float(export_adjustment)
+        self.days = parse_days(days)
+        self.name = name or f"{start}-{end}"
+
+    def matches(self, minutes: np.ndarray, weekdays: np.ndarray) -> np.ndarray:
+        """
+        :param minutes: Local minutes since midnight of every interval.
+        :param weekdays: Local day of the week of every interval (Monday is 0).
+        :return: A boolean array, True for the intervals inside this band.
+        """
+        if self.start_minute < self.end_minute:
+            in_window = (minutes >= self.start_minute) & (minutes < self.end_minute)
+        else:
+            in_window = (minutes >= self.start_minute) | (minutes < self.end_minute)
+        return in_window & np.isin(weekdays, self.days)
+
+
+class TariffSchedule:
+    """
+    A set of tariff bands plus the adjustments used outside all of them.
+    """
+
+    def __init__(
+        self,
+        bands: List[TariffBand],
+        default_import_adjustment: float = 0.0,
+        default_export_adjustment: float = 0.0,
+        utc_offset_hours: float = NEM_UTC_OFFSET_HOURS,
+    ):
+        self.bands = list(bands)
+        self.default_import_adjustment = float(default_import_adjustment)
+        self.default_export_adjustment = float(default_export_adjustment)
+        self.utc_offset_hours = utc_offset_hours
+
+    @classmethod
+    def from_config(cls, config: dict) -> "TariffSchedule":
+        """
+        Build a schedule from the contents of the "tariff" key of a tariff JSON file.
+        """
+        default = config.get("default", {})
+        bands = [TariffBand(**band) for band in config.get("bands", [])]
+        return cls(
+            bands,
+            default_import_adjustment=default.get("import_adjustment", 0.0),
+            default_export_adjustment=default.get("export_adjustment", 0.0),
+            utc_offset_hours=config.get("utc_offset_hours", NEM_UTC_OFFSET_HOURS),
+        )
+
+    def compile(self, timestamps) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Resolve the schedule for every interval of the market data.
+
+        :param timestamps: The timestamp column of the market data, in any format
+            `market_time.epoch_seconds` accepts.
+        :return: The import and export adjustment of every interval.
+        """
+        return self.compile_epochs(epoch_seconds(timestamps))
+
+    def compile_epochs(self, epochs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `compile` for timestamps already normalised to seconds since the Unix epoch.
+        """
+        minutes, weekdays = local_calendar(epochs, self.utc_offset_hours)
+
+        import_adjustments = np.full(len(minutes), self.default_import_adjustment)
+        export_adjustments = np.full(len(minutes), self.default_export_adjustment)
+        unassigned = np.ones(len(minutes), dtype=bool)
+        for band in self.bands:
+            in_band = band.matches(minutes, weekdays) & unassigned
+            import_adjustments[in_band] = band.import_adjustment
+            export_adjustments[in_band] = band.export_adjustment
+            unassigned &= ~in_band
+
+        return import_adjustments, export_adjustments
+
+
+def load_tariff(file_path: str) -> TariffSchedule:
+    with open(file_path, "r") as file:
+        return TariffSchedule.from_config(json.load(file)["tariff"])
+
+
+# The retail tariff the competition environment has always used: a 17:00-21:00 peak every day.
+DEFAULT_TARIFF = TariffSchedule(
+    [
+        TariffBand(
+            "17:00", "21:00", import_adjustment=-0.40, export_adjustment=0.30, name="peak"
+        )
+    ],
+    default_import_adjustment=-0.05,
+    default_export_adjustment=-0.15,
+)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from environment import BatteryEnv
+from batched_environment import BatchedBatteryEnv
+
+PATH_TO_DATA = 'bot/data/april15-may7_2023.csv'
+
+def test_batched_env_matches_scalar_envs():
+    data = pd.read_csv(PATH_TO_DATA).iloc[:2000]
+    capacities = np.array([13, 13, 5, 10000, 1])
+    max_rates = np.array([5, 2, 5, 5, 20])
+    initial_charges = np.array([7.5, 0, 13, 7.5, 0.3])
+
+    rng = np.random.default_rng(1)
+    charge_kW = rng.uniform(-7, 7, size=(len(data), len(capacities)))
+    solar_kW_to_battery = rng.uniform(-1, 6, size=(len(data), len(capacities)))
+    pv_kW = rng.uniform(0, 5, size=(len(data), len(capacities)))
+
+    batched = BatchedBatteryEnv(data, capacity_kWh=capacities, max_charge_rate_kW=max_rates, initial_charge_kWh=initial_charges)
+    batched.initial_state()
+    for i in range(len(data)):
+        state, info = batched.step(charge_kW[i], solar_kW_to_battery[i], pv_kW[i])
+
+    assert state is None
+    for j in range(len(capacities)):
+        env = BatteryEnv(data, capacity_kWh=capacities[j], max_charge_rate_kW=max_rates[j], initial_charge_kWh=initial_charges[j])
+        env.initial_state()
+        for i in range(len(data)):
+            env.step(charge_kW[i, j], solar_kW_to_battery[i, j], pv_kW[i, j])
+
+        assert info['total_profit'][j] == env.total_profit
+        assert info['battery_soc'][j] == env.battery.state_of_charge_kWh
+
+def test_batched_env_broadcasts_scalar_parameters():
+    data = pd.read_csv(PATH_TO_DATA)
+    batched = BatchedBatteryEnv(data, capacity_kWh=10000, max_charge_rate_kW=5, initial_charge_kWh=7.5, batch_size=3)
+    state, info = batched.initial_state()
+    state, info = batched.step(np.array([3, -3, 0]), 0, 0)
+
+    assert batched.batch_size == 3
+    assert list(info['battery_soc']) == [7.5 + 3 * 5 / 60, 7.25, 7.5]
+    assert list(info['profit_delta']) == [0.0117, -0.0117, 0]
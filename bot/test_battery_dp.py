@@ -0,0 +1,51 @@
+import itertools
+import numpy as np
+import pandas as pd
+from battery_dp import ShiftDP, backward_pass, forward_pass, shift_rewards, shifts_to_actions, tariff_shift_rewards
+from tariff_environment import BatteryEnv as TariffBatteryEnv
+from tariff_schedule import DEFAULT_TARIFF
+
+def test_backward_pass_matches_brute_force():
+    rng = np.random.default_rng(0)
+    prices = rng.normal(50, 80, size=6)
+    terminal_values = rng.uniform(0, 1, size=5)
+    rewards = shift_rewards(prices, step_kWh=0.5, steps_per_interval=2)
+
+    values, choices = backward_pass(rewards, terminal_values)
+
+    for initial_state in range(5):
+        best = -np.inf
+        for shifts in itertools.product(range(-2, 3), repeat=len(prices)):
+            states = initial_state + np.cumsum(shifts)
+            if np.all((states >= 0) & (states <= 4)):
+                best = max(best, sum(rewards[t, shift + 2] for t, shift in enumerate(shifts)) + terminal_values[states[-1]])
+        assert np.isclose(values[initial_state], best)
+        states = forward_pass(choices, initial_state)
+        shifts = np.diff(np.concatenate(([initial_state], states)))
+        assert np.isclose(sum(rewards[t, shift + 2] for t, shift in enumerate(shifts)) + terminal_values[states[-1]], best)
+
+def test_solver_reuses_buffers_for_shorter_horizons():
+    rng = np.random.default_rng(1)
+    rewards = shift_rewards(rng.normal(50, 80, size=30), step_kWh=0.5, steps_per_interval=3)
+    terminal_values = rng.uniform(0, 1, size=12)
+    solver = ShiftDP(12, 3, 30)
+
+    for horizon in [30, 10, 30]:
+        values, choices = solver.solve(rewards[:horizon], terminal_values)
+        expected_values, expected_choices = backward_pass(rewards[:horizon], terminal_values)
+        assert np.array_equal(values, expected_values)
+        assert np.array_equal(choices, expected_choices)
+
+def test_tariff_rewards_match_tariff_environment():
+    data = pd.read_csv('bot/data/validation_data.csv').iloc[:400]
+    data = data[data['pv_power'] > 1].iloc[::40]  # Daytime rows, inside and outside the peak
+    import_adjustments, export_adjustments = DEFAULT_TARIFF.compile(data['timestamp'])
+    step_kWh = 5 / 12 / 4
+    rewards = tariff_shift_rewards(data['price'], data['pv_power'], step_kWh, 4, import_adjustments, export_adjustments)
+
+    for t in range(len(data)):
+        for shift in range(-4, 5):
+            battery_environment = TariffBatteryEnv(data=data.iloc[t:t + 1])
+            solar_kW_to_battery, charge_kW = shifts_to_actions([shift * step_kWh], [data['pv_power'].iloc[t]])
+            _, internal_state = battery_environment.step(charge_kW[0], solar_kW_to_battery[0], data['pv_power'].iloc[t])
+            assert abs(internal_state['profit_delta'] - rewards[t, shift + 4]) < 2e-4
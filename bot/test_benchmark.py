@@ -0,0 +1,47 @@
+import pandas as pd
+from benchmark import bundled_data_files, compare, market_data, run_benchmarks, run_case
+
+def test_market_data_repeats_source():
+    source = pd.read_csv('bot/data/april_start.csv')
+    data = market_data(source, 3 * len(source) + 1)
+
+    assert len(data) == 3 * len(source) + 1
+    assert data['price'].tolist()[:2 * len(source)] == source['price'].tolist() * 2
+    timestamps = pd.to_datetime(data['timestamp'], utc=True)
+    assert (timestamps.diff().dropna() == pd.Timedelta(minutes=5)).all()
+
+def test_run_benchmarks_and_compare():
+    sources = {name: pd.read_csv(f'bot/data/{name}.csv') for name in ['validation_data', 'NEM_SA1_test_data']}
+    results = run_benchmarks(sources, [1000], max_seconds=0.1, kinds=['environment', 'policy'], name_filter='MovingAverage')
+
+    assert [(result['source'], result['name']) for result in results] == [(source, name) for source in sources for name in ['AugmentedMovingAveragePolicy', 'MovingAveragePolicy', 'PV1AugmentedMovingAveragePolicy']]
+    for result in results:
+        assert result['steps'] > 0 and result['steps_per_second'] > 0 and result['p99_us'] >= result['p50_us']
+        assert 0 < result['memory_steps'] <= result['steps']
+
+    slower = [dict(result, steps_per_second=result['steps_per_second'] * 2) for result in results]
+    assert compare(results, results, tolerance=0.25) == []
+    assert len(compare(results, slower, tolerance=0.25)) == 6
+
+def test_bundled_data_files():
+    assert 'bot/data/validation_data.csv' in bundled_data_files()
+
+def test_only_unavailable_cases_are_skipped():
+    def missing_model(data, n_steps, max_seconds):
+        raise FileNotFoundError('models/missing.zip')
+
+    def broken(data, n_steps, max_seconds):
+        raise ValueError('bad action')
+
+    def working(data, n_steps, max_seconds):
+        return [1000] * n_steps
+
+    data = pd.read_csv('bot/data/april_start.csv')
+    skipped, failed, ran = [run_case('policy', name, run, 'april_start', '1k', data, 1.0) for name, run in [('Missing', missing_model), ('Broken', broken), ('Working', working)]]
+    assert 'skipped' in skipped and 'failed' not in skipped
+    assert 'failed' in failed and 'skipped' not in failed
+
+    baseline = [dict(ran, name=name) for name in ['Missing', 'Broken', 'Working']]
+    regressions = compare([skipped, failed, ran], baseline, tolerance=0.25)
+    assert [regression.split(' on ')[0] for regression in regressions] == ['Missing', 'Broken']
+    assert compare([skipped, failed], [skipped, failed], tolerance=0.25) == []
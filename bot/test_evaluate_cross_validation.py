@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+from evaluate_cross_validation import Fold, cross_validate, make_folds
+from fast_evaluate import evaluate_policy
+from policies import policy_classes
+from tariff_environment import BatteryEnv
+
+def test_make_folds():
+    assert make_folds(100, 3, present_index=10) == [Fold(0, 10, 40), Fold(0, 40, 70), Fold(0, 70, 100)]
+    assert make_folds(100, 2, present_index=10, test_size=20, history_size=15) == [Fold(0, 10, 30), Fold(15, 30, 50)]
+    with pytest.raises(ValueError):
+        make_folds(100, 4, present_index=10, test_size=30)
+
+def test_folds_match_separate_evaluations():
+    data = pd.read_csv('bot/data/validation_data.csv').iloc[:1200]
+    policy_config = {'class_name': 'MovingAveragePolicy', 'parameters': {'window_size': 20}}
+    folds = make_folds(len(data), 3, present_index=300)
+    result = cross_validate(policy_config, data, folds, workers=1)
+
+    assert len(result['folds']) == 3
+    for fold, fold_result in zip(folds, result['folds']):
+        expected = evaluate_policy(policy_classes['MovingAveragePolicy'], {'window_size': 20}, data.iloc[:fold.present_index], data.iloc[fold.present_index:fold.end], environment_class=BatteryEnv)
+        assert fold_result['score'] == expected['score']
+    assert result['total_score'] == pytest.approx(sum(fold['score'] for fold in result['folds']))
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+from environment import BatteryEnv as DataFrameBatteryEnv
+from fast_environment import BatteryEnv, MarketArrays, replay_actions
+
+PATH_TO_DATA = 'bot/data/april15-may7_2023.csv'
+PATH_TO_VALIDATION_DATA = 'bot/data/validation_data.csv'
+
+def random_actions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    charge_kW = rng.uniform(-7, 7, size=n)
+    solar_kW_to_battery = rng.uniform(-1, 6, size=n)
+    return charge_kW, solar_kW_to_battery
+
+def test_fast_env_matches_dataframe_env():
+    for path in [PATH_TO_DATA, PATH_TO_VALIDATION_DATA]:
+        data = pd.read_csv(path)
+        charge_kW, solar_kW_to_battery = random_actions(len(data))
+
+        reference = DataFrameBatteryEnv(data=data)
+        fast = BatteryEnv(data=data)
+        ref_state, ref_info = reference.initial_state()
+        state, info = fast.initial_state()
+
+        for i in range(len(data)):
+            assert state['price'] == ref_state['price']
+            assert state['timestamp'] == ref_state['timestamp']
+            pv_power = float(ref_state['pv_power'])
+            assert float(state['pv_power']) == pv_power
+
+            ref_state, ref_info = reference.step(charge_kW[i], solar_kW_to_battery[i], pv_power)
+            state, info = fast.step(charge_kW[i], solar_kW_to_battery[i], pv_power)
+            assert info == ref_info
+            if ref_state is None:
+                break
+
+        assert state is None
+        assert fast.total_profit == reference.total_profit
+        assert fast.battery.state_of_charge_kWh == reference.battery.state_of_charge_kWh
+
+def test_fast_env_one_step():
+    data = pd.read_csv(PATH_TO_DATA)
+    battery_env = BatteryEnv(data=data, capacity_kWh=10000, max_charge_rate_kW=5,  initial_charge_kWh=7.5)
+    state, info = battery_env.initial_state()
+    state, info = battery_env.step(3, 0, 0)
+
+    assert info['battery_soc'] == 7.5 + 3 * 5 / 60
+    assert info['profit_delta'] == 0.0117
+
+def test_fast_env_shares_market_arrays():
+    market_arrays = MarketArrays(pd.read_csv(PATH_TO_DATA))
+    first = BatteryEnv(data=market_arrays)
+    second = BatteryEnv(data=market_arrays)
+
+    assert first.market_arrays is second.market_arrays
+    assert first.episode_length == len(market_arrays)
+
+def test_replay_actions_matches_stepping():
+    data = pd.read_csv(PATH_TO_VALIDATION_DATA)
+    charge_kW, solar_kW_to_battery = random_actions(len(data), seed=3)
+    charge_kW[::7] = 0
+
+    battery_env = BatteryEnv(data=data, initial_charge_kWh=2, initial_profit=1.5)
+    state, info = battery_env.initial_state()
+    socs, profit_deltas, profits = [], [], []
+    while state is not None:
+        i = battery_env.current_step
+        state, info = battery_env.step(charge_kW[i], solar_kW_to_battery[i], float(data['pv_power'].iloc[i]))
+        socs.append(info['battery_soc'])
+        profit_deltas.append(info['profit_delta'])
+        profits.append(info['total_profit'])
+
+    replay = replay_actions(data, solar_kW_to_battery, charge_kW, initial_charge_kWh=2, initial_profit=1.5)
+
+    assert replay['socs'].tolist() == socs
+    assert replay['profit_deltas'].tolist() == profit_deltas
+    assert replay['profits'].tolist() == profits
+
+def test_observation_types_match_dict_observations():
+    data = pd.read_csv(PATH_TO_DATA)
+    charge_kW, solar_kW_to_battery = random_actions(len(data), seed=5)
+    runs = {}
+    for observation_type in ['dict', 'record', 'view']:
+        battery_env = BatteryEnv(data=data, observation_type=observation_type)
+        state, info = battery_env.initial_state()
+        prices, infos = [], []
+        while state is not None:
+            i = battery_env.current_step
+            prices.append(state['price'])
+            state, info = battery_env.step(charge_kW[i], solar_kW_to_battery[i], float(state['pv_power']))
+            infos.append({key: info[key] for key in info.keys()})
+        runs[observation_type] = (prices, infos)
+
+    assert runs['record'] == runs['dict']
+    assert runs['view'] == runs['dict']
+
+def test_view_observations_are_reused():
+    battery_env = BatteryEnv(data=pd.read_csv(PATH_TO_DATA), observation_type='view')
+    first_state, first_info = battery_env.initial_state()
+    state, info = battery_env.step(1, 0, 0)
+
+    assert state is first_state and info is first_info
+    assert state['timestamp'] == '2023-04-15 00:10:00'
+    assert 'pv_power' in state and 'battery_soc' in info
+
+def test_snapshot_restore_replays_lookahead():
+    data = pd.read_csv(PATH_TO_DATA)
+    battery_env = BatteryEnv(data=data)
+    battery_env.initial_state()
+    for _ in range(100):
+        battery_env.step(-1, 0, 0)
+
+    snapshot = battery_env.snapshot()
+    for _ in range(12):
+        state, first_info = battery_env.step(5, 0, 0)
+    battery_env.restore(snapshot)
+
+    assert battery_env.snapshot() == snapshot
+    for _ in range(12):
+        state, second_info = battery_env.step(5, 0, 0)
+    assert second_info == first_info
+
+def test_fork_is_independent_and_shares_market_arrays():
+    battery_env = BatteryEnv(data=pd.read_csv(PATH_TO_DATA), observation_type='view')
+    battery_env.initial_state()
+    forked = battery_env.fork()
+    forked_state, forked_info = forked.step(5, 0, 0)
+
+    assert forked.market_arrays is battery_env.market_arrays
+    assert battery_env.current_step == 0
+    assert battery_env.battery.state_of_charge_kWh == 7.5
+    assert forked_info['battery_soc'] == 7.5 + 5 * 5 / 60
+
+    state, info = battery_env.step(-5, 0, 0)
+    assert forked_state['timestamp'] == state['timestamp']
+    assert forked_info['battery_soc'] == 7.5 + 5 * 5 / 60
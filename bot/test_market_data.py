@@ -0,0 +1,62 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+from market_data import TIME_FIELDS, cache_path, load_market_data, load_market_table
+
+DATA_PATHS = ['bot/data/validation_data.csv', 'bot/data/april15-may7_2023.csv']
+
+@pytest.mark.parametrize('path', DATA_PATHS)
+def test_cached_data_equals_csv(tmp_path, path):
+    expected = pd.read_csv(path)
+
+    first = load_market_data(path, cache_dir=str(tmp_path))
+    assert os.path.exists(cache_path(path, str(tmp_path)))
+    second = load_market_data(path, cache_dir=str(tmp_path))
+
+    assert first.equals(expected)
+    assert second.equals(expected)
+    assert (second.dtypes == expected.dtypes).all()
+
+def test_time_fields():
+    data = load_market_data('bot/data/validation_data.csv', time_fields=True)
+    timestamps = pd.to_datetime(data['timestamp'], utc=True)
+
+    assert list(data.columns[-len(TIME_FIELDS):]) == TIME_FIELDS
+    assert data['timestamp_epoch_s'].dtype == np.int64
+    assert np.array_equal(data['timestamp_epoch_s'], timestamps.astype('int64') // 10**9)
+    assert np.array_equal(data['hour'], timestamps.dt.hour)
+    assert np.array_equal(data['day_of_week'], timestamps.dt.dayofweek)
+    assert np.array_equal(data['local_hour'], (timestamps + pd.Timedelta(hours=10)).dt.hour)
+
+@pytest.mark.parametrize('path', ['bot/data/NEM_SA1_test_data.csv', 'bot/data/april15-may7_2023.csv'])
+def test_hours_follow_the_written_offset(tmp_path, path):
+    # NEM_SA1_test_data.csv is written in +10:00 and april15-may7_2023.csv is naive
+    data = load_market_data(path, cache_dir=str(tmp_path), time_fields=True)
+    timestamps = pd.to_datetime(data['timestamp'])
+
+    assert np.array_equal(data['hour'], timestamps.dt.hour)
+    assert np.array_equal(data['day_of_week'], timestamps.dt.dayofweek)
+    assert np.array_equal(data['timestamp_epoch_s'], pd.to_datetime(data['timestamp'], utc=True).astype('int64') // 10**9)
+    assert np.array_equal(data['local_hour'], (pd.to_datetime(data['timestamp'], utc=True) + pd.Timedelta(hours=10)).dt.hour)
+
+def test_cache_follows_file_contents(tmp_path):
+    path = str(tmp_path / 'market.csv')
+    shutil.copy('bot/data/april_start.csv', path)
+    first_cache = cache_path(path, str(tmp_path))
+    assert load_market_data(path, cache_dir=str(tmp_path))['price'].iloc[0] == pd.read_csv(path)['price'].iloc[0]
+
+    data = pd.read_csv(path)
+    data.loc[0, 'price'] = 12345.0
+    data.to_csv(path, index=False)
+
+    assert cache_path(path, str(tmp_path)) != first_cache
+    assert load_market_data(path, cache_dir=str(tmp_path))['price'].iloc[0] == 12345.0
+
+def test_table_columns_are_numpy_views(tmp_path):
+    table = load_market_table('bot/data/april_start.csv', cache_dir=str(tmp_path))
+    prices = table.column('price').to_numpy()
+
+    assert prices.dtype == np.float64
+    assert np.array_equal(prices, pd.read_csv('bot/data/april_start.csv')['price'])
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fast_environment import MarketArrays
+from market_data import load_market_data
+from market_time import TimeArrays, epoch_seconds, local_calendar, time_arrays, wall_clock_seconds
+from tariff_environment import BatteryEnv
+
+DATA_PATHS = ['bot/data/april15-may7_2023.csv', 'bot/data/validation_data.csv', 'bot/data/NEM_SA1_test_data.csv']
+
+@pytest.mark.parametrize('path', DATA_PATHS)
+def test_epochs_and_local_fields_match_pandas(path):
+    timestamps = pd.read_csv(path)['timestamp']
+    expected = pd.to_datetime(timestamps, utc=True)
+    local = expected + pd.Timedelta(hours=10)
+
+    times = TimeArrays(epoch_seconds(timestamps))
+
+    assert times.epochs.dtype == np.int64
+    assert np.array_equal(times.epochs, expected.astype('int64') // 10**9)
+    assert np.array_equal(times.local_hours, local.dt.hour)
+    assert np.array_equal(times.local_minutes, local.dt.hour * 60 + local.dt.minute)
+    assert np.array_equal(times.local_days_of_week, local.dt.dayofweek)
+
+def test_mixed_formats():
+    # The same instant written the way each bundled dataset writes it
+    timestamps = ['2024-04-02 07:00:00', '2024-04-02 07:00:00+00:00', '2024-04-02 17:00:00+10:00', '2024-04-02T07:00:00Z']
+    assert epoch_seconds(timestamps).tolist() == [1712041200] * 4
+    assert epoch_seconds(list(reversed(timestamps))).tolist() == [1712041200] * 4
+
+def test_wall_clock_keeps_the_written_offset():
+    timestamps = ['2024-04-02 07:00:00', '2024-04-02 17:00:00+10:00']
+    minutes, _ = local_calendar(wall_clock_seconds(timestamps), 0)
+    assert minutes.tolist() == [7 * 60, 17 * 60]
+    assert wall_clock_seconds(pd.to_datetime(timestamps[1:])).tolist() == wall_clock_seconds(timestamps[1:]).tolist()
+
+def test_datetime_columns():
+    naive = pd.to_datetime(pd.Series(['2024-04-02 07:00:00']))
+    aware = pd.to_datetime(pd.Series(['2024-04-02 17:00:00+10:00']))
+    assert epoch_seconds(naive).tolist() == epoch_seconds(aware).tolist() == [1712041200]
+
+def test_local_calendar_with_fractional_offset():
+    minutes, days_of_week = local_calendar(epoch_seconds(['2024-04-07 14:45:00']), utc_offset_hours=9.5)
+    assert minutes.tolist() == [15]  # 00:15 on Monday the 8th
+    assert days_of_week.tolist() == [0]
+
+def test_environments_share_normalised_times():
+    cached = load_market_data('bot/data/validation_data.csv', time_fields=True)
+    parsed = time_arrays(pd.read_csv('bot/data/validation_data.csv'))
+
+    for times in [time_arrays(cached), BatteryEnv(data=cached).times, MarketArrays(cached).times]:
+        assert np.array_equal(times.epochs, parsed.epochs)
+        assert np.array_equal(times.local_hours, parsed.local_hours)
+        assert np.array_equal(times.local_days_of_week, parsed.local_days_of_week)
@@ -0,0 +1,56 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from model_cache import ModelCache, model_cache, warm_policy_models
+from policies import policy_classes
+
+def write_model(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+def test_cache_reloads_changed_files_and_evicts_least_recent(tmp_path):
+    loads = []
+    def loader(path):
+        loads.append(path)
+        with open(path) as file:
+            return file.read()
+
+    cache = ModelCache(max_entries=2)
+    a = write_model(tmp_path / 'a', 'a1', 10**18)
+    b = write_model(tmp_path / 'b', 'b1', 10**18)
+    assert cache.get(a, loader) == 'a1' and cache.get(a, loader) == 'a1'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    write_model(tmp_path / 'a', 'a2', 2 * 10**18)
+    assert cache.get(a, loader) == 'a2'
+    assert len(cache) == 1  # The old version is dropped
+
+    cache.get(b, loader)
+    cache.get(a, loader)
+    c = write_model(tmp_path / 'c', 'c1', 10**18)
+    cache.get(c, loader)
+    assert a in cache and c in cache and b not in cache
+    assert len(loads) == 4
+
+def test_policies_share_loaded_models():
+    first = policy_classes['RlNumpyPolicy']()
+    second = policy_classes['RlNumpyPolicy']()
+    assert first.actor is second.actor
+
+def cache_misses_after_construction(class_name):
+    policy_classes[class_name]()
+    return model_cache.misses
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='needs fork')
+def test_forked_workers_inherit_warmed_models():
+    if multiprocessing.get_start_method() != 'fork':
+        pytest.skip('pools do not fork by default')
+    model_cache.clear()
+    warm_policy_models(policy_classes['RlNumpyPolicy'], [{}, {}])
+    assert model_cache.misses == 1
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        misses = list(executor.map(cache_misses_after_construction, ['RlNumpyPolicy'] * 4))
+    assert misses == [1] * 4  # Only the parent's load
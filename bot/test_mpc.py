@@ -0,0 +1,69 @@
+import time
+import numpy as np
+import pandas as pd
+from fast_environment import BatteryEnv
+from fast_evaluate import evaluate_policy
+from policies import policy_classes
+from policies.mpc import SlotProfile
+
+def run_policy(policy, data):
+    battery_environment = BatteryEnv(data)
+    latencies = []
+    external_state, internal_state = battery_environment.initial_state()
+    while external_state is not None:
+        start = time.perf_counter()
+        solar_kW_to_battery, charge_kW = policy.act(external_state, internal_state)
+        latencies.append(time.perf_counter() - start)
+        external_state, internal_state = battery_environment.step(charge_kW, solar_kW_to_battery, float(external_state['pv_power']))
+    return latencies
+
+def test_slot_profile_averages_last_days():
+    profile = SlotProfile(days=2)
+    for value in [1.0, 2.0, 4.0]:
+        profile.update(5, value)
+    profile.update(6, np.nan)
+
+    means = profile.means(fill_value=-1.0)
+    assert means[5] == 3.0
+    assert means[6] == -1.0
+
+def test_pv_forecast_follows_forecast_columns():
+    policy = policy_classes['MpcPolicy'](tariff='default')
+    for _ in range(7):
+        for slot in range(288):
+            policy.pv_profile.update(slot, 1.0)
+    external_state = {'pv_power_forecast_1h': 3.0, 'pv_power_forecast_2h': 4.0, 'pv_power_forecast_24h': 6.0}
+
+    forecast = policy.forecast_pv(2.0, external_state, slot=0, horizon=288)
+    assert forecast[[0, 12, 24, 156]].tolist() == [2.0, 3.0, 4.0, 5.0]
+
+    forecast = policy.forecast_pv(2.0, {'pv_power_forecast_1h': 3.0}, slot=0, horizon=288)
+    assert forecast[[0, 12, 13, 287]].tolist() == [2.0, 3.0, 1.0, 1.0]  # The profile after the last forecast
+
+def test_decisions_are_fast():
+    data = pd.read_csv('bot/data/validation_data.csv')
+    policy = policy_classes['MpcPolicy']()
+    policy.load_historical(data.iloc[:2016])
+
+    latencies = run_policy(policy, data.iloc[2016:2316])
+    assert np.mean(latencies) < 0.05
+
+def test_resolve_every_reuses_plans():
+    data = pd.read_csv('bot/data/validation_data.csv')
+    policy = policy_classes['MpcPolicy'](resolve_every=6)
+    policy.load_historical(data.iloc[:2016])
+    solves = []
+    solve = policy.solve
+    policy.solve = lambda *args: solves.append(1) or solve(*args)
+
+    run_policy(policy, data.iloc[2016:2316])
+    # Every 6 intervals, plus once more when the end comes into the horizon
+    assert len(solves) == 300 // 6 + 1
+
+def test_mpc_beats_moving_average():
+    data = pd.read_csv('bot/data/april15-may7_2023.csv')
+    historical_data, future_data = data.iloc[:2016], data.iloc[2016:3500]
+
+    mpc_score = evaluate_policy(policy_classes['MpcPolicy'], {}, historical_data, future_data)['score']
+    moving_average_score = evaluate_policy(policy_classes['MovingAveragePolicy'], {}, historical_data, future_data)['score']
+    assert mpc_score > moving_average_score
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from numpy_actor import NumpyActor
+
+def test_actor_round_trips(tmp_path):
+    rng = np.random.default_rng(0)
+    actor = NumpyActor([rng.normal(size=(3, 8)), rng.normal(size=(8, 2))], [rng.normal(size=8), rng.normal(size=2)], ['relu', 'identity'], [-1, -1], [1, 1])
+    actor.save(tmp_path / 'actor.npz')
+    loaded = NumpyActor.load(tmp_path / 'actor.npz')
+
+    observations = rng.normal(size=(50, 3))
+    expected = np.clip(np.maximum(observations @ actor.weights[0] + actor.biases[0], 0) @ actor.weights[1] + actor.biases[1], -1, 1)
+    assert np.allclose(loaded.predict(observations), expected, atol=1e-5)
+    assert np.array_equal(loaded.predict(observations[0]), loaded.predict(observations)[0])
+
+def test_exported_actor_matches_deterministic_predict(tmp_path):
+    pytest.importorskip('stable_baselines3')
+    from numpy_actor import export_actor, load_model
+
+    for model_path in ['bot/models/spot_soc_pv/PPOv2_step29M.zip', 'bot/models/spot_soc_pv/A2C1x100k_steps.zip']:
+        actor = NumpyActor.load(export_actor(model_path, str(tmp_path / 'actor.npz')))
+        model = load_model(model_path)
+        # Includes observations outside the observation space, where actions get clipped
+        observations = np.random.default_rng(0).uniform([-1.5, -0.2, -0.2], [1.5, 1.2, 1.2], size=(500, 3)).astype(np.float32)
+        expected, _ = model.predict(observations, deterministic=True)
+        assert np.allclose(actor.predict(observations), expected, atol=1e-5)
+
+def test_numpy_policy_acts_without_torch():
+    code = ("import sys; import pandas as pd; from policies import policy_classes; policy = policy_classes['RlNumpyPolicy'](); "
+            "action = policy.act(pd.Series({'price': 300.0, 'pv_power': 2.0}), {'battery_soc': 6.5}); "
+            "print(len(action), 'torch' in sys.modules, 'stable_baselines3' in sys.modules)")
+    output = subprocess.run([sys.executable, '-c', code], cwd='bot', capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '2 False False'
+
+def test_numpy_policy_matches_ppo_policy():
+    pytest.importorskip('stable_baselines3')
+    from policies import policy_classes
+
+    numpy_policy = policy_classes['RlNumpyPolicy']()
+    ppo_policy = policy_classes['RlPpo2Policy']()
+    data = pd.read_csv('bot/data/validation_data.csv').iloc[:200]
+    for (_, external_state), battery_soc in zip(data.iterrows(), np.linspace(0, 13, len(data))):
+        observation = np.array([np.clip((external_state['price'] - 160) / 3 * 680, -1, 1), battery_soc / 13, min(external_state['pv_power'] / 10, 1)], dtype=np.float32)
+        expected, _ = ppo_policy.rlpolicy.predict(observation, deterministic=True)
+        assert np.allclose(numpy_policy.act(external_state, {'battery_soc': battery_soc}), (expected[0] * 5, expected[1] * 5), atol=1e-4)
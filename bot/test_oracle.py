@@ -0,0 +1,25 @@
+import pandas as pd
+from fast_environment import BatteryEnv
+from fast_evaluate import evaluate_policy, summarise_trial
+from oracle import oracle_trial
+from policies import policy_classes
+
+def test_oracle_schedule_replays_in_environment():
+    data = pd.read_csv('bot/data/validation_data.csv').iloc[:2000]
+    trial = oracle_trial(data)
+
+    battery_environment = BatteryEnv(data)
+    profits = []
+    for solar_kW_to_battery, charge_kW, pv_power in zip(trial['solar_actions'], trial['actions'], data['pv_power']):
+        _, internal_state = battery_environment.step(charge_kW, solar_kW_to_battery, pv_power)
+        profits.append(internal_state['total_profit'])
+
+    assert profits == trial['profits']
+    assert abs(summarise_trial(trial)['score'] - trial['planned_value']) < 0.05
+
+def test_oracle_beats_policies():
+    data = pd.read_csv('bot/data/april15-may7_2023.csv')
+    oracle_score = summarise_trial(oracle_trial(data.iloc[300:]))['score']
+
+    for class_name in ['MovingAveragePolicy', 'AugmentedMovingAveragePolicy']:
+        assert evaluate_policy(policy_classes[class_name], {}, data.iloc[:300], data.iloc[300:])['score'] <= oracle_score
@@ -0,0 +1,20 @@
+import subprocess
+import sys
+from policies import load_policies, policy_classes
+from policies.policy import Policy
+
+def test_registry_lists_every_policy():
+    assert set(policy_classes) == {'AugmentedMovingAveragePolicy', 'HistoricalPricePolicy', 'MovingAveragePolicy', 'MpcPolicy', 'PV1AugmentedMovingAveragePolicy', 'RandomPolicy', 'RlNumpyPolicy', 'RlPpo2Policy', 'SimplePolicy'}
+    assert 'MovingAveragePolicy' in policy_classes and 'Policy' not in policy_classes
+
+def test_registry_imports_on_lookup():
+    registry = load_policies()
+    assert registry.loaded() == []
+    policy_class = registry['SimplePolicy']
+    assert issubclass(policy_class, Policy) and policy_class.__name__ == 'SimplePolicy'
+    assert registry.loaded() == ['SimplePolicy']
+
+def test_lookup_does_not_import_other_policies():
+    code = "import sys; from policies import policy_classes; policy_classes['MovingAveragePolicy']; print('stable_baselines3' in sys.modules, 'policies.rl_ppo2' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code], cwd='bot', capture_output=True, text=True, check=True).stdout
+    assert output.strip() == 'False False'
@@ -0,0 +1,48 @@
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from fast_evaluate import evaluate_policy, perform_eval
+from policies import policy_classes
+from profiling import HISTOGRAM_EDGES_US, PhaseTimer, cprofile_run
+import pstats
+
+def test_profiled_trial_matches_unprofiled(tmp_path):
+    data = pd.read_csv('bot/data/validation_data.csv').iloc[:2000]
+    policy_class = policy_classes['MovingAveragePolicy']
+    expected = evaluate_policy(policy_class, {}, data.iloc[:300], data.iloc[300:])
+
+    timer = PhaseTimer()
+    result = cprofile_run(evaluate_policy, str(tmp_path / 'run.prof'), policy_class, {}, data.iloc[:300], data.iloc[300:], timer=timer)
+
+    assert result['main_trial'] == expected['main_trial']
+    summary = timer.summary()
+    assert list(summary['phases']) == ['setup', 'act', 'step', 'bookkeeping', 'rundown']
+    for phase in ['act', 'step', 'bookkeeping']:
+        stats = summary['phases'][phase]
+        assert stats['count'] == 1700
+        assert sum(stats['histogram']['counts']) == 1700
+        assert len(stats['histogram']['counts']) == len(HISTOGRAM_EDGES_US) + 1
+        assert stats['p50_us'] <= stats['p99_us'] <= stats['max_us']
+    assert np.isclose(summary['total_seconds'], sum(stats['total_seconds'] for stats in summary['phases'].values()))
+    assert pstats.Stats(str(tmp_path / 'run.prof')).total_calls > 0
+
+def test_streamed_trial_can_be_profiled(tmp_path):
+    data = pd.read_csv('bot/data/validation_data.csv').iloc[:2000]
+    policy_class = policy_classes['MovingAveragePolicy']
+    expected = evaluate_policy(policy_class, {}, data.iloc[:300], data.iloc[300:], stream=True)
+
+    timer = PhaseTimer()
+    result = evaluate_policy(policy_class, {}, data.iloc[:300], data.iloc[300:], stream=True, timer=timer)
+
+    assert result['score'] == expected['score']
+    assert list(timer.summary()['phases']) == ['setup', 'act', 'step', 'bookkeeping', 'rundown']
+    assert timer.summary()['phases']['act']['count'] == 1700
+
+    args = argparse.Namespace(class_name='MovingAveragePolicy', param=[], seed=42, data='bot/data/april_next.csv', output_file=str(tmp_path / 'stream.json'),
+                              output_format='json', plot=False, present_index=0, initial_soc=None, initial_profit=None, stream=True, chunk_size=8192,
+                              profile=True, cprofile=str(tmp_path / 'stream.prof'))
+    perform_eval(args)
+    with open(tmp_path / 'stream.json', 'r') as file:
+        assert 'act' in json.load(file)['profile']['phases']
+    assert pstats.Stats(str(tmp_path / 'stream.prof')).total_calls > 0
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import pandas as pd
+from policies import policy_classes
+from policies.policy import Policy
+from realtime import RealtimeRunner, stream_reader_source, thread_source
+from stream import StreamingBatteryEnv, iter_csv_rows, stream_decisions
+
+class BlockingPolicy(Policy):
+    """Charges at full rate, but blocks on the rows in `blocked` until `release` is set."""
+    def __init__(self, blocked):
+        super().__init__()
+        self.blocked = set(blocked)
+        self.release = threading.Event()
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    def act(self, external_state, internal_state):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        if self.calls in self.blocked:
+            self.release.wait(timeout=60)
+        self.calls += 1
+        self.active -= 1
+        return 0, 5
+
+    def load_historical(self, external_states):
+        pass
+
+def market_rows(n):
+    with open('bot/data/april15-may7_2023.csv', 'r') as file:
+        rows = iter_csv_rows(file)
+        return [next(rows) for _ in range(n)]
+
+async def release_before(rows, runner, release_at):
+    """Yields `rows`, but before row `release_at` releases the blocked policy and waits for the late call to finish."""
+    for i, row in enumerate(rows):
+        if i == release_at:
+            runner.policy.release.set()
+            await asyncio.wait({runner._pending})
+        yield row
+
+def test_fast_policy_matches_stream():
+    rows = market_rows(500)
+    expected = list(stream_decisions(policy_classes['MovingAveragePolicy'](), rows, StreamingBatteryEnv()))
+
+    decisions = []
+    runner = RealtimeRunner(policy_classes['MovingAveragePolicy'](), StreamingBatteryEnv(), deadline_seconds=5)
+    asyncio.run(runner.run(thread_source(rows), decisions.append))
+
+    assert [decision['total_profit'] for decision in decisions] == [decision['total_profit'] for decision in expected]
+    assert all(decision['decided_by'] == 'policy' for decision in decisions)
+    assert runner.metrics.to_dict()['missed_deadlines'] == 0 and runner.metrics.act_latency_ms.count == 500
+
+def test_late_policy_falls_back_without_concurrent_calls():
+    policy = BlockingPolicy([1])
+    decisions = []
+    runner = RealtimeRunner(policy, StreamingBatteryEnv(), deadline_seconds=0.05, fallback_action=(0, -1))
+    asyncio.run(runner.run(release_before(market_rows(5), runner, 3), decisions.append))
+
+    assert [decision['decided_by'] for decision in decisions] == ['policy', 'deadline', 'busy', 'policy', 'policy']
+    assert [decision['charge_kW'] for decision in decisions] == [5, -1, -1, 5, 5]
+    assert policy.max_active == 1 and policy.calls == 4
+    metrics = runner.metrics.to_dict()
+    assert (metrics['intervals'], metrics['missed_deadlines'], metrics['busy_intervals']) == (5, 1, 1)
+    assert metrics['fallback_rate'] == 0.4
+
+def test_stream_reader_source():
+    async def read():
+        reader = asyncio.StreamReader()
+        with open('bot/data/april_start.csv', 'rb') as file:
+            reader.feed_data(file.read())
+        reader.feed_eof()
+        return [row async for row in stream_reader_source(reader)]
+
+    rows = asyncio.run(read())
+    data = pd.read_csv('bot/data/april_start.csv')
+    assert [row['price'] for row in rows] == data['price'].tolist()
+    assert [row['timestamp'] for row in rows] == data['timestamp'].tolist()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from policies import policy_classes
+from policies.rolling_stats import RollingWindow
+
+QUANTILES = (0, 0.1, 0.5, 0.9, 1)
+
+@pytest.mark.parametrize('size', [1, 2, 5, 250])
+def test_window_matches_numpy(size):
+    rng = np.random.default_rng(size)
+    values = np.round(rng.normal(50, 100, size=2000))  # Rounded, so that values repeat
+    window = RollingWindow(size, quantiles=QUANTILES)
+
+    for i, value in enumerate(values):
+        window.append(value)
+        expected = values[max(0, i - size + 1):i + 1]
+        assert list(window) == list(expected)
+        assert window.min == expected.min() and window.max == expected.max()
+        assert np.isclose(window.mean, np.mean(expected), rtol=1e-12, atol=1e-12)
+        assert np.isclose(window.variance, np.var(expected), rtol=1e-9, atol=1e-9)
+        for q in QUANTILES:
+            assert np.isclose(window.quantile(q), np.quantile(expected, q), rtol=1e-12, atol=1e-9)
+
+def test_mean_does_not_drift():
+    rng = np.random.default_rng(0)
+    values = np.concatenate((rng.normal(1e6, 1, size=100000), rng.normal(0, 1e-3, size=10)))
+    window = RollingWindow(10)
+    window.extend(values)
+    assert abs(window.mean - np.mean(values[-10:])) < 1e-15
+
+def test_untracked_quantile_raises():
+    window = RollingWindow(3, quantiles=(0.5,))
+    window.extend([1, 2, 3])
+    assert window.quantile(0.5) == 2
+    with pytest.raises(ValueError):
+        window.quantile(0.25)
+
+@pytest.mark.parametrize('class_name', ['MovingAveragePolicy', 'AugmentedMovingAveragePolicy', 'PV1AugmentedMovingAveragePolicy'])
+def test_policies_keep_numpy_decisions(class_name):
+    data = pd.read_csv('bot/data/april15-may7_2023.csv').iloc[:3000]
+    policy = policy_classes[class_name]()
+    policy.load_historical(data.iloc[:100])
+
+    for _, external_state in data.iloc[100:].iterrows():
+        internal_state = {'max_charge_rate': 5, 'battery_soc': 6.5}
+        policy.act(external_state, internal_state)
+        if len(policy.price_history) == policy.window_size:
+            # Decisions compare the price with the mean, so the two must agree on that
+            price = external_state['price']
+            assert (price > policy.price_history.mean) == (price > np.mean(list(policy.price_history)))
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from environment import BatteryEnv
+from fast_environment import BatteryEnv as FastBatteryEnv
+from rundown import run_down_battery, rundown_values
+
+def reference_run_down_battery(battery_environment, market_prices):
+    last_day_prices = market_prices[-288:]
+    assumed_rundown_price = np.mean(last_day_prices)
+    rundown_profits = []
+
+    while battery_environment.battery.state_of_charge_kWh > 0:
+        kWh_removed = battery_environment.battery.discharge_at(battery_environment.battery.max_charge_rate_kW)
+        rundown_profits.append(battery_environment.kWh_to_profit(kWh_removed, assumed_rundown_price))
+
+    return rundown_profits
+
+def test_run_down_battery_matches_interval_loop():
+    rng = np.random.default_rng(0)
+    data = pd.read_csv('bot/data/april_start.csv')
+    market_prices = list(pd.read_csv('bot/data/validation_data.csv')['price'])
+    for initial_charge_kWh in list(rng.uniform(0, 13, size=200)) + [0, 13, 5 / 12, 10 / 12, 305]:
+        for max_charge_rate_kW in [5, 2.5, 20, 0.7]:
+            expected_env = BatteryEnv(data='bot/train.csv', capacity_kWh=1000, initial_charge_kWh=initial_charge_kWh, max_charge_rate_kW=max_charge_rate_kW)
+            battery_env = FastBatteryEnv(data, capacity_kWh=1000, initial_charge_kWh=initial_charge_kWh, max_charge_rate_kW=max_charge_rate_kW)
+            expected = reference_run_down_battery(expected_env, market_prices)
+
+            assert run_down_battery(battery_env, market_prices) == expected
+            assert battery_env.battery.state_of_charge_kWh == 0
+
+def test_rundown_values_match_run_down_battery():
+    data = pd.read_csv('bot/data/april_start.csv')
+    socs = np.linspace(0, 13, 1001)
+    market_prices = [42.0, 95.3, 120.25]
+    values = rundown_values(socs, 5, np.mean(market_prices))
+
+    for soc, value in zip(socs, values):
+        battery_env = FastBatteryEnv(data, initial_charge_kWh=soc)
+        assert np.isclose(value, np.sum(run_down_battery(battery_env, market_prices)), rtol=0, atol=1e-9)
+
+def test_full_battery_is_emptied_in_one_call(monkeypatch):
+    battery_env = FastBatteryEnv(pd.read_csv('bot/data/april_start.csv'), capacity_kWh=1000, initial_charge_kWh=1000)
+    calls = []
+    monkeypatch.setattr(battery_env.battery, 'discharge_at', lambda kW: calls.append(('discharge_at', kW)))
+    restore = battery_env.battery.restore
+    monkeypatch.setattr(battery_env.battery, 'restore', lambda snapshot: (calls.append(('restore', snapshot)), restore(snapshot)))
+
+    expected = reference_run_down_battery(BatteryEnv(data='bot/train.csv', capacity_kWh=1000, initial_charge_kWh=1000), [100.0])
+    assert run_down_battery(battery_env, [100.0]) == expected and len(expected) > 2000
+    assert calls == [('restore', 0.0)]
+    assert battery_env.battery.state_of_charge_kWh == 0
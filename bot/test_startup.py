@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+import time
+import pytest
+
+# pyarrow is not listed: pandas imports it itself.
+HEAVY_MODULES = ['matplotlib', 'torch', 'stable_baselines3', 'gymnasium']
+# Cold start of `python bot/evaluate.py --class_name SimplePolicy`, including the evaluation itself.
+# Around 0.7s when nothing heavy is imported; matplotlib or torch alone push it past this.
+EVALUATE_BUDGET_SECONDS = float(os.environ.get('EVALUATE_BUDGET_SECONDS', 3.0))
+
+@pytest.mark.parametrize('module', ['evaluate', 'fast_evaluate', 'tariff_evaluate', 'evaluate_cross_validation', 'sweep'])
+def test_entry_points_do_not_import_heavy_modules(module):
+    code = f"import sys, {module}; from policies import policy_classes; policy_classes['SimplePolicy']; print(' '.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', code], cwd='bot', capture_output=True, text=True, check=True).stdout
+    assert output.strip() == ''
+
+def test_evaluate_cold_start_budget(tmp_path):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'bot/evaluate.py', '--class_name', 'SimplePolicy', '--output_file', str(tmp_path / 'out.json')], capture_output=True, check=True)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < EVALUATE_BUDGET_SECONDS, f'evaluate.py took {elapsed:.2f}s, over the {EVALUATE_BUDGET_SECONDS}s budget'
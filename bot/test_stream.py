@@ -0,0 +1,69 @@
+import io
+import json
+import subprocess
+import sys
+import threading
+import time
+import pandas as pd
+from fast_evaluate import evaluate_policy
+from policies import policy_classes
+from stream import StreamingBatteryEnv, iter_csv_rows, stream_decisions
+
+def test_stream_matches_evaluation():
+    data = pd.read_csv('bot/data/validation_data.csv')
+    policy_class = policy_classes['PV1AugmentedMovingAveragePolicy']
+    expected = evaluate_policy(policy_class, {}, data.iloc[:300], data.iloc[300:])['main_trial']
+
+    policy = policy_class()
+    policy.load_historical(data.iloc[:300])
+    with open('bot/data/validation_data.csv', 'r') as file:
+        rows = iter_csv_rows(file)
+        history = [next(rows) for _ in range(300)]
+        decisions = list(stream_decisions(policy, rows, StreamingBatteryEnv(expected_steps=len(data) - 300)))
+
+    assert history[-1]['timestamp'] == data['timestamp'].iloc[299]
+    assert [decision['charge_kW'] for decision in decisions] == expected['actions']
+    assert [decision['solar_kW_to_battery'] for decision in decisions] == expected['solar_actions']
+    assert [decision['total_profit'] for decision in decisions] == expected['profits']
+    assert [decision['battery_soc'] for decision in decisions] == expected['socs']
+
+def test_remaining_steps():
+    env = StreamingBatteryEnv(expected_steps=3)
+    assert env.initial_info()['remaining_steps'] == 2
+    row = {'price': 50.0, 'pv_power': 0.0}
+    assert env.step_row(row, 5, 0, 0)['remaining_steps'] == 2
+    assert env.step_row(row, 5, 0, 0)['remaining_steps'] == 1
+    assert StreamingBatteryEnv().initial_info()['remaining_steps'] is None
+
+def test_follow_yields_rows_as_they_are_written(tmp_path):
+    lines = open('bot/data/april_start.csv', 'r').read().splitlines(keepends=True)
+    path = tmp_path / 'live.csv'
+    path.write_text(lines[0] + lines[1])
+
+    def append_rest():
+        with open(path, 'a') as file:
+            for line in lines[2:]:
+                time.sleep(0.02)
+                file.write(line[:10])
+                file.flush()
+                time.sleep(0.01)
+                file.write(line[10:])
+                file.flush()
+
+    writer = threading.Thread(target=append_rest)
+    writer.start()
+    with open(path, 'r') as file:
+        rows = list(iter_csv_rows(file, follow=True, poll_interval=0.005, idle_timeout=0.5))
+    writer.join()
+
+    assert rows == list(iter_csv_rows(io.StringIO(''.join(lines))))
+    assert len(rows) == len(lines) - 1
+
+def test_stdin_pipe():
+    with open('bot/data/april_start.csv', 'r') as file:
+        csv_text = file.read()
+    output = subprocess.run([sys.executable, 'bot/stream.py', '--class_name', 'MovingAveragePolicy'], input=csv_text, capture_output=True, text=True, check=True).stdout
+    decisions = [json.loads(line) for line in output.splitlines()]
+
+    assert len(decisions) == len(csv_text.strip().splitlines()) - 1
+    assert decisions[0]['timestamp'] == csv_text.splitlines()[1].split(',')[0]
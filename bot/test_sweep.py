@@ -0,0 +1,26 @@
+import pandas as pd
+from fast_evaluate import evaluate_policy
+from policies import policy_classes
+from sweep import expand_grid, parse_grid, run_sweep
+
+def test_parse_and_expand_grid():
+    grid = parse_grid(['window_size=5,10', "name='a','b'", 'scale=0.5'])
+    assert grid == {'window_size': [5, 10], 'name': ['a', 'b'], 'scale': [0.5]}
+    assert expand_grid(grid) == [
+        {'window_size': 5, 'name': 'a', 'scale': 0.5},
+        {'window_size': 5, 'name': 'b', 'scale': 0.5},
+        {'window_size': 10, 'name': 'a', 'scale': 0.5},
+        {'window_size': 10, 'name': 'b', 'scale': 0.5},
+    ]
+
+def test_run_sweep_ranks_scores():
+    data = pd.read_csv('bot/data/validation_data.csv').iloc[:600]
+    results = run_sweep('MovingAveragePolicy', {'window_size': [5, 20, 'bad']}, data, present_index=100, workers=1)
+
+    assert list(results['rank']) == [1, 2, 3]
+    assert results['window_size'].iloc[-1] == 'bad'
+    assert isinstance(results['error'].iloc[-1], str)
+    assert results['score'].iloc[0] >= results['score'].iloc[1]
+    for _, row in results.iloc[:2].iterrows():
+        expected = evaluate_policy(policy_classes['MovingAveragePolicy'], {'window_size': row['window_size']}, data.iloc[:100], data.iloc[100:])
+        assert row['score'] == expected['score']
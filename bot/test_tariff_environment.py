@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from tariff_environment import BatteryEnv
+from tariff_schedule import DEFAULT_TARIFF, TariffBand, TariffSchedule, load_tariff
+
+DATA_PATHS = ['bot/data/april15-may7_2023.csv', 'bot/data/validation_data.csv', 'bot/data/NEM_SA1_test_data.csv']
+
+def reference_tariff(profit, is_export, timestamp):
+    timestamp = pd.Timestamp(timestamp, tz='UTC') + pd.Timedelta(hours=10)
+    is_peak = timestamp.hour >= 17 and timestamp.hour < 21
+
+    if is_export:
+        if is_peak:
+            return profit + abs(profit * 0.30)
+        return profit - abs(profit * 0.15)
+
+    if is_peak:
+        return profit - abs(profit * 0.40)
+    return profit - abs(profit * 0.05)
+
+class ReferenceBatteryEnv(BatteryEnv):
+    def tariff_at(self, profit, is_export, step):
+        return reference_tariff(profit, is_export, self.market_data.iloc[step]['timestamp'])
+
+def test_default_tariff_matches_timestamp_parsing():
+    for path in DATA_PATHS:
+        timestamps = pd.read_csv(path)['timestamp']
+        import_adjustments, export_adjustments = DEFAULT_TARIFF.compile(timestamps)
+        for profit in [1.0, -1.0]:
+            assert [profit + a * abs(profit) for a in import_adjustments] == [reference_tariff(profit, False, t) for t in timestamps]
+            assert [profit + a * abs(profit) for a in export_adjustments] == [reference_tariff(profit, True, t) for t in timestamps]
+
+def test_default_tariff_file_matches_default_tariff():
+    timestamps = pd.read_csv(DATA_PATHS[1])['timestamp']
+    for expected, actual in zip(DEFAULT_TARIFF.compile(timestamps), load_tariff('bot/tariffs/default.json').compile(timestamps)):
+        assert np.array_equal(expected, actual)
+
+def test_tariff_bands_weekdays_and_wrap_around():
+    schedule = TariffSchedule([
+        TariffBand('16:00', '21:00', import_adjustment=-0.5, export_adjustment=0.5, days='weekdays'),
+        TariffBand('20:00', '06:00', import_adjustment=0.1, export_adjustment=-0.1, days=['sat', 'sun', 'mon']),
+    ], default_import_adjustment=-0.05, default_export_adjustment=-0.15)
+
+    # UTC strings, NEM local time is 10 hours ahead. 2024-04-01 is a Monday.
+    timestamps = ['2024-04-01 06:30:00', '2024-04-01 02:00:00', '2024-04-01 11:05:00', '2024-04-06 06:30:00', '2024-04-06 19:55:00']
+    import_adjustments, export_adjustments = schedule.compile(timestamps)
+
+    assert import_adjustments.tolist() == [-0.5, -0.05, 0.1, -0.05, 0.1]
+    assert export_adjustments.tolist() == [0.5, -0.15, -0.1, -0.15, -0.1]
+
+def test_precomputed_tariff_matches_per_step_parsing():
+    for path in DATA_PATHS:
+        data = pd.read_csv(path).iloc[:1500]
+        rng = np.random.default_rng(0)
+        charge_kW = rng.uniform(-6, 6, size=len(data))
+        solar_kW_to_battery = rng.uniform(0, 5, size=len(data))
+
+        reference = ReferenceBatteryEnv(data=data)
+        battery_env = BatteryEnv(data=data)
+        state, info = battery_env.initial_state()
+        reference.initial_state()
+        while state is not None:
+            i = battery_env.current_step
+            pv_power = float(state['pv_power'])
+            state, info = battery_env.step(charge_kW[i], solar_kW_to_battery[i], pv_power)
+            ref_state, ref_info = reference.step(charge_kW[i], solar_kW_to_battery[i], pv_power)
+            assert info == ref_info
+
+def test_record_observations_match_series_observations():
+    data = pd.read_csv(DATA_PATHS[1]).iloc[:1000]
+    runs = {}
+    for observation_type in ['series', 'record', 'view']:
+        battery_env = BatteryEnv(data=data, observation_type=observation_type)
+        state, info = battery_env.initial_state()
+        steps = []
+        while state is not None:
+            pv_power = float(state['pv_power'])
+            steps.append((state['price'], state['timestamp'], pv_power))
+            state, info = battery_env.step(-2, pv_power / 2, pv_power)
+            steps.append({key: info[key] for key in ['total_profit', 'profit_delta', 'battery_soc', 'max_charge_rate', 'remaining_steps']})
+        runs[observation_type] = steps
+
+    assert runs['record'] == runs['series']
+    assert runs['view'] == runs['series']
+
+def test_fork_and_restore():
+    data = pd.read_csv(DATA_PATHS[1])
+    battery_env = BatteryEnv(data=data)
+    battery_env.initial_state()
+    snapshot = battery_env.snapshot()
+    forked = battery_env.fork()
+
+    state, info = battery_env.step(5, 0, 0)
+    forked_state, forked_info = forked.step(5, 0, 0)
+    assert info == forked_info
+    assert forked.import_adjustments is battery_env.import_adjustments
+
+    battery_env.restore(snapshot)
+    assert battery_env.current_step == 0
+    assert battery_env.battery.state_of_charge_kWh == 7.5
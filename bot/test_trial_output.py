@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import fast_evaluate
+from fast_evaluate import perform_eval
+from trial_output import load_trial
+
+def eval_args(output_file, output_format):
+    return argparse.Namespace(class_name='MovingAveragePolicy', param=['window_size=20'], seed=42, data='bot/data/validation_data.csv',
+                              output_file=output_file, output_format=output_format, plot=False, present_index=300, initial_soc=None, initial_profit=None)
+
+def test_arrow_output_matches_json(tmp_path):
+    perform_eval(eval_args(str(tmp_path / 'full.json'), 'json'))
+    perform_eval(eval_args(str(tmp_path / 'columns.json'), 'arrow'))
+
+    with open(tmp_path / 'full.json', 'r') as file:
+        expected = json.load(file)
+    summary, table = load_trial(str(tmp_path / 'columns.arrow'))
+    trial = expected['main_trial']
+
+    assert summary['score'] == expected['score']
+    assert summary['mean_profit'] == expected['mean_profit']
+    assert summary['final_soc'] == trial['final_soc']
+    assert summary['rundown_profit_deltas'] == trial['rundown_profit_deltas']
+    for name in ['profits', 'socs', 'market_prices', 'actions', 'solar_actions', 'pv_inputs']:
+        assert np.array_equal(table.column(name).to_numpy(), np.array(trial[name], dtype=float))
+    assert table.column('timestamps').to_pandas().equals(pd.to_datetime(pd.Series(trial['timestamps']), utc=True))
+
+def test_stream_matches_full_trial(tmp_path):
+    perform_eval(eval_args(str(tmp_path / 'full.json'), 'json'))
+    stream_args = eval_args(str(tmp_path / 'stream.json'), 'arrow')
+    stream_args.stream = True
+    stream_args.chunk_size = 1000
+    perform_eval(stream_args)
+
+    with open(tmp_path / 'full.json', 'r') as file:
+        expected = json.load(file)
+    summary, table = load_trial(str(tmp_path / 'stream.json'))
+    trial = expected['main_trial']
+
+    assert summary['score'] == expected['score']
+    assert summary['final_soc'] == trial['final_soc']
+    assert summary['steps'] == len(trial['profits'])
+    assert summary['mean_profit'] == pytest.approx(expected['mean_profit'], rel=1e-12)
+    assert summary['std_profit'] == pytest.approx(expected['std_profit'], rel=1e-9)
+    assert summary['min_profit'] == min(trial['profits'])
+    assert summary['max_profit'] == max(trial['profits'])
+    assert table.column('profits').num_chunks > 1
+    for name in ['profits', 'socs', 'market_prices', 'actions', 'solar_actions', 'pv_inputs']:
+        assert np.array_equal(table.column(name).to_numpy(), np.array(trial[name], dtype=float))
+
+def test_initial_soc_without_initial_profit(tmp_path):
+    args = eval_args(str(tmp_path / 'full.json'), 'json')
+    args.initial_soc = 13.0
+    perform_eval(args)
+
+    with open(tmp_path / 'full.json', 'r') as file:
+        trial = json.load(file)['main_trial']
+    assert trial['socs'][0] >= 13.0 - 5 / 12
+
+def test_failed_stream_leaves_no_partial_file(tmp_path, monkeypatch):
+    def failing_trial(battery_environment, policy, trial_writer, timer):
+        trial_writer.append(0.0, 7.5, 50.0, 0.0, 0.0, 0.0, '2023-04-15 00:00:00')
+        raise RuntimeError('policy failed')
+    monkeypatch.setattr(fast_evaluate, 'stream_trial', failing_trial)
+
+    args = eval_args(str(tmp_path / 'stream.json'), 'arrow')
+    args.stream = True
+    args.chunk_size = 1
+    with pytest.raises(RuntimeError):
+        perform_eval(args)
+    assert os.listdir(tmp_path) == []
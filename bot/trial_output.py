@@ -0,0 +1,172 @@
+"""
+Columnar storage for evaluation results.
+
+`evaluate.py` writes the per-step series of a trial as JSON lists. `write_trial` stores the same
+result as two files instead:
+
+- `<name>.arrow`: an uncompressed Arrow IPC file with one typed column per series (float64
+  profits, SOCs, prices and actions, and UTC timestamps).
+- `<name>.json`: the summary (`class_name`, `parameters`, `score`, `mean_profit`, ...) plus the
+  short `final_soc` and `rundown_profit_deltas`, and the name of the Arrow file.
+
+`load_trial` memory-maps the Arrow file back, so reading a result only touches the columns used.
+
+`TrialWriter` writes the same Arrow file one chunk of steps at a time, for streaming evaluations
+which never hold the whole trial in memory.
+
+pyarrow is imported when it is first needed, so importing this module stays cheap.
+"""
+
+import json
+import os
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+JSON = 'json'
+ARROW = 'arrow'
+OUTPUT_FORMATS = (JSON, ARROW)
+
+SERIES_COLUMNS = ['profits', 'socs', 'market_prices', 'actions', 'solar_actions', 'pv_inputs']
+TIMESTAMP_COLUMN = 'timestamps'
+TRIAL_KEY = 'main_trial'
+
+
+def output_paths(output_file: str) -> Tuple[str, str]:
+    """
+    The summary and Arrow file paths for an output file name (with or without an extension).
+    """
+    base = os.path.splitext(output_file)[0]
+    return base + '.json', base + '.arrow'
+
+
+def trial_arrays(trial_data: dict) -> list:
+    import pyarrow as pa
+
+    arrays = [pa.array(np.asarray(trial_data[name], dtype=np.float64)) for name in SERIES_COLUMNS]
+    timestamps = pd.to_datetime(pd.Series(trial_data[TIMESTAMP_COLUMN], dtype=object), utc=True)
+    arrays.append(pa.array(timestamps, type=pa.timestamp('ns', tz='UTC')))
+    return arrays
+
+
+def trial_table(trial_data: dict):
+    """
+    Convert the per-step series of a trial into an Arrow table.
+    """
+    import pyarrow as pa
+
+    return pa.Table.from_arrays(trial_arrays(trial_data), names=SERIES_COLUMNS + [TIMESTAMP_COLUMN])
+
+
+def write_summary(summary_file: str, summary: dict, arrow_file: str):
+    summary = dict(summary, trial_file=os.path.basename(arrow_file))
+    with open(summary_file, 'w') as file:
+        json.dump(summary, file, indent=2)
+
+
+def write_trial(output_file: str, outcome: dict) -> Tuple[str, str]:
+    """
+    Write an evaluation outcome as a JSON summary and an Arrow file of its trial.
+
+    :param output_file: Where to write; the extension is replaced by `.json` and `.arrow`.
+    :param outcome: The outcome `evaluate.py` would write, including its `main_trial`.
+    :return: The summary and Arrow file paths.
+    """
+    import pyarrow as pa
+
+    summary_file, arrow_file = output_paths(output_file)
+    trial_data = outcome[TRIAL_KEY]
+
+    table = trial_table(trial_data)
+    with pa.OSFile(arrow_file, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    summary = {key: value for key, value in outcome.items() if key != TRIAL_KEY}
+    summary['final_soc'] = trial_data['final_soc']
+    summary['rundown_profit_deltas'] = trial_data['rundown_profit_deltas']
+    write_summary(summary_file, summary, arrow_file)
+
+    return summary_file, arrow_file
+
+
+class TrialWriter:
+    """
+    Write the per-step series of a trial to an Arrow file in chunks of `chunk_size` steps.
+
+    Use `append` once per step, then `close(summary)` to flush the last chunk and write the JSON
+    summary. The result can be read with `load_trial`, like the output of `write_trial`. If the
+    trial fails, `abort` closes the file and removes it rather than leave a partial trial.
+    """
+
+    def __init__(self, output_file: str, chunk_size: int = 8192):
+        import pyarrow as pa
+
+        self.summary_file, self.arrow_file = output_paths(output_file)
+        self.chunk_size = chunk_size
+        self.steps = 0
+        self._chunk = {name: [] for name in SERIES_COLUMNS + [TIMESTAMP_COLUMN]}
+        self._schema = pa.schema([(name, pa.float64()) for name in SERIES_COLUMNS] + [(TIMESTAMP_COLUMN, pa.timestamp('ns', tz='UTC'))])
+        self._sink = pa.OSFile(self.arrow_file, 'wb')
+        self._writer = pa.ipc.new_file(self._sink, self._schema)
+
+    def append(self, profit: float, soc: float, market_price: float, action: float, solar_action: float, pv_input: float, timestamp):
+        for name, value in zip(self._chunk, (profit, soc, market_price, action, solar_action, pv_input, timestamp)):
+            self._chunk[name].append(value)
+        self.steps += 1
+        if len(self._chunk[TIMESTAMP_COLUMN]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        import pyarrow as pa
+
+        if not self._chunk[TIMESTAMP_COLUMN]:
+            return
+        self._writer.write_batch(pa.RecordBatch.from_arrays(trial_arrays(self._chunk), schema=self._schema))
+        for values in self._chunk.values():
+            values.clear()
+
+    def close(self, summary: dict) -> Tuple[str, str]:
+        """
+        Finish the Arrow file and write `summary` next to it.
+
+        :return: The summary and Arrow file paths.
+        """
+        self.flush()
+        self._writer.close()
+        self._sink.close()
+        write_summary(self.summary_file, summary, self.arrow_file)
+        return self.summary_file, self.arrow_file
+
+    def abort(self):
+        """
+        Close the Arrow file without a summary and delete it.
+        """
+        try:
+            self._writer.close()
+        finally:
+            self._sink.close()
+            if os.path.exists(self.arrow_file):
+                os.remove(self.arrow_file)
+
+
+def load_trial(output_file: str):
+    """
+    Load a result written by `write_trial`.
+
+    :param output_file: The summary or Arrow file (or the name without an extension).
+    :return: The summary dict and the memory-mapped trial as a `pyarrow.Table`. Float columns
+        written in a single chunk convert to NumPy without copying, e.g.
+        `table.column('profits').to_numpy()`.
+    """
+    import pyarrow as pa
+
+    summary_file, _ = output_paths(output_file)
+    with open(summary_file, 'r') as file:
+        summary = json.load(file)
+
+    arrow_file = os.path.join(os.path.dirname(summary_file), summary['trial_file'])
+    source = pa.memory_map(arrow_file, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    return summary, table
@@ -1,12 +1,12 @@
 import os
 import sys
 
-import pandas as pd
 from stable_baselines3 import PPO
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 
+from bot.market_data import load_market_data
 from BGT.env import BatteryGym
 
 MODEL_DIR = "./models/spot_soc_pv/"
@@ -39,8 +39,7 @@ def main():
 
 def get_clean_data():
     col = ["timestamp", "price", "demand", "pv_power"]
-    df = pd.read_csv("./bot/data/training_data.csv")
-    df = df[col]
+    df = load_market_data("./bot/data/training_data.csv", columns=col)
     df.dropna(inplace=True)
 
     return df
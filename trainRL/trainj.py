@@ -8,6 +8,7 @@ from stable_baselines3 import PPO
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 
+from bot.market_data import load_market_data
 from BGT.envj import BatteryGymJ
 
 MODEL_DIR = "./models/j/"
@@ -40,8 +41,8 @@ def main():
 
 def get_clean_data():
     col = ["timestamp", "price", "demand", "pv_power"]
-    df = pd.read_csv("./bot/data/training_data.csv")
-    df = df[col]
+    # Read through the Arrow cache, whose hour fields equal pd.to_datetime(df["timestamp"]).dt.hour etc.
+    df = load_market_data("./bot/data/training_data.csv", columns=col + ["hour", "day_of_week"])
     df.dropna(inplace=True)
     df = create_features(df)
 
@@ -51,17 +52,13 @@ def get_clean_data():
 def create_features(df):
     df["return"] = df["price"].pct_change()
     df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df["hour"] = df["timestamp"].dt.hour
-    df["day_of_week"] = df["timestamp"].dt.day_of_week
     df["sin_hour"] = np.sin(2 * np.pi * df["hour"] / 24)
     df["cos_hour"] = np.cos(2 * np.pi * df["hour"] / 24)
     df["sin_day"] = np.sin(2 * np.pi * df["day_of_week"] / 7)
     df["cos_day"] = np.cos(2 * np.pi * df["day_of_week"] / 7)
     # Define peak hours
-    df["is_peak"] = df["hour"].apply(lambda x: 1 if 17 <= x < 21 else 0)
-    df["is_off_peak"] = df["hour"].apply(
-        lambda x: 1 if 0 <= x < 17 or 21 <= x < 24 else 0
-    )
+    df["is_peak"] = df["hour"].between(17, 20).astype(int)
+    df["is_off_peak"] = 1 - df["is_peak"]
     df["price_negative"] = (df["price"] < 0).astype(int)
     return df
 